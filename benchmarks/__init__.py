@@ -0,0 +1 @@
+# Este ficheiro vazio transforma a pasta 'benchmarks' num pacote Python.
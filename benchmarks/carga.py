@@ -0,0 +1,190 @@
+# Teste de carga: N utilizadores simulados a fazer quizzes completos em simultâneo no mesmo processo.
+# Cada utilizador corre numa thread (como as sessões de um servidor Streamlit) sobre o motor headless
+# (core.engine), com o seu vocabulário e o seu histórico num Firestore em memória partilhado.
+# Mede a latência de cada rerun do motor (abrir a sessão, iniciar o quiz, responder, terminar),
+# as operações de armazenamento por resposta e a memória do processo.
+# A renderização do Streamlit não entra nas medições.
+#
+# Uso: python -m benchmarks.carga [--usuarios 1 10 50] [--palavras 1000] [--sessoes 3] [--saida arquivo.json]
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from core.corpus import ler_flashcards, ler_exercicios_gpt, ler_exercicios_cloze, compilar_templates, construir_indice_corpus
+from firebase_admin import firestore
+from core.engine import Vocabulario, start_quiz, next_question, answer, finish
+from benchmarks.corpus_sintetico import gerar_corpus, carregar_fixtures
+from benchmarks.firestore_memoria import FirestoreMemoria
+from benchmarks.relatorio import novo_relatorio, gravar_relatorio
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODOS_CARGA = ('anki', 'gpt', 'mixed')
+PERCENTIS = (50, 95, 99)
+
+class ArmazenamentoUsuario:
+    """Armazenamento do motor de quiz de um utilizador simulado, com coleções próprias no FirestoreMemoria."""
+
+    def __init__(self, cliente, usuario):
+        self.cliente = cliente
+        self.vocab = cliente.collection(f"vocab_{usuario}")
+        self.historico = cliente.collection(f"history_{usuario}").document('user_history')
+        self.resumos_diarios = cliente.collection(f"daily_stats_{usuario}")
+
+    def carregar_palavras(self):
+        return [doc.to_dict() for doc in self.vocab.stream()]
+
+    def gravar_palavras(self, df):
+        lote = self.cliente.batch()
+        for registro in df.to_dict('records'):
+            lote.set(self.vocab.document(registro['palavra']), registro)
+        lote.commit()
+
+    def carregar_historico(self):
+        doc = self.historico.get()
+        return doc.to_dict() if doc.exists else {"quiz": [], "gpt_quiz": [], "mixed_quiz": []}
+
+    def gravar_historico(self, historico):
+        self.historico.set(historico)
+
+    def somar_resumo_diario(self, dia, valores):
+        self.resumos_diarios.document(dia).set(
+            {'data': dia, **{campo: firestore.Increment(valor) for campo, valor in valores.items()}}, merge=True)
+
+def memoria_processo_mb():
+    """Pico de memória residente do processo em MB (None onde o módulo resource não existe)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def carregar_corpus(caminhos, language):
+    """Índice do corpus partilhado por todos os utilizadores (como o get_corpus_index em cache_resource)."""
+    flashcards, _ = ler_flashcards(caminhos['cartoes'], language)
+    gpt_exercicios, _ = ler_exercicios_gpt(caminhos['gpt'], language)
+    cloze_exercicios, _ = ler_exercicios_cloze(caminhos['cloze'], language)
+    compilar_templates(flashcards, gpt_exercicios + cloze_exercicios)
+    return construir_indice_corpus(flashcards, gpt_exercicios + cloze_exercicios)
+
+def simular_usuario(usuario, cliente, corpus, n_sessoes, n_questoes, taxa_acerto, semente):
+    """Faz `n_sessoes` quizzes de um utilizador. Devolve ({etapa: [latências em ms]}, respostas dadas)."""
+    rng = random.Random(semente)
+    armazenamento = ArmazenamentoUsuario(cliente, usuario)
+    latencias = defaultdict(list)
+    respostas = 0
+
+    inicio = time.perf_counter()
+    db_df = pd.DataFrame(armazenamento.carregar_palavras())
+    db_df['data_adicao'] = pd.to_datetime(db_df['data_adicao'], errors='coerce', utc=True)
+    vocab = Vocabulario(db_df)
+    latencias['abrir_sessao'].append((time.perf_counter() - inicio) * 1000)
+
+    for _ in range(n_sessoes):
+        inicio = time.perf_counter()
+        sessao = start_quiz(vocab, corpus, rng.choice(MODOS_CARGA), n_questoes)
+        latencias['start_quiz'].append((time.perf_counter() - inicio) * 1000)
+        if sessao is None:
+            continue
+        while True:
+            # Um rerun da página: mostrar a questão corrente e corrigir a resposta escolhida
+            inicio = time.perf_counter()
+            questao = next_question(sessao, vocab, corpus)
+            if questao is None:
+                break
+            _, _, opcoes, indice_correto, _, _ = questao
+            answer(sessao, opcoes[indice_correto] if rng.random() < taxa_acerto else rng.choice(opcoes))
+            latencias['responder'].append((time.perf_counter() - inicio) * 1000)
+            respostas += 1
+        inicio = time.perf_counter()
+        finish(sessao, vocab, corpus, armazenamento)
+        latencias['finish'].append((time.perf_counter() - inicio) * 1000)
+    return latencias, respostas
+
+def resumir_latencias(valores):
+    if not valores:
+        return {'n': 0}
+    valores = np.asarray(valores)
+    return {'n': len(valores), **{f"p{p}_ms": round(float(np.percentile(valores, p)), 3) for p in PERCENTIS},
+            'max_ms': round(float(valores.max()), 3)}
+
+def executar_carga(n_usuarios, corpus, vocab_fixture, historico_fixture, n_sessoes, n_questoes, taxa_acerto, semente=0):
+    """Corre `n_usuarios` utilizadores em simultâneo e devolve as métricas da execução."""
+    cliente = FirestoreMemoria()
+    for usuario in range(n_usuarios):
+        cliente.carregar(f"vocab_{usuario}", vocab_fixture)
+        cliente.carregar(f"history_{usuario}", {'user_history': historico_fixture})
+    memoria_inicial = memoria_processo_mb()
+
+    barreira = threading.Barrier(n_usuarios)
+    def tarefa(usuario):
+        barreira.wait()  # todos os utilizadores começam ao mesmo tempo
+        return simular_usuario(usuario, cliente, corpus, n_sessoes, n_questoes, taxa_acerto, semente + usuario)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_usuarios) as executor:
+        resultados = list(executor.map(tarefa, range(n_usuarios)))
+    duracao = time.perf_counter() - inicio
+
+    latencias, respostas = defaultdict(list), 0
+    for latencias_usuario, respostas_usuario in resultados:
+        for etapa, valores in latencias_usuario.items():
+            latencias[etapa].extend(valores)
+        respostas += respostas_usuario
+    operacoes = dict(cliente.operacoes)
+    # A leitura inicial do vocabulário acontece uma vez por sessão do navegador, não por resposta
+    leituras_abertura = len(vocab_fixture) * n_usuarios
+    return {
+        'usuarios': n_usuarios,
+        'respostas': respostas,
+        'duracao_s': round(duracao, 3),
+        'respostas_por_segundo': round(respostas / duracao, 1) if duracao else None,
+        'latencia_rerun': resumir_latencias([v for valores in latencias.values() for v in valores]),
+        'latencia_por_etapa': {etapa: resumir_latencias(valores) for etapa, valores in latencias.items()},
+        'operacoes': operacoes,
+        'operacoes_por_resposta': {
+            'leituras': round((operacoes['leituras'] - leituras_abertura) / respostas, 3) if respostas else None,
+            'escritas': round(operacoes['escritas'] / respostas, 3) if respostas else None,
+        },
+        'memoria_mb': {'pico_antes': memoria_inicial, 'pico_depois': memoria_processo_mb()},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga com utilizadores simulados.")
+    parser.add_argument('--usuarios', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--palavras', type=int, default=1000)
+    parser.add_argument('--sessoes', type=int, default=3, help="Quizzes por utilizador")
+    parser.add_argument('--questoes', type=int, default=10, help="Questões (ou palavras no modo GPT) por quiz")
+    parser.add_argument('--taxa-acerto', type=float, default=0.7)
+    parser.add_argument('--idioma', default='en')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help="Arquivo JSON de saída (padrão: benchmarks/resultados/carga_<data>.json)")
+    args = parser.parse_args(argv)
+
+    relatorio = novo_relatorio(palavras=args.palavras, sessoes=args.sessoes, questoes=args.questoes, taxa_acerto=args.taxa_acerto)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = gerar_corpus(pasta, args.palavras, args.idioma, args.semente)
+        corpus = carregar_corpus(caminhos, args.idioma)
+        vocab_fixture, historico_fixture = carregar_fixtures(caminhos)
+
+    for n_usuarios in args.usuarios:
+        metricas = executar_carga(n_usuarios, corpus, vocab_fixture, historico_fixture,
+                                  args.sessoes, args.questoes, args.taxa_acerto, args.semente)
+        relatorio['resultados'][str(n_usuarios)] = metricas
+        latencia = metricas['latencia_rerun']
+        print(f"[{n_usuarios} utilizadores] {metricas['respostas']} respostas em {metricas['duracao_s']} s | "
+              f"rerun p50 {latencia.get('p50_ms')} ms, p95 {latencia.get('p95_ms')} ms, p99 {latencia.get('p99_ms')} ms | "
+              f"por resposta: {metricas['operacoes_por_resposta']} | memória {metricas['memoria_mb']['pico_depois']} MB", file=sys.stderr)
+
+    gravar_relatorio(relatorio, args.saida, 'carga')
+
+if __name__ == "__main__":
+    main()
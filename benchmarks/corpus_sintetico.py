@@ -0,0 +1,165 @@
+import os
+import json
+import random
+import datetime
+from core.corpus import gerar_id_exercicio, ids_do_cartao
+from core.scheduler import atualizar_estado, empacotar_estado
+
+# --- Corpus Sintético ---
+# Gera, numa pasta à parte, os quatro arquivos base no formato da pasta 'data/' e os fixtures do
+# vocabulário e do histórico (no formato dos documentos do Firestore), para medir o app com 1k, 10k ou 100k palavras.
+# Metade das palavras vem dos cartões ANKI e a outra metade dos exercícios GPT; a geração é determinística pela semente.
+
+ARQUIVOS_BASE = {
+    'cartoes': 'cartoes_validacao.txt',
+    'gpt': 'Dados_Manual_output_GPT.txt',
+    'cloze': 'Dados_Manual_Cloze_text.txt',
+    'frases': 'palavras_unicas_por_tipo.txt',
+}
+SILABAS = ['ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'zo', 'tra', 'ple', 'qui', 'dro']
+CLASSES = ['Noun', 'Verb', 'Adjective', 'Adverb', 'Phrase']
+NIVEIS = ['A1', 'A2', 'B1', 'B2', 'C1', 'C2']
+TIPOS_GPT = ['1-Gap-Fill', '2-Word-Meaning', '3-Paraphrase', '4-Minimal-Pair', '5-Cognate-Gap', '6-Family-Gap']
+TIPOS_SIGNIFICADO = ('2-Word-Meaning', '3-Paraphrase', '4-Minimal-Pair')
+PALAVRAS_POR_CLOZE = 10
+LACUNAS_CLOZE = 7
+
+def gerar_palavra(i):
+    """Palavra sintética única para o índice i (escrita em base len(SILABAS))."""
+    silabas = []
+    while True:
+        i, resto = divmod(i, len(SILABAS))
+        silabas.append(SILABAS[resto])
+        if i == 0:
+            break
+        i -= 1
+    return ''.join(reversed(silabas)) + 'x'
+
+def _cartao(palavra, rng, idioma):
+    return {
+        'front': palavra,
+        'back': f"tradução de {palavra}",
+        'example': f"They said {palavra} twice during the meeting",
+        'cloze_answer': f"{palavra}ish",
+        'type': rng.choice(CLASSES), 'level': rng.choice(NIVEIS), 'idioma': idioma,
+    }
+
+def _bloco_cartao(cartao):
+    return "\n".join([
+        f"{cartao['front']} ({cartao['type']} | {cartao['level']} | {cartao['idioma']}):",
+        f"- Frase EN: {cartao['example']}",
+        f"- Tradução: {cartao['back']}",
+        f"- Tradução Frase: Eles disseram {cartao['back']} duas vezes na reunião.",
+        f"- Outra frase EN: Nobody expected {cartao['front']} to matter that much",
+        f"- Significado: The meaning of {cartao['front']}",
+        f"- Sinônimo: {cartao['cloze_answer']}",
+        "- Tags: sintetico",
+    ])
+
+def _exercicios_gpt(palavra, rng, palavras):
+    """
+    Um exercício de cada tipo padrão (1 a 6) para a palavra, com três distratores do próprio corpus.
+    Nos tipos de significado a resposta é uma paráfrase (o app retira a palavra-chave das opções).
+    """
+    exercicios = []
+    for tipo in TIPOS_GPT:
+        distratores = [p for p in rng.sample(palavras, 4) if p != palavra][:3]
+        if tipo in TIPOS_SIGNIFICADO:
+            correta = f"sentido de {palavra}"
+            distratores = [f"sentido de {p}" for p in distratores]
+        else:
+            correta = palavra
+        opcoes = [correta] + distratores
+        rng.shuffle(opcoes)
+        frase = f"[{tipo}] Everyone agreed that __________ was the right word for {palavra} in this context."
+        exercicios.append((tipo, frase, opcoes, correta, rng.choice(NIVEIS)))
+    return exercicios
+
+def gerar_corpus(pasta, n_palavras, language='en', semente=0):
+    """
+    Escreve os arquivos base e os fixtures de um corpus com `n_palavras` palavras em `pasta`.
+    Devolve o dicionário {nome: caminho} dos arquivos gerados.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    rng = random.Random(semente)
+    idioma_cartao = "English" if language == 'en' else "Francais"
+    tipo_nota = "BASE English" if language == 'en' else "BASE French"
+    palavras = [gerar_palavra(i) for i in range(n_palavras)]
+    palavras_anki, palavras_gpt = palavras[:n_palavras // 2], palavras[n_palavras // 2:]
+    caminhos = {nome: os.path.join(pasta, arquivo) for nome, arquivo in ARQUIVOS_BASE.items()}
+
+    cartoes = [_cartao(palavra, rng, idioma_cartao) for palavra in palavras_anki]
+    with open(caminhos['cartoes'], 'w', encoding='utf-8') as f:
+        f.write("\n\n".join(_bloco_cartao(cartao) for cartao in cartoes) + "\n")
+
+    exercicios_por_palavra = {}
+    with open(caminhos['gpt'], 'w', encoding='utf-8') as f:
+        for palavra in palavras_gpt:
+            exercicios_por_palavra[palavra] = _exercicios_gpt(palavra, rng, palavras)
+            for tipo, frase, opcoes, correta, nivel in exercicios_por_palavra[palavra]:
+                f.write(f"{language};{tipo};{frase};{' | '.join(opcoes)};{correta};{palavra};{nivel}\n")
+
+    with open(caminhos['cloze'], 'w', encoding='utf-8') as f:
+        for inicio in range(0, len(palavras_gpt), PALAVRAS_POR_CLOZE):
+            grupo = palavras_gpt[inicio:inicio + PALAVRAS_POR_CLOZE]
+            corretas = grupo[:LACUNAS_CLOZE]
+            texto = " ".join(f"Sentence {n} uses [GAP{n}] here." for n in range(1, len(corretas) + 1))
+            f.write(f"{language};7-Cloze-Text;{texto};{' | '.join(grupo)};{'|'.join(corretas)};B2;Texto sintético {inicio // PALAVRAS_POR_CLOZE + 1}\n")
+
+    with open(caminhos['frases'], 'w', encoding='utf-8') as f:
+        for palavra in palavras:
+            f.write(f"Palavra: {palavra}\n  - Tipo de Nota: {tipo_nota}\n  - Classe: {rng.choice(CLASSES)}\n"
+                    f"  - Nível: {rng.choice(NIVEIS)}\n  - Outra Frase: A sentence with {palavra}\n\n")
+
+    # --- Fixtures do vocabulário e do histórico ---
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    ids_por_palavra = {cartao['front']: list(ids_do_cartao(cartao).values()) for cartao in cartoes}
+    for palavra, exercicios in exercicios_por_palavra.items():
+        ids_por_palavra[palavra] = [gerar_id_exercicio(tipo, palavra, frase) for tipo, frase, _, _, _ in exercicios]
+
+    palavras_anki_set = set(palavras_anki)
+    vocab = []
+    for palavra in palavras:
+        progresso, agenda = {}, {}
+        testado = rng.random() < 0.6
+        for id_ex in ids_por_palavra[palavra]:
+            status = rng.choice(['acerto', 'acerto', 'erro', 'nao_testado']) if testado else 'nao_testado'
+            progresso[id_ex] = status
+            if status != 'nao_testado':
+                respondido = agora - datetime.timedelta(days=rng.randint(0, 30))
+                agenda[id_ex] = empacotar_estado(atualizar_estado(None, status == 'acerto', agora=respondido))
+        vocab.append({
+            'palavra': palavra, 'ativa': rng.random() < 0.8, 'fonte': 'ANKI' if palavra in palavras_anki_set else 'GPT',
+            'data_adicao': (agora - datetime.timedelta(days=rng.randint(0, 365))).isoformat(),
+            'escrita_completa': rng.random() < 0.1, 'progresso': progresso, 'mastery_count': rng.randint(0, 2), 'agenda': agenda,
+        })
+    caminhos['vocab'] = os.path.join(pasta, f"vocab_database_{language}.json")
+    with open(caminhos['vocab'], 'w', encoding='utf-8') as f:
+        json.dump(vocab, f, ensure_ascii=False)
+
+    historico = {"quiz": [], "gpt_quiz": [], "mixed_quiz": []}
+    for n in range(max(1, n_palavras // 10)):
+        sessao = rng.sample(palavras, min(10, n_palavras))
+        acertos = sessao[:rng.randint(0, len(sessao))]
+        historico[rng.choice(list(historico))].append({
+            "data": (agora - datetime.timedelta(minutes=n * 30)).isoformat(),
+            "acertos": acertos, "erros": sessao[len(acertos):],
+            "score": int(len(acertos) / len(sessao) * 100), "total": len(sessao),
+        })
+    caminhos['historico'] = os.path.join(pasta, f"historico_{language}.json")
+    with open(caminhos['historico'], 'w', encoding='utf-8') as f:
+        json.dump(historico, f, ensure_ascii=False)
+    return caminhos
+
+def carregar_fixtures(caminhos):
+    """
+    Lê os fixtures gerados, devolvendo (documentos do vocabulário por palavra, histórico).
+    As datas de adição voltam a ser datetime com fuso, como o Firestore as devolve.
+    """
+    with open(caminhos['vocab'], encoding='utf-8') as f:
+        vocab = json.load(f)
+    for doc in vocab:
+        doc['data_adicao'] = datetime.datetime.fromisoformat(doc['data_adicao'])
+    with open(caminhos['historico'], encoding='utf-8') as f:
+        historico = json.load(f)
+    return {doc['palavra']: doc for doc in vocab}, historico
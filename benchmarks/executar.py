@@ -0,0 +1,150 @@
+# Benchmarks do carregamento, sincronização, seleção de questões e resumo de desempenho.
+# Para cada tamanho gera um corpus sintético (ver benchmarks.corpus_sintetico), aponta o core.data_manager
+# para esses arquivos e para um Firestore em memória, e mede cada função com várias repetições.
+# O resultado é gravado em JSON para comparar execuções ao longo do tempo.
+#
+# Uso: python -m benchmarks.executar [--tamanhos 1000 10000 100000] [--repeticoes 5] [--saida arquivo.json]
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+import streamlit as st
+import streamlit.logger
+from streamlit import config
+
+# Fora do `streamlit run` o Streamlit avisa a cada acesso ao session_state e ao cache; os avisos não interessam aqui
+config.set_option('logger.level', 'error')
+streamlit.logger.set_log_level('error')
+import core.data_manager as dm
+from core.quiz_logic import selecionar_questoes_priorizadas, selecionar_questoes_gpt, gerar_questao_dinamica
+from benchmarks.corpus_sintetico import gerar_corpus, carregar_fixtures
+from benchmarks.firestore_memoria import FirestoreMemoria
+from benchmarks.relatorio import novo_relatorio, gravar_relatorio
+
+TAMANHOS_PADRAO = (1000, 10000, 100000)
+QUESTOES_POR_MEDICAO = 200
+
+def medir(funcao, repeticoes, preparar=None):
+    """
+    Executa `funcao` `repeticoes` vezes e devolve os tempos em milissegundos.
+    `preparar()`, se passado, corre antes de cada repetição e fora da medição.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'repeticoes': repeticoes,
+        'min_ms': round(min(tempos), 3),
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'max_ms': round(max(tempos), 3),
+    }
+
+def preparar_ambiente(caminhos, language):
+    """Aponta o data_manager para o corpus sintético e para um Firestore em memória com os fixtures."""
+    dm.CARTOES_FILE_BASE = caminhos['cartoes']
+    dm.GPT_FILE_BASE = caminhos['gpt']
+    dm.CLOZE_FILE_BASE = caminhos['cloze']
+    dm.SENTENCE_WORDS_FILE = caminhos['frases']
+    # A cópia local do vocabulário fica junto do corpus sintético, longe da do app
+    dm.PASTA_CACHE = os.path.join(os.path.dirname(caminhos['vocab']), 'cache')
+    vocab, historico = carregar_fixtures(caminhos)
+    dm.db = FirestoreMemoria()
+    dm.db.carregar(dm.get_collection_name(dm.DB_COLLECTION_NAME, language), vocab)
+    dm.db.carregar(dm.get_collection_name(dm.HISTORY_COLLECTION_NAME, language), {'user_history': historico})
+    limpar_caches(language)
+
+def limpar_corpus():
+    dm.clear_corpus_caches(disk=True)
+
+def limpar_caches(language):
+    limpar_corpus()
+    for chave in (f"db_df_{language}", f"vocabulario_{language}", f"sync_db_{language}"):
+        st.session_state.pop(chave, None)
+
+def executar_tamanho(n_palavras, repeticoes, language='en', semente=0):
+    """Mede todas as funções para um corpus de `n_palavras` palavras. Devolve {nome: estatísticas}."""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        inicio = time.perf_counter()
+        caminhos = gerar_corpus(pasta, n_palavras, language, semente)
+        resultados['gerar_corpus_sintetico'] = {'repeticoes': 1, 'min_ms': round((time.perf_counter() - inicio) * 1000, 3)}
+        preparar_ambiente(caminhos, language)
+
+        # --- Leitura dos arquivos base (sem cache em memória nem em disco) ---
+        resultados['carregar_flashcards_from_file'] = medir(
+            lambda: dm.carregar_flashcards_from_file(language), repeticoes, limpar_corpus)
+        resultados['carregar_gpt_from_file'] = medir(
+            lambda: dm.carregar_gpt_from_file(language), repeticoes, limpar_corpus)
+        resultados['carregar_cloze_from_file'] = medir(
+            lambda: dm.carregar_cloze_from_file(language), repeticoes, limpar_corpus)
+        resultados['load_sentence_data'] = medir(lambda: dm.load_sentence_data(language), repeticoes, limpar_corpus)
+        resultados['get_corpus_index'] = medir(
+            lambda: dm.get_corpus_index(language), repeticoes, limpar_corpus)
+        # Um processo novo com o cache em disco já preenchido (reinício do servidor ou outro worker)
+        resultados['get_corpus_index_cache_disco'] = medir(
+            lambda: dm.get_corpus_index(language), repeticoes, dm.clear_corpus_caches)
+
+        # --- Sincronização com o Firestore (corpus já em cache, como no arranque de uma sessão) ---
+        resultados['sync_database'] = medir(lambda: dm.sync_database(language), repeticoes)
+
+        # --- Seleção e geração de questões sobre o vocabulário da sessão ---
+        vocab = dm.get_session_vocab(language)
+        corpus = dm.get_corpus_index(language)
+        db_df = vocab.db_df
+        ativas = db_df[db_df['ativa'] == True]
+        resultados['fila_revisao_construir'] = medir(
+            lambda: vocab.fila(corpus), repeticoes, lambda: setattr(vocab, '_fila', None))
+        fila = vocab.fila(corpus)
+        exercicios, pesos = vocab.exercicios(corpus), vocab.pesos
+        resultados['selecionar_questoes_priorizadas'] = medir(
+            lambda: selecionar_questoes_priorizadas(
+                ativas, corpus['cartoes'], corpus['exercicios_por_palavra'], 10, fila=fila, exercicios=exercicios, pesos=pesos,
+            ), repeticoes)
+        resultados['selecionar_questoes_gpt'] = medir(
+            lambda: selecionar_questoes_gpt(ativas, corpus['exercicios_por_palavra'], "Random", 10, False, fila=fila), repeticoes)
+
+        rng = random.Random(semente)
+        palavras = rng.sample(list(db_df['palavra']), min(QUESTOES_POR_MEDICAO, len(db_df)))
+        itens = [
+            {'palavra': palavra, 'tipo_exercicio': tipo, 'identificador': id_ex}
+            for palavra in palavras
+            for id_ex, tipo in [rng.choice(list(dm.get_available_exercise_types_for_word(palavra, corpus['cartoes'], corpus['exercicios_por_palavra']).items()))]
+        ]
+        medicao = medir(lambda: [gerar_questao_dinamica(item, corpus, db_df) for item in itens], repeticoes)
+        resultados['gerar_questao_dinamica'] = {
+            'repeticoes': repeticoes, 'questoes': len(itens),
+            **{chave: round(valor / len(itens), 4) for chave, valor in medicao.items() if chave.endswith('_ms')},
+        }
+
+        # --- Resumo de desempenho (página de estatísticas) ---
+        resultados['get_performance_summary'] = medir(lambda: dm.get_performance_summary(language), repeticoes)
+        limpar_caches(language)
+    return resultados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do corpus sintético.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO))
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--idioma', default='en')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help="Arquivo JSON de saída (padrão: benchmarks/resultados/bench_<data>.json)")
+    args = parser.parse_args(argv)
+
+    relatorio = novo_relatorio(repeticoes=args.repeticoes)
+    for n_palavras in args.tamanhos:
+        print(f"[{n_palavras} palavras] a medir...", file=sys.stderr)
+        resultados = executar_tamanho(n_palavras, args.repeticoes, args.idioma, args.semente)
+        relatorio['resultados'][str(n_palavras)] = resultados
+        for nome, estatisticas in resultados.items():
+            print(f"  {nome:<34} {estatisticas.get('mediana_ms', estatisticas['min_ms']):>10.3f} ms", file=sys.stderr)
+    gravar_relatorio(relatorio, args.saida, 'bench')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import copy
+import datetime
+import itertools
+import threading
+from firebase_admin import firestore
+
+# --- Firestore em Memória ---
+# Substituto local do cliente do Firestore com o subconjunto da API usado em core.data_manager
+# (collection, document, get/set/update/delete, stream, order_by/limit, batch, Increment, ArrayUnion, ArrayRemove e SERVER_TIMESTAMP).
+# Conta as leituras, escritas e remoções de documentos, como a faturação do Firestore, para os benchmarks e testes de carga.
+
+def _aplicar(documento, dados):
+    """Junta `dados` ao documento, resolvendo Increment, ArrayUnion, ArrayRemove e SERVER_TIMESTAMP como o servidor."""
+    for campo, valor in dados.items():
+        if isinstance(valor, firestore.Increment):
+            valor = documento.get(campo, 0) + valor.value
+        elif isinstance(valor, firestore.ArrayUnion):
+            atual = list(documento.get(campo, []))
+            valor = atual + [item for item in dict.fromkeys(valor.values) if item not in atual]
+        elif isinstance(valor, firestore.ArrayRemove):
+            valor = [item for item in documento.get(campo, []) if item not in valor.values]
+        elif valor is firestore.SERVER_TIMESTAMP:
+            valor = datetime.datetime.now(datetime.timezone.utc)
+        else:
+            valor = copy.deepcopy(valor)
+        documento[campo] = valor
+    return documento
+
+class _Snapshot:
+    def __init__(self, doc_id, dados):
+        self.id = doc_id
+        self._dados = dados
+        self.exists = dados is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._dados)
+
+class _Documento:
+    def __init__(self, colecao, doc_id):
+        self._colecao = colecao
+        self.id = doc_id
+
+    def get(self):
+        cliente = self._colecao.cliente
+        with cliente.lock:
+            cliente.operacoes['leituras'] += 1
+            return _Snapshot(self.id, self._colecao.documentos.get(self.id))
+
+    def set(self, dados, merge=False):
+        cliente = self._colecao.cliente
+        with cliente.lock:
+            cliente.operacoes['escritas'] += 1
+            if merge and self.id in self._colecao.documentos:
+                _aplicar(self._colecao.documentos[self.id], dados)
+            else:
+                self._colecao.documentos[self.id] = _aplicar({}, dados)
+
+    def update(self, dados):
+        cliente = self._colecao.cliente
+        with cliente.lock:
+            cliente.operacoes['escritas'] += 1
+            _aplicar(self._colecao.documentos.setdefault(self.id, {}), dados)
+
+    def delete(self):
+        cliente = self._colecao.cliente
+        with cliente.lock:
+            cliente.operacoes['remocoes'] += 1
+            self._colecao.documentos.pop(self.id, None)
+
+class _Colecao:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.documentos = {}
+
+    def document(self, doc_id=None):
+        return _Documento(self, doc_id or f"auto{next(self.cliente.ids_automaticos):08d}")
+
+    def stream(self):
+        with self.cliente.lock:
+            self.cliente.operacoes['leituras'] += len(self.documentos)
+            return [_Snapshot(doc_id, copy.deepcopy(dados)) for doc_id, dados in self.documentos.items()]
+
+    def order_by(self, campo, direction=None):
+        return _Consulta(self, campo, direction == firestore.Query.DESCENDING)
+
+class _Consulta:
+    def __init__(self, colecao, campo, decrescente, limite=None):
+        self._colecao = colecao
+        self._campo = campo
+        self._decrescente = decrescente
+        self._limite = limite
+
+    def limit(self, n):
+        return _Consulta(self._colecao, self._campo, self._decrescente, n)
+
+    def stream(self):
+        cliente = self._colecao.cliente
+        with cliente.lock:
+            # Como no Firestore, os documentos sem o campo ficam fora da consulta
+            itens = [(doc_id, dados) for doc_id, dados in self._colecao.documentos.items() if self._campo in dados]
+            itens.sort(key=lambda item: item[1][self._campo], reverse=self._decrescente)
+            itens = itens[:self._limite]
+            cliente.operacoes['leituras'] += len(itens)
+            return [_Snapshot(doc_id, copy.deepcopy(dados)) for doc_id, dados in itens]
+
+class _Lote:
+    def __init__(self):
+        self._operacoes = []
+
+    def set(self, doc_ref, dados, merge=False):
+        self._operacoes.append(lambda: doc_ref.set(dados, merge=merge))
+
+    def update(self, doc_ref, dados):
+        self._operacoes.append(lambda: doc_ref.update(dados))
+
+    def delete(self, doc_ref):
+        self._operacoes.append(doc_ref.delete)
+
+    def commit(self):
+        for operacao in self._operacoes:
+            operacao()
+
+class FirestoreMemoria:
+    """Cliente do Firestore em memória, seguro para várias threads, com contadores de operações."""
+
+    def __init__(self):
+        self.colecoes = {}
+        self.lock = threading.RLock()
+        self.ids_automaticos = itertools.count()
+        self.operacoes = {'leituras': 0, 'escritas': 0, 'remocoes': 0}
+
+    def collection(self, nome):
+        with self.lock:
+            if nome not in self.colecoes:
+                self.colecoes[nome] = _Colecao(self)
+            return self.colecoes[nome]
+
+    def batch(self):
+        return _Lote()
+
+    def carregar(self, nome_colecao, documentos):
+        """Preenche uma coleção ({id_documento: dados}) sem contar operações (dados iniciais dos fixtures)."""
+        colecao = self.collection(nome_colecao)
+        for doc_id, dados in documentos.items():
+            colecao.documentos[doc_id] = copy.deepcopy(dados)
+
+    def zerar_contadores(self):
+        with self.lock:
+            for chave in self.operacoes:
+                self.operacoes[chave] = 0
@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import platform
+import datetime
+import subprocess
+
+# --- Relatórios dos Benchmarks ---
+# Cabeçalho comum (data, commit, versão do Python) e gravação em JSON dos resultados.
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def novo_relatorio(**parametros):
+    """Cabeçalho de um relatório, com os parâmetros da execução."""
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        **parametros,
+        'resultados': {},
+    }
+
+def gravar_relatorio(relatorio, saida=None, prefixo='bench'):
+    """Grava o relatório em `saida` ou em benchmarks/resultados/<prefixo>_<data>.json. Devolve o caminho."""
+    saida = saida or os.path.join(PASTA_RESULTADOS, f"{prefixo}_{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}", file=sys.stderr)
+    return saida
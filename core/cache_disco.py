@@ -0,0 +1,90 @@
+import gc
+import os
+import pickle
+import logging
+import sqlite3
+from core.rastreio import rastrear
+
+# --- Cache em Disco ---
+# Guarda numa base SQLite, por chave, o último valor calculado e a etiqueta da versão com que foi
+# calculado (impressão dos arquivos de origem, formato do cache, versões do Python e do pandas).
+# Fica por baixo dos caches em memória do Streamlit: um processo novo (reinício do servidor ou
+# outro worker) lê daqui o corpus compilado, o índice e o vocabulário em vez de os refazer.
+# Cada chave guarda uma só versão, por isso a base não cresce com as edições dos arquivos.
+# Erros de leitura ou gravação nunca interrompem o app: o valor é simplesmente recalculado.
+
+log = logging.getLogger(__name__)
+ERROS_CACHE = (sqlite3.Error, OSError, EOFError, pickle.PickleError, AttributeError, ImportError, ValueError, TypeError)
+
+def _desserializar(dados):
+    # O corpus compilado tem centenas de milhares de dicionários: sem o coletor de lixo a correr a
+    # cada lote de objetos criados, o pickle.loads fica duas a três vezes mais rápido
+    ativo = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(dados)
+    finally:
+        if ativo:
+            gc.enable()
+
+class CacheDisco:
+    """Pares chave -> (versão, valor serializado com pickle) numa base SQLite."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+    def _conectar(self):
+        os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+        # Vários processos podem partilhar a base: WAL deixa-os ler enquanto outro grava
+        conexao = sqlite3.connect(self.caminho, timeout=5)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("CREATE TABLE IF NOT EXISTS entradas (chave TEXT PRIMARY KEY, versao TEXT NOT NULL, valor BLOB NOT NULL)")
+        return conexao
+
+    @rastrear()
+    def obter(self, chave, versao):
+        """O valor gravado em `chave` se foi gravado com `versao`; None se não existir, for de outra versão ou não puder ser lido."""
+        try:
+            conexao = self._conectar()
+            try:
+                linha = conexao.execute("SELECT valor FROM entradas WHERE chave = ? AND versao = ?", (chave, versao)).fetchone()
+            finally:
+                conexao.close()
+            return _desserializar(linha[0]) if linha else None
+        except ERROS_CACHE as e:
+            log.warning("Entrada '%s' do cache em disco ignorada: %s", chave, e)
+            return None
+
+    @rastrear()
+    def gravar(self, chave, versao, valor):
+        """Substitui o valor de `chave` (numa transação: quem lê vê o valor antigo ou o novo, nunca um a meio)."""
+        try:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    conexao.execute("INSERT OR REPLACE INTO entradas (chave, versao, valor) VALUES (?, ?, ?)", (chave, versao, dados))
+            finally:
+                conexao.close()
+        except ERROS_CACHE as e:
+            log.warning("Não foi possível gravar '%s' no cache em disco: %s", chave, e)
+
+    def obter_ou_calcular(self, chave, versao, calcular):
+        """O valor em disco para (chave, versão) ou, se não houver, calcular() — que fica gravado para os próximos processos."""
+        valor = self.obter(chave, versao)
+        if valor is None:
+            valor = calcular()
+            self.gravar(chave, versao, valor)
+        return valor
+
+    def limpar(self, prefixo=''):
+        """Apaga as entradas cujas chaves começam por `prefixo` (todas, por omissão)."""
+        try:
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    conexao.execute("DELETE FROM entradas WHERE substr(chave, 1, ?) = ?", (len(prefixo), prefixo))
+            finally:
+                conexao.close()
+        except ERROS_CACHE as e:
+            log.warning("Não foi possível limpar o cache em disco: %s", e)
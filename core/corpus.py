@@ -0,0 +1,321 @@
+import os
+import re
+import random
+import hashlib
+import logging
+from collections import defaultdict
+from core.rastreio import rastrear
+
+# Lógica pura do corpus (leitura dos arquivos base, identificadores, templates e geradores de questões).
+# Não depende do Streamlit nem do Firestore; core.data_manager reexporta estes nomes.
+
+log = logging.getLogger(__name__)
+
+# --- Classes de Erro Personalizadas ---
+class ParsingError(Exception):
+    """Exceção para erros durante o parsing de ficheiros de dados."""
+    pass
+
+# --- Leitura dos Arquivos Base ---
+# Parsers puros dos arquivos .txt da pasta 'data/'. Devolvem (itens, erros); o cache fica a cargo de quem chama.
+@rastrear()
+def ler_flashcards(filepath, language):
+    if not os.path.exists(filepath):
+        log.error("Arquivo ANKI não encontrado: %s", os.path.abspath(filepath))
+        return [], [f"Arquivo ANKI não encontrado. Caminho verificado: '{os.path.abspath(filepath)}'"]
+    with open(filepath, 'r', encoding='utf-8') as f:
+        texto = f.read()
+    blocos = texto.strip().split('\n\n')
+    flashcards, errors = [], []
+    target_lang_str = "English" if language == 'en' else "Francais"
+    for i, bloco in enumerate(blocos):
+        try:
+            linhas = [l.strip() for l in bloco.split('\n') if l.strip()]
+            if not linhas: continue
+            header_match = re.search(r"(.+?)\s+\((.+?)\s*\|\s*(.+?)\s*\|\s*(.+?)\):", linhas[0])
+            if not header_match:
+                errors.append(f"Cabeçalho mal formatado no bloco ANKI #{i+1}: {linhas[0]}")
+                continue
+            card_lang = header_match.group(4).strip()
+            if card_lang.lower() != target_lang_str.lower(): continue
+            card = {"front": header_match.group(1).strip(), "type": header_match.group(2).strip(), "level": header_match.group(3).strip()}
+            for linha in linhas[1:]:
+                if ": " in linha:
+                    key, value = linha.split(':', 1)
+                    key = key.strip().lstrip('-').strip()
+                    key_map = {'frase en': 'example', 'tradução': 'back', 'tradução frase': 'translation_sentence', 'outra frase en': 'other_example', 'significado': 'significado', 'sinônimo': 'cloze_answer', 'tags': 'tags'}
+                    card_key = key_map.get(key.lower())
+                    if card_key: card[card_key] = value.strip() if card_key != 'tags' else [t.strip() for t in value.split(',')]
+            if not card.get("front") or not card.get("back"):
+                errors.append(f"Cartão para '{card.get('front', 'N/A')}' não tem 'front' ou 'back'.")
+                continue
+            flashcards.append(card)
+        except Exception as e:
+            errors.append(f"Erro ao processar bloco ANKI #{i+1}: {e}")
+    log.debug("Carregados %d flashcards para %s de %s.", len(flashcards), language, filepath)
+    return flashcards, errors
+
+@rastrear()
+def ler_exercicios_gpt(gpt_file, language):
+    if not os.path.exists(gpt_file):
+        log.error("Arquivo GPT não encontrado: %s", os.path.abspath(gpt_file))
+        return [], [f"Arquivo de exercícios GPT não encontrado: '{os.path.abspath(gpt_file)}'"]
+    with open(gpt_file, encoding='utf-8') as f:
+        linhas = [l.strip() for l in f if l.strip()]
+    exercicios, errors = [], []
+    for i, linha in enumerate(linhas):
+        try:
+            if ';' not in linha: continue
+            partes = [p.strip() for p in linha.split(';')]
+            if not partes or len(partes) != 7:
+                raise ParsingError(f"Linha de exercício padrão não tem 7 colunas, mas {len(partes)}.")
+            idioma_linha, tipo, frase, opcoes_str, correta, principal, cefr_level = partes
+            if idioma_linha != language: continue
+            if not tipo.startswith(('1-', '2-', '3-', '4-', '5-', '6-')): continue
+            if not all([tipo, frase, opcoes_str, correta, principal, cefr_level]):
+                raise ParsingError("Uma das colunas obrigatórias está vazia.")
+            opcoes_lista = [o.strip() for o in opcoes_str.split('|')]
+            if not opcoes_lista or not all(opcoes_lista):
+                raise ParsingError("Opções inválidas.")
+            exercicios.append({"tipo": tipo, "frase": frase, "opcoes": opcoes_lista, "correta": correta, "principal": principal, "cefr_level": cefr_level})
+        except Exception as e:
+            errors.append(f"Erro ao processar linha GPT #{i+1} ('{linha[:40]}...'): {e}")
+    log.debug("Carregados %d exercícios GPT para %s de %s.", len(exercicios), language, gpt_file)
+    return exercicios, errors
+
+@rastrear()
+def ler_exercicios_cloze(cloze_file, language):
+    if not os.path.exists(cloze_file):
+        log.error("Arquivo Cloze não encontrado: %s", os.path.abspath(cloze_file))
+        return [], [f"Arquivo Cloze não encontrado: '{os.path.abspath(cloze_file)}'"]
+    with open(cloze_file, encoding='utf-8') as f:
+        linhas = [l.strip() for l in f if l.strip()]
+    exercicios, errors = [], []
+    for i, linha in enumerate(linhas):
+        try:
+            if ';' not in linha: continue
+            partes = [p.strip() for p in linha.split(';')]
+            if not partes or len(partes) != 7:
+                raise ParsingError(f"Linha de Cloze-Text não tem 7 colunas, mas {len(partes)}.")
+            idioma_linha, tipo, frase, opcoes_str, corretas_str, cefr_level, titulo = partes
+            if idioma_linha != language or tipo != '7-Cloze-Text': continue
+            opcoes_lista = [o.strip() for o in opcoes_str.split('|')]
+            corretas_lista = [c.strip() for c in corretas_str.split('|')]
+            exercicios.append({"tipo": tipo, "frase": frase, "opcoes": opcoes_lista, "correta": corretas_lista, "principal": corretas_lista, "cefr_level": cefr_level, "titulo": titulo})
+        except Exception as e:
+            errors.append(f"Erro ao processar linha Cloze #{i+1} ('{linha[:40]}...'): {e}")
+    log.debug("Carregados %d exercícios Cloze para %s de %s.", len(exercicios), language, cloze_file)
+    return exercicios, errors
+
+# --- IDENTIFICADORES DE EXERCÍCIOS ---
+# Os exercícios são identificados por um hash curto do tipo e do conteúdo de origem.
+# Nos cartões ANKI a origem é a própria palavra (há um exercício por tipo), então editar
+# a frase, a tradução ou o sinônimo do cartão não perde o progresso.
+def gerar_id_exercicio(tipo, *origem):
+    """Gera o identificador curto (12 caracteres hexadecimais) de um exercício."""
+    chave = "\x1f".join((tipo,) + origem)
+    return hashlib.blake2b(chave.encode('utf-8'), digest_size=6).hexdigest()
+
+def ids_do_cartao(cartao):
+    """Devolve {tipo: identificador} dos exercícios ANKI que um cartão permite gerar."""
+    if 'ids' in cartao:
+        return cartao['ids']
+    palavra = cartao['front']
+    tipos = []
+    if cartao.get("back"):
+        tipos += ["MCQ Significado", "MCQ Tradução Inglês"]
+    if cartao.get("example"):
+        tipos += ["Fill", "Reading"]
+    if cartao.get("cloze_answer"):
+        tipos.append("MCQ Sinônimo")
+    return {tipo: gerar_id_exercicio(tipo, palavra) for tipo in tipos}
+
+def ids_legados_do_corpus(flashcards, exercicios):
+    """
+    Mapa (palavra, identificador antigo) -> identificador curto.
+    Os identificadores antigos eram a frase inteira do exercício GPT ou 'tipo::conteúdo' nos cartões ANKI.
+    """
+    mapa = {}
+    for cartao in flashcards:
+        palavra = cartao['front']
+        legados = {
+            "MCQ Significado": f"significado::{cartao.get('back')}", "MCQ Tradução Inglês": f"traducao::{cartao.get('back')}",
+            "Fill": f"fill::{cartao.get('example')}", "Reading": f"reading::{cartao.get('example')}",
+            "MCQ Sinônimo": f"sinonimo::{cartao.get('cloze_answer')}",
+        }
+        for tipo, id_ex in ids_do_cartao(cartao).items():
+            mapa[(palavra, legados[tipo])] = id_ex
+    for ex in exercicios:
+        principais = ex.get('principal')
+        for palavra in (principais if isinstance(principais, list) else [principais]):
+            if palavra and ex.get('frase') and 'id' in ex:
+                mapa[(palavra, ex['frase'])] = ex['id']
+    return mapa
+
+def migrar_mapa_ids(mapa_exercicios, palavra, ids_legados):
+    """Troca as chaves antigas de um mapa por exercício ('progresso' ou 'agenda'). Devolve (mapa, houve_troca)."""
+    if not isinstance(mapa_exercicios, dict) or not mapa_exercicios:
+        return mapa_exercicios, False
+    novo = {ids_legados.get((palavra, chave), chave): valor for chave, valor in mapa_exercicios.items()}
+    return novo, novo.keys() != mapa_exercicios.keys()
+
+# --- COMPILAÇÃO DOS TEMPLATES (feita uma vez, no carregamento do corpus) ---
+TIPOS_FILTRAR_KEYWORD = ["2-Word-Meaning", "3-Paraphrase", "4-Minimal-Pair"]
+
+def destacar_palavra(frase, palavra, count=0):
+    """Envolve as ocorrências de `palavra` em `frase` com o span de destaque (sem diferenciar maiúsculas)."""
+    return re.sub(re.escape(palavra), f'<span class="keyword-highlight">{palavra}</span>', frase, count=count, flags=re.IGNORECASE)
+
+def renderizar_cartao(cartao):
+    """Gera o HTML estático de cada tipo de pergunta ANKI de um cartão (None quando o tipo não se aplica)."""
+    palavra = cartao['front']
+    frase = cartao.get('example', '')
+    html = {
+        'significado': f'What does "<span class="keyword-highlight">{palavra}</span>" mean?',
+        'traducao': f'Qual palavra em inglês corresponde a: "<span class="keyword-highlight">{cartao.get("back")}</span>"?',
+        'sinonimo': f'Selecione o sinônimo de "<span class="keyword-highlight">{palavra}</span>":',
+        'fill': None,
+        'reading': None,
+    }
+    if frase:
+        frase_gap = re.sub(re.escape(palavra), '_____', frase, count=1, flags=re.IGNORECASE)
+        if frase_gap != frase:
+            html['fill'] = frase_gap
+        frase_destacada = destacar_palavra(frase, palavra, count=1)
+        html['reading'] = (f'Na frase: "{frase_destacada}"<br><br>'
+                           f'O que provavelmente significa a palavra "<span class="keyword-highlight">{palavra}</span>" nesse contexto?')
+    return html
+
+def renderizar_exercicio_gpt(ex):
+    """Gera a pergunta destacada e o conjunto base de opções (sem a palavra-chave, quando aplicável) de um exercício GPT."""
+    keyword = ex['principal']
+    if ex['tipo'] in TIPOS_FILTRAR_KEYWORD:
+        opcoes = [opt for opt in ex['opcoes'] if opt.lower() != keyword.lower()]
+    else:
+        opcoes = ex['opcoes']
+    return destacar_palavra(ex['frase'], keyword), list(dict.fromkeys(opcoes))
+
+@rastrear()
+def compilar_templates(flashcards, exercicios):
+    """Guarda em cada cartão e exercício os identificadores curtos e o HTML estático das perguntas e opções."""
+    for cartao in flashcards:
+        cartao['ids'] = ids_do_cartao(cartao)
+        cartao['html'] = renderizar_cartao(cartao)
+    for ex in exercicios:
+        if ex.get('tipo') != '7-Cloze-Text' and isinstance(ex.get('principal'), str):
+            ex['id'] = gerar_id_exercicio(ex['tipo'], ex['principal'], ex['frase'])
+            ex['pergunta_html'], ex['opcoes_base'] = renderizar_exercicio_gpt(ex)
+        else:
+            ex['id'] = gerar_id_exercicio(ex.get('tipo', ''), ex.get('frase', ''))
+
+# --- Índice do Corpus ---
+@rastrear()
+def construir_indice_corpus(flashcards, todos_exercicios):
+    """
+    Índice do corpus compilado: cartões por palavra, exercícios GPT por identificador e por palavra,
+    o catálogo identificador -> conteúdo exibível, o mapa de identificadores antigos e os conjuntos de distratores.
+    """
+    catalogo = {}
+    for card in flashcards:
+        conteudos = {"MCQ Significado": card.get('back'), "MCQ Tradução Inglês": card.get('back'),
+                     "Fill": card.get('example'), "Reading": card.get('example'), "MCQ Sinônimo": card.get('cloze_answer')}
+        for tipo, id_ex in ids_do_cartao(card).items():
+            catalogo[id_ex] = {'palavra': card['front'], 'tipo': tipo, 'conteudo': conteudos[tipo]}
+    for ex in todos_exercicios:
+        catalogo[ex['id']] = {'palavra': ex.get('principal'), 'tipo': ex.get('tipo'), 'conteudo': ex.get('titulo') or ex.get('frase')}
+    tipo_por_id = {id_ex: info['tipo'] for id_ex, info in catalogo.items() if info['tipo']}
+    ids_por_tipo = defaultdict(set)
+    for id_ex, tipo in tipo_por_id.items():
+        ids_por_tipo[tipo].add(id_ex)
+    exercicios_por_palavra = defaultdict(list)
+    for ex in todos_exercicios:
+        if 'pergunta_html' in ex:
+            exercicios_por_palavra[ex['principal']].append(ex)
+    return {
+        'cartoes': {card['front']: card for card in flashcards},
+        'exercicios_gpt': {ex['id']: ex for ex in todos_exercicios if 'pergunta_html' in ex},
+        'exercicios_por_palavra': dict(exercicios_por_palavra),
+        'catalogo': catalogo,
+        'tipo_por_id': tipo_por_id,
+        'ids_por_tipo': {tipo: frozenset(ids) for tipo, ids in ids_por_tipo.items()},
+        'ids_legados': ids_legados_do_corpus(flashcards, todos_exercicios),
+        'distratores': {
+            'back': [c['back'] for c in flashcards if c.get('back')],
+            'front': [c['front'] for c in flashcards],
+            'cloze_answer': [c['cloze_answer'] for c in flashcards if c.get('cloze_answer')],
+        },
+    }
+
+def amostrar_distratores(pool, excluir, k):
+    """Sorteia até k valores distintos de `pool` que não estejam em `excluir` (comparação sem maiúsculas)."""
+    excluir = {e.lower() for e in excluir}
+    escolhidos = []
+    for valor in random.sample(pool, min(len(pool), k + len(excluir) + 2)):
+        if valor.lower() not in excluir:
+            escolhidos.append(valor)
+            excluir.add(valor.lower())
+            if len(escolhidos) == k:
+                break
+    return escolhidos
+
+# --- GERADORES DE QUESTÕES (CENTRALIZADOS) ---
+# Estas funções não interagem diretamente com o armazenamento. O HTML vem pré-renderizado no cartão;
+# por questão só se sorteiam os distratores e se embaralham as opções.
+def _html_cartao(cartao):
+    return cartao.get('html') or renderizar_cartao(cartao)
+
+def gerar_mcq_significado(cartao, distratores):
+    correta = cartao.get("back", "")
+    if not correta: return None, None, None, None, None, None
+    opcoes = [correta] + amostrar_distratores(distratores['back'], [correta], 3)
+    random.shuffle(opcoes)
+    return 'MCQ Significado', _html_cartao(cartao)['significado'], opcoes, opcoes.index(correta), cartao.get('level'), ids_do_cartao(cartao)['MCQ Significado']
+
+def gerar_mcq_traducao_ingles(cartao, distratores):
+    correta = cartao["front"]
+    opcoes = [correta] + amostrar_distratores(distratores['front'], [correta], 3)
+    random.shuffle(opcoes)
+    return 'MCQ Tradução Inglês', _html_cartao(cartao)['traducao'], opcoes, opcoes.index(correta), cartao.get('level'), ids_do_cartao(cartao)['MCQ Tradução Inglês']
+
+def gerar_mcq_sinonimo(cartao, distratores):
+    correta = cartao.get("cloze_answer", "")
+    if not correta: return None, None, None, None, None, None
+    opcoes = [correta] + amostrar_distratores(distratores['cloze_answer'], [correta], 3)
+    random.shuffle(opcoes)
+    return 'MCQ Sinônimo', _html_cartao(cartao)['sinonimo'], opcoes, opcoes.index(correta), cartao.get('level'), ids_do_cartao(cartao)['MCQ Sinônimo']
+
+def gerar_fill_gap(cartao, distratores):
+    frase_gap = _html_cartao(cartao)['fill']
+    if not frase_gap: return None, None, None, None, None, None
+    correta = cartao['front']
+    opcoes = [correta] + amostrar_distratores(distratores['front'], [correta], 3)
+    random.shuffle(opcoes)
+    return 'Fill', frase_gap, opcoes, opcoes.index(correta), cartao.get('level'), ids_do_cartao(cartao)['Fill']
+
+def gerar_reading_comprehension(cartao, distratores):
+    pergunta = _html_cartao(cartao)['reading']
+    if not pergunta: return None, None, None, None, None, None
+    resposta_correta = cartao["back"]
+    opcoes = [resposta_correta] + amostrar_distratores(distratores['back'], [resposta_correta], 3)
+    random.shuffle(opcoes)
+    return 'Reading', pergunta, opcoes, opcoes.index(resposta_correta), cartao.get('level'), ids_do_cartao(cartao)['Reading']
+
+TIPOS_EXERCICIO_ANKI = {
+    "MCQ Significado": gerar_mcq_significado, "MCQ Tradução Inglês": gerar_mcq_traducao_ingles,
+    "MCQ Sinônimo": gerar_mcq_sinonimo, "Fill": gerar_fill_gap, "Reading": gerar_reading_comprehension
+}
+
+def get_available_exercise_types_for_word(palavra, flashcards_map, gpt_exercicios_map):
+    """Retorna um dicionário com todos os exercícios únicos para uma palavra."""
+    exercicios_palavra = {}
+    
+    if palavra in flashcards_map:
+        for tipo, id_ex in ids_do_cartao(flashcards_map[palavra]).items():
+            exercicios_palavra[id_ex] = tipo
+            
+    if palavra in gpt_exercicios_map:
+        for ex in gpt_exercicios_map[palavra]:
+            if ex.get('id') and ex.get('tipo'):
+                exercicios_palavra[ex['id']] = ex['tipo']
+            
+    return exercicios_palavra
@@ -1,13 +1,32 @@
 import os
+import sys
+import copy
 import json
-import re
+import time
+import logging
+import threading
+import zlib
+import contextvars
 import streamlit as st
 import pandas as pd
 import datetime
-from collections import Counter, defaultdict
-import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import firebase_admin
 from firebase_admin import credentials, firestore
+from core.corpus import (
+    ler_flashcards, ler_exercicios_gpt, ler_exercicios_cloze, migrar_mapa_ids, compilar_templates,
+    construir_indice_corpus, get_available_exercise_types_for_word
+)
+from core.cache_disco import CacheDisco
+from core.rastreio import rastrear
+from core.medidor_firestore import ClienteMedido, iniciar_medicao, orcamentos, tamanho_valor, SEM_SESSAO
+from core.engine import Vocabulario, aplicar_resultados, aplicar_agenda
+from core.scheduler import empacotar_agenda
+from core.performance import ResumoHistorico, resumir_desempenho, agregar_historico_por_dia, serie_diaria
+
+log = logging.getLogger(__name__)
 
 # --- Constantes ---
 # Caminhos para os arquivos .txt agora dentro da pasta 'data/'
@@ -15,169 +34,158 @@ CARTOES_FILE_BASE = 'data/cartoes_validacao.txt'
 GPT_FILE_BASE = 'data/Dados_Manual_output_GPT.txt'
 CLOZE_FILE_BASE = 'data/Dados_Manual_Cloze_text.txt'
 SENTENCE_WORDS_FILE = 'data/palavras_unicas_por_tipo.txt'
+# Cache em disco (ver core.cache_disco): corpus lido e compilado, índice do corpus, dados de frases e a
+# cópia local do último vocabulário sincronizado, servida no arranque enquanto o Firestore é lido
+PASTA_CACHE = '.cache'
+ARQUIVO_CACHE_DISCO = 'cache.sqlite3'
+# Aumentar quando mudar o formato do que é gravado no cache em disco (leitores, compilar_templates, índice)
+VERSAO_CACHE_DISCO = 1
+# Idiomas do app, aquecidos em segundo plano no arranque do processo
+IDIOMAS = ('en', 'fr')
 
 # Nomes base para as coleções no Firestore
 DB_COLLECTION_NAME = 'vocab'
 WRITING_LOG_COLLECTION_NAME = 'writing_log'
 HISTORY_COLLECTION_NAME = 'history'
 SENTENCE_LOG_COLLECTION_NAME = 'sentence_log'
+DAILY_STATS_COLLECTION_NAME = 'daily_stats'
+DELETED_VOCAB_COLLECTION_NAME = 'deleted_vocab'
+
+# Dias (documentos diários) lidos para o gráfico de evolução da página de estatísticas
+DIAS_EVOLUCAO = 365
+
+# Limites de operações do Firestore por visualização de página (ver core.medidor_firestore); acima deles
+# fica um aviso no log. As leituras não têm limite: a primeira sincronização de uma sessão lê o vocabulário
+# inteiro. None desativa um limite.
+ORCAMENTO_FIRESTORE_POR_PAGINA = {'leituras': None, 'escritas': 200, 'remocoes': 200}
+orcamentos.update(ORCAMENTO_FIRESTORE_POR_PAGINA)
 
 # Definir as colunas requeridas para o DataFrame do vocabulário
 REQUIRED_VOCAB_COLS = {
     "palavra": object, "ativa": bool, "fonte": object,
     "data_adicao": 'datetime64[ns]', "escrita_completa": bool,
-    "progresso": object, "mastery_count": int
+    "progresso": object, "mastery_count": int, "agenda": object
 }
 
 # --- Inicialização do Firebase ---
 @st.cache_resource
 def init_firebase():
-    print("DEBUG: Tentando inicializar Firebase...")
+    log.debug("Inicializando Firebase...")
     if firebase_admin._apps:
-        print("DEBUG: Firebase já inicializado.")
         return firestore.client()
 
     try:
         # Tenta carregar as credenciais do Streamlit secrets (para deploy)
         creds_dict = st.secrets["firebase_credentials"]
-        print(f"DEBUG: Conteúdo de st.secrets['firebase_credentials'] (tipo: {type(creds_dict)}): {creds_dict}")
         creds = credentials.from_service_account_info(creds_dict)
         firebase_admin.initialize_app(creds)
-        print("DEBUG: Firebase inicializado com Streamlit secrets.")
+        log.info("Firebase inicializado com Streamlit secrets.")
     except KeyError:
-        print("DEBUG: Streamlit secrets não encontrados. Tentando fallback local...")
+        log.info("Streamlit secrets não encontrados. Tentando fallback local...")
         # Fallback para desenvolvimento local (assumindo arquivo na raiz do projeto)
         try:
             # Caminho mais robusto para o arquivo de credenciais
             # Sobe um nível do diretório 'core' para a raiz do projeto
             cred_path = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)), "canada-2c772-firebase-adminsdk-fbsvc-94a6e8f185.json")
-            print(f"DEBUG: Caminho de credenciais local sendo verificado: {cred_path}")
+            log.debug("Caminho de credenciais local: %s", cred_path)
             if os.path.exists(cred_path):
                 # Carrega o JSON do arquivo e passa o dicionário para from_service_account_info
                 with open(cred_path, 'r') as f:
                     file_creds = json.load(f)
-                print(f"DEBUG: Conteúdo do arquivo de credenciais local (tipo: {type(file_creds)}): {file_creds}")
                 creds = credentials.Certificate.from_service_account_info(file_creds)
                 firebase_admin.initialize_app(creds)
-                print("DEBUG: Firebase inicializado com arquivo local.")
+                log.info("Firebase inicializado com arquivo local.")
             else:
                 st.error("Arquivo de credenciais do Firebase não encontrado para desenvolvimento local.")
-                print(f"ERRO: Arquivo de credenciais não encontrado em {cred_path}")
+                log.error("Arquivo de credenciais não encontrado em %s", cred_path)
                 return None
         except Exception as e_local:
             st.error(f"Falha ao inicializar o Firebase localmente: {e_local}")
-            print(f"ERRO: Falha ao inicializar Firebase localmente: {e_local}")
+            log.error("Falha ao inicializar Firebase localmente: %s", e_local)
             return None
     except Exception as e:
         st.error(f"Erro inesperado ao inicializar Firebase: {e}")
-        print(f"ERRO: Erro inesperado ao inicializar Firebase: {e}")
+        log.error("Erro inesperado ao inicializar Firebase: %s", e)
         return None
     
     return firestore.client()
 
+# As operações feitas através de `db` são contadas por sessão e por página (ver start_page_metering)
 db = init_firebase()
+if db is not None:
+    db = ClienteMedido(db)
 
-# --- Classes de Erro Personalizadas ---
-class ParsingError(Exception):
-    """Exceção para erros durante o parsing de ficheiros de dados."""
-    pass
+def start_page_metering(page):
+    """Começa a medição das operações do Firestore de uma visualização de `page` na sessão corrente. Devolve a Medicao."""
+    contexto = get_script_run_ctx()
+    return iniciar_medicao(contexto.session_id if contexto is not None else SEM_SESSAO, page)
 
 # --- Funções de Leitura de Arquivos Base (do repositório) ---
-# Estas funções leem os arquivos .txt que estarão no GitHub, agora na pasta 'data/'
-@st.cache_data
+# Estas funções leem os arquivos .txt que estarão no GitHub, agora na pasta 'data/'.
+# O parsing em si está em core.corpus; aqui fica só o cache do Streamlit.
+# A chave de cada cache inclui a impressão dos arquivos lidos (data de modificação e tamanho): um arquivo
+# editado é relido no rerun seguinte, sem limpar os outros caches. As entradas antigas saem por max_entries.
+def cache_disco():
+    return CacheDisco(os.path.join(PASTA_CACHE, ARQUIVO_CACHE_DISCO))
+
+def etiqueta_versao(*partes):
+    """Etiqueta de versão de uma entrada do cache em disco: as `partes` mais o formato do cache e as versões do Python e do pandas."""
+    return repr((VERSAO_CACHE_DISCO, sys.version_info[:2], pd.__version__, *partes))
+
+def impressao_arquivo(caminho):
+    """Identifica a versão de um arquivo: (data de modificação em ns, tamanho), ou None se não existir."""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+def impressoes_corpus():
+    """(caminho, impressão) dos três arquivos base do corpus (cartões, GPT e Cloze)."""
+    return tuple((caminho, impressao_arquivo(caminho)) for caminho in (CARTOES_FILE_BASE, GPT_FILE_BASE, CLOZE_FILE_BASE))
+
+# Por baixo de cada cache em memória está o cache em disco, com a mesma impressão na etiqueta de versão:
+# um processo acabado de arrancar lê o resultado já processado em vez de voltar a ler os arquivos.
+@st.cache_data(max_entries=8)
+def _ler_flashcards(caminho, language, impressao):
+    return cache_disco().obter_ou_calcular(
+        f"corpus/cartoes/{language}/{caminho}", etiqueta_versao(impressao), lambda: ler_flashcards(caminho, language))
+
+@st.cache_data(max_entries=8)
+def _ler_exercicios_gpt(caminho, language, impressao):
+    return cache_disco().obter_ou_calcular(
+        f"corpus/gpt/{language}/{caminho}", etiqueta_versao(impressao), lambda: ler_exercicios_gpt(caminho, language))
+
+@st.cache_data(max_entries=8)
+def _ler_exercicios_cloze(caminho, language, impressao):
+    return cache_disco().obter_ou_calcular(
+        f"corpus/cloze/{language}/{caminho}", etiqueta_versao(impressao), lambda: ler_exercicios_cloze(caminho, language))
+
+@rastrear()
 def carregar_flashcards_from_file(language):
-    filepath = CARTOES_FILE_BASE
-    print(f"DEBUG: Carregando flashcards de: {filepath}")
-    if not os.path.exists(filepath):
-        print(f"ERRO: Arquivo ANKI não encontrado: {os.path.abspath(filepath)}")
-        return [], [f"Arquivo ANKI não encontrado. Caminho verificado: '{os.path.abspath(filepath)}'"]
-    with open(filepath, 'r', encoding='utf-8') as f:
-        texto = f.read()
-    blocos = texto.strip().split('\n\n')
-    flashcards, errors = [], []
-    target_lang_str = "English" if language == 'en' else "Francais"
-    for i, bloco in enumerate(blocos):
-        try:
-            linhas = [l.strip() for l in bloco.split('\n') if l.strip()]
-            if not linhas: continue
-            header_match = re.search(r"(.+?)\s+\((.+?)\s*\|\s*(.+?)\s*\|\s*(.+?)\):", linhas[0])
-            if not header_match:
-                errors.append(f"Cabeçalho mal formatado no bloco ANKI #{i+1}: {linhas[0]}")
-                continue
-            card_lang = header_match.group(4).strip()
-            if card_lang.lower() != target_lang_str.lower(): continue
-            card = {"front": header_match.group(1).strip(), "type": header_match.group(2).strip(), "level": header_match.group(3).strip()}
-            for linha in linhas[1:]:
-                if ": " in linha:
-                    key, value = linha.split(':', 1)
-                    key = key.strip().lstrip('-').strip()
-                    key_map = {'frase en': 'example', 'tradução': 'back', 'tradução frase': 'translation_sentence', 'outra frase en': 'other_example', 'significado': 'significado', 'sinônimo': 'cloze_answer', 'tags': 'tags'}
-                    card_key = key_map.get(key.lower())
-                    if card_key: card[card_key] = value.strip() if card_key != 'tags' else [t.strip() for t in value.split(',')]
-            if not card.get("front") or not card.get("back"):
-                errors.append(f"Cartão para '{card.get('front', 'N/A')}' não tem 'front' ou 'back'.")
-                continue
-            flashcards.append(card)
-        except Exception as e:
-            errors.append(f"Erro ao processar bloco ANKI #{i+1}: {e}")
-    print(f"DEBUG: Carregados {len(flashcards)} flashcards para {language}.")
-    return flashcards, errors
+    """(cartões, erros de leitura) do arquivo de cartões."""
+    return _ler_flashcards(CARTOES_FILE_BASE, language, impressao_arquivo(CARTOES_FILE_BASE))
 
-@st.cache_data
+@rastrear()
 def carregar_gpt_from_file(language):
-    gpt_file = GPT_FILE_BASE
-    print(f"DEBUG: Carregando exercícios GPT de: {gpt_file}")
-    if not os.path.exists(gpt_file):
-        print(f"ERRO: Arquivo GPT não encontrado: {os.path.abspath(gpt_file)}")
-        return [], [f"Arquivo de exercícios GPT não encontrado: '{os.path.abspath(gpt_file)}'"]
-    with open(gpt_file, encoding='utf-8') as f:
-        linhas = [l.strip() for l in f if l.strip()]
-    exercicios, errors = [], []
-    for i, linha in enumerate(linhas):
-        try:
-            if ';' not in linha: continue
-            partes = [p.strip() for p in linha.split(';')]
-            if not partes or len(partes) != 7:
-                raise ParsingError(f"Linha de exercício padrão não tem 7 colunas, mas {len(partes)}.")
-            idioma_linha, tipo, frase, opcoes_str, correta, principal, cefr_level = partes
-            if idioma_linha != language: continue
-            if not tipo.startswith(('1-', '2-', '3-', '4-', '5-', '6-')): continue
-            if not all([tipo, frase, opcoes_str, correta, principal, cefr_level]):
-                raise ParsingError("Uma das colunas obrigatórias está vazia.")
-            opcoes_lista = [o.strip() for o in opcoes_str.split('|')]
-            if not opcoes_lista or not all(opcoes_lista):
-                raise ParsingError("Opções inválidas.")
-            exercicios.append({"tipo": tipo, "frase": frase, "opcoes": opcoes_lista, "correta": correta, "principal": principal, "cefr_level": cefr_level})
-        except Exception as e:
-            errors.append(f"Erro ao processar linha GPT #{i+1} ('{linha[:40]}...'): {e}")
-    print(f"DEBUG: Carregados {len(exercicios)} exercícios GPT para {language}.")
-    return exercicios, errors
+    """(exercícios, erros de leitura) do arquivo de exercícios GPT."""
+    return _ler_exercicios_gpt(GPT_FILE_BASE, language, impressao_arquivo(GPT_FILE_BASE))
 
-@st.cache_data
+@rastrear()
 def carregar_cloze_from_file(language):
-    cloze_file = CLOZE_FILE_BASE
-    print(f"DEBUG: Carregando exercícios Cloze de: {cloze_file}")
-    if not os.path.exists(cloze_file):
-        print(f"ERRO: Arquivo Cloze não encontrado: {os.path.abspath(cloze_file)}")
-        return [], [f"Arquivo Cloze não encontrado: '{os.path.abspath(cloze_file)}'"]
-    with open(cloze_file, encoding='utf-8') as f:
-        linhas = [l.strip() for l in f if l.strip()]
-    exercicios, errors = [], []
-    for i, linha in enumerate(linhas):
-        try:
-            if ';' not in linha: continue
-            partes = [p.strip() for p in linha.split(';')]
-            if not partes or len(partes) != 7:
-                raise ParsingError(f"Linha de Cloze-Text não tem 7 colunas, mas {len(partes)}.")
-            idioma_linha, tipo, frase, opcoes_str, corretas_str, cefr_level, titulo = partes
-            if idioma_linha != language or tipo != '7-Cloze-Text': continue
-            opcoes_lista = [o.strip() for o in opcoes_str.split('|')]
-            corretas_lista = [c.strip() for c in corretas_str.split('|')]
-            exercicios.append({"tipo": tipo, "frase": frase, "opcoes": opcoes_lista, "correta": corretas_lista, "principal": corretas_lista, "cefr_level": cefr_level, "titulo": titulo})
-        except Exception as e:
-            errors.append(f"Erro ao processar linha Cloze #{i+1} ('{linha[:40]}...'): {e}")
-    print(f"DEBUG: Carregados {len(exercicios)} exercícios Cloze para {language}.")
-    return exercicios, errors
+    """(exercícios, erros de leitura) do arquivo de textos Cloze."""
+    return _ler_exercicios_cloze(CLOZE_FILE_BASE, language, impressao_arquivo(CLOZE_FILE_BASE))
+
+def clear_corpus_caches(disk=False):
+    """
+    Limpa só os caches dos arquivos base (leituras, corpus compilado, índice e frases).
+    Com disk=True limpa também as entradas deles no cache em disco (a cópia local do vocabulário fica).
+    """
+    for funcao in (_ler_flashcards, _ler_exercicios_gpt, _ler_exercicios_cloze, _montar_corpus, _indice_corpus, _ler_dados_frases):
+        funcao.clear()
+    if disk:
+        cache_disco().limpar('corpus/')
+        cache_disco().limpar('frases/')
 
 # --- Funções de Gerenciamento de Dados com Firestore ---
 
@@ -185,36 +193,51 @@ def get_collection_name(base_name, language):
     """Gera o nome da coleção no Firestore."""
     return f"{base_name}_{language}"
 
-@st.cache_data
+@rastrear()
 def load_and_cache_data(language):
-    """Carrega e armazena em cache os dados dos arquivos base."""
-    flashcards, anki_errors = carregar_flashcards_from_file(language)
-    gpt_exercicios, gpt_errors = carregar_gpt_from_file(language)
-    cloze_exercicios, cloze_errors = carregar_cloze_from_file(language)
+    """Carrega e armazena em cache os dados dos arquivos base (refeito quando algum deles muda)."""
+    return _montar_corpus(language, impressoes_corpus())
+
+@st.cache_data(max_entries=8)
+def _montar_corpus(language, impressoes):
+    return cache_disco().obter_ou_calcular(
+        f"corpus/compilado/{language}", etiqueta_versao(impressoes), lambda: compilar_corpus(language))
+
+@rastrear()
+def compilar_corpus(language):
+    """(cartões, exercícios GPT e Cloze) lidos dos arquivos base e com os templates compilados."""
+    flashcards, _ = carregar_flashcards_from_file(language)
+    gpt_exercicios, _ = carregar_gpt_from_file(language)
+    cloze_exercicios, _ = carregar_cloze_from_file(language)
     
     todos_exercicios = gpt_exercicios + cloze_exercicios
-    errors = anki_errors + gpt_errors + cloze_errors
+    compilar_templates(flashcards, todos_exercicios)
     
-    st.session_state[f'parsing_errors_{language}'] = errors
-    print(f"DEBUG: load_and_cache_data para {language} concluído. Flashcards: {len(flashcards)}, Exercícios GPT/Cloze: {len(todos_exercicios)}")
+    log.debug("Corpus de %s compilado: %d flashcards, %d exercícios GPT/Cloze.", language, len(flashcards), len(todos_exercicios))
     return flashcards, todos_exercicios
 
+def get_parsing_errors(language):
+    """
+    Erros de leitura dos arquivos base do idioma, a partir das leituras em cache.
+    (Não ficam no session_state: com o cache já aquecido, load_and_cache_data não corre na sessão do utilizador.)
+    """
+    return carregar_flashcards_from_file(language)[1] + carregar_gpt_from_file(language)[1] + carregar_cloze_from_file(language)[1]
+
+@rastrear()
 def sync_database(language):
     """
     Sincroniza o banco de dados do Firestore com as palavras dos arquivos base.
     Retorna um DataFrame do Pandas com os dados atualizados.
     """
-    print(f"DEBUG: Iniciando sync_database para {language}...")
     if not db:
-        print("ERRO: Cliente Firestore não disponível. Retornando DataFrame vazio com colunas padrão.")
+        log.error("Cliente Firestore não disponível. Retornando DataFrame vazio com colunas padrão.")
         return pd.DataFrame(columns=REQUIRED_VOCAB_COLS.keys())
 
     collection_name = get_collection_name(DB_COLLECTION_NAME, language)
-    print(f"DEBUG: Acessando coleção: {collection_name}")
     
     docs = db.collection(collection_name).stream()
     db_data = [doc.to_dict() for doc in docs]
-    print(f"DEBUG: Dados brutos do Firestore: {len(db_data)} documentos.")
+    log.debug("sync_database %s: %d documentos lidos de %s.", language, len(db_data), collection_name)
 
     # Inicializa o DataFrame com as colunas corretas, mesmo que db_data esteja vazio
     db_df = pd.DataFrame(db_data)
@@ -240,7 +263,6 @@ def sync_database(language):
     # Reordena as colunas para garantir consistência
     db_df = db_df[list(REQUIRED_VOCAB_COLS.keys())]
 
-    print(f"DEBUG: DataFrame inicializado/recarregado. Colunas: {db_df.columns.tolist()}, Linhas: {len(db_df)}")
 
     # Lógica de sincronização (similar à original)
     flashcards, todos_exercicios = load_and_cache_data(language)
@@ -261,8 +283,12 @@ def sync_database(language):
 
     todas_palavras = set(flashcards_map.keys()).union(palavras_gpt)
     palavras_db = set(db_df['palavra'].dropna().unique()) if 'palavra' in db_df.columns and not db_df.empty else set()
+    # Palavras apagadas pelo utilizador não voltam a ser criadas a partir dos arquivos base
+    # (o registo só é lido quando há palavras dos arquivos que faltam no Firestore)
     novas_palavras = todas_palavras - palavras_db
-    print(f"DEBUG: Novas palavras a serem adicionadas: {len(novas_palavras)}")
+    if novas_palavras:
+        novas_palavras -= get_deleted_words(language)
+    log.debug("sync_database %s: %d novas palavras.", language, len(novas_palavras))
 
     if novas_palavras:
         now = datetime.datetime.now(datetime.timezone.utc)
@@ -275,14 +301,13 @@ def sync_database(language):
             new_word_data = {
                 "palavra": p, "ativa": True, "fonte": fonte, 
                 "data_adicao": now, "escrita_completa": False, 
-                "progresso": progresso, "mastery_count": 0
+                "progresso": progresso, "mastery_count": 0, "agenda": {}
             }
             
             doc_ref = db.collection(collection_name).document(p)
             batch.set(doc_ref, new_word_data)
         
         batch.commit()
-        print("DEBUG: Novas palavras adicionadas ao Firestore. Recarregando DataFrame...")
         # Recarrega os dados após adicionar novas palavras
         docs = db.collection(collection_name).stream()
         db_data = [doc.to_dict() for doc in docs]
@@ -298,21 +323,102 @@ def sync_database(language):
                 elif dtype == int:
                     db_df[col] = db_df[col].fillna(0).astype(int)
 
-    print(f"DEBUG: sync_database finalizado. DataFrame tem {len(db_df)} linhas e colunas: {db_df.columns.tolist()}")
+    # Converte em memória os identificadores antigos e a agenda antiga; a reescrita no Firestore fica a cargo de migrate_exercise_ids
+    palavras_migradas = migrar_ids_vocab(db_df, language)
+    if palavras_migradas:
+        log.debug("%d palavras ainda usam identificadores antigos ou a agenda por empacotar (convertidas em memória).", len(palavras_migradas))
+
     return db_df
 
+# --- Cópia Local do Vocabulário (stale-while-revalidate) ---
+# A primeira chamada de get_session_db numa sessão devolve logo a última cópia gravada em disco e
+# corre o sync_database numa thread; o resultado substitui a cópia num rerun seguinte.
+# A cópia pode ter sido gravada antes de gravações feitas por outro processo, por isso é sempre revalidada;
+# só uma sincronização do aquecimento ainda em curso quando a sessão começa vale como a da sessão.
+_executor_sync = ThreadPoolExecutor(max_workers=2, thread_name_prefix="sync_database")
+
+@rastrear()
+def carregar_snapshot_vocab(language):
+    """Lê a cópia local do vocabulário do cache em disco. Devolve None se não existir ou não puder ser lida."""
+    db_df = cache_disco().obter(f"vocab/{language}", etiqueta_versao(tuple(REQUIRED_VOCAB_COLS)))
+    return db_df if isinstance(db_df, pd.DataFrame) and list(db_df.columns) == list(REQUIRED_VOCAB_COLS) else None
+
+@rastrear()
+def gravar_snapshot_vocab(db_df, language):
+    """Grava a cópia local do vocabulário no cache em disco (numa transação, nunca fica uma cópia a meio)."""
+    cache_disco().gravar(f"vocab/{language}", etiqueta_versao(tuple(REQUIRED_VOCAB_COLS)), db_df)
+
+@rastrear()
+def sincronizar_e_gravar_snapshot(language):
+    db_df = sync_database(language)
+    if db:
+        gravar_snapshot_vocab(db_df, language)
+    return db_df
+
+def iniciar_sincronizacao(language):
+    """
+    Corre sincronizar_e_gravar_snapshot numa thread (com o contexto da sessão do Streamlit). Devolve o Future.
+    Se o aquecimento ainda está a sincronizar o idioma, espera por ele e usa a cópia que ele grava, sem ler o Firestore de novo.
+    """
+    contexto = get_script_run_ctx()
+    aquecimento = get_warmup_status()
+    em_curso = aquecimento is not None and aquecimento.em_curso(language, 'vocabulario')
+    def tarefa():
+        if contexto is not None:
+            add_script_run_ctx(threading.current_thread(), contexto)
+        if em_curso and aquecimento.aguardar(language, 'vocabulario') and aquecimento.etapas[(language, 'vocabulario')] == 'ok':
+            db_df = carregar_snapshot_vocab(language)
+            if db_df is not None:
+                return db_df
+        return sincronizar_e_gravar_snapshot(language)
+    # Com as contextvars do rerun, as leituras da sincronização contam para a sessão e a página que a pediram
+    return _executor_sync.submit(contextvars.copy_context().run, tarefa)
+
+def registrar_alteracao_vocab(language, palavras, removidas=False):
+    """
+    Anota as palavras gravadas (ou apagadas) enquanto há uma sincronização em segundo plano pendente,
+    para que o resultado dela não substitua essas linhas pelas versões lidas antes da gravação.
+    """
+    pendente = st.session_state.get(f"sync_db_{language}")
+    if pendente is not None:
+        pendente['removidas' if removidas else 'alteradas'].update(palavras)
+
+@rastrear()
+def aplicar_sincronizacao_pendente(language):
+    """Se a sincronização em segundo plano terminou, troca o DataFrame da sessão pelo resultado."""
+    sync_key = f"sync_db_{language}"
+    pendente = st.session_state.get(sync_key)
+    if pendente is None or not pendente['future'].done():
+        return
+    del st.session_state[sync_key]
+    if pendente['future'].exception() is not None:
+        log.error("Sincronização em segundo plano de %s falhou: %s", language, pendente['future'].exception())
+        return
+    db_df = pendente['future'].result()
+    # As gravações feitas na sessão entretanto prevalecem sobre o que foi lido do Firestore
+    if pendente['removidas']:
+        db_df = db_df[~db_df['palavra'].isin(pendente['removidas'])]
+    if pendente['alteradas']:
+        atual = st.session_state[f"db_df_{language}"]
+        db_df = pd.concat([db_df[~db_df['palavra'].isin(pendente['alteradas'])],
+                           atual[atual['palavra'].isin(pendente['alteradas'])]], ignore_index=True)
+    st.session_state[f"db_df_{language}"] = db_df
+    log.debug("Vocabulário de %s atualizado com a sincronização em segundo plano.", language)
+
+@rastrear()
 def save_vocab_db(df, language):
     """Salva o DataFrame de vocabulário no Firestore."""
-    print(f"DEBUG: Iniciando save_vocab_db para {language}...")
     if not db or df.empty: 
-        print("DEBUG: Cliente Firestore não disponível ou DataFrame vazio. Nada para salvar.")
+        log.debug("Cliente Firestore não disponível ou DataFrame vazio. Nada para salvar.")
         return
+    registrar_alteracao_vocab(language, df['palavra'])
 
     collection_name = get_collection_name(DB_COLLECTION_NAME, language)
+    # Só as colunas do esquema persistido vão para o Firestore; colunas derivadas ficam na sessão
+    colunas = [col for col in REQUIRED_VOCAB_COLS if col in df.columns]
     batch = db.batch()
-    for _, row in df.iterrows():
-        doc_ref = db.collection(collection_name).document(row['palavra'])
-        data_to_save = row.to_dict()
+    for data_to_save in df[colunas].to_dict('records'):
+        doc_ref = db.collection(collection_name).document(data_to_save['palavra'])
         # Converte Timestamps para formato compatível com Firestore
         for key, value in data_to_save.items():
             if isinstance(value, pd.Timestamp):
@@ -321,58 +427,223 @@ def save_vocab_db(df, language):
                 data_to_save[key] = None
         batch.set(doc_ref, data_to_save)
     batch.commit()
-    print(f"DEBUG: save_vocab_db finalizado para {language}.")
 
+@rastrear()
+def update_active_status(alteracoes, language, batch_size=400):
+    """
+    Grava o campo 'ativa' das palavras em `alteracoes` ({palavra: ativa}) no Firestore e no DataFrame da sessão.
+    Só as palavras cujo valor muda são atualizadas, uma escrita por palavra. Devolve o número de palavras alteradas.
+    """
+    db_df = get_session_db(language)
+    indice_palavras = get_word_index(language)
+    coluna_ativa = db_df.columns.get_loc('ativa')
+    mudancas = {
+        palavra: bool(ativa) for palavra, ativa in alteracoes.items()
+        if palavra in indice_palavras and bool(db_df.iat[indice_palavras[palavra], coluna_ativa]) != bool(ativa)
+    }
+    log.debug("update_active_status para %s: %d palavras alteradas.", language, len(mudancas))
+    for palavra, ativa in mudancas.items():
+        db_df.iat[indice_palavras[palavra], coluna_ativa] = ativa
+    registrar_alteracao_vocab(language, mudancas)
+    if db and mudancas:
+        collection = db.collection(get_collection_name(DB_COLLECTION_NAME, language))
+        itens = list(mudancas.items())
+        for inicio in range(0, len(itens), batch_size):
+            batch = db.batch()
+            for palavra, ativa in itens[inicio:inicio + batch_size]:
+                batch.update(collection.document(palavra), {'ativa': ativa})
+            batch.commit()
+    return len(mudancas)
+
+# --- Palavras Apagadas ---
+# O registo das palavras apagadas está repartido por FRAGMENTOS_REMOVIDAS documentos da coleção
+# deleted_vocab_{idioma}, cada um com um array 'palavras', escolhidos por um hash estável da palavra:
+# nenhum documento se aproxima do limite de 1 MiB do Firestore e ler o registo custa sempre o mesmo
+# número de leituras. O documento único antigo ('user_deleted') continua a ser lido e limpo.
+FRAGMENTOS_REMOVIDAS = 16
+DOC_REMOVIDAS_LEGADO = 'user_deleted'
+
+def _fragmento_removidas(palavra):
+    return f"fragmento_{zlib.crc32(palavra.encode('utf-8')) % FRAGMENTOS_REMOVIDAS:02d}"
+
+def _agrupar_por_fragmento(palavras):
+    fragmentos = defaultdict(list)
+    for palavra in palavras:
+        fragmentos[_fragmento_removidas(palavra)].append(palavra)
+    return fragmentos
+
+def get_deleted_words(language):
+    """Conjunto das palavras apagadas do vocabulário (lido dos fragmentos do registo no Firestore)."""
+    if not db:
+        return set()
+    docs = db.collection(get_collection_name(DELETED_VOCAB_COLLECTION_NAME, language)).stream()
+    return {palavra for doc in docs for palavra in (doc.to_dict() or {}).get('palavras', [])}
+
+def get_session_deleted_words(language):
+    """Palavras apagadas, lidas do Firestore só na primeira chamada da sessão (delete/restore_vocab_words mantêm-nas)."""
+    session_key = f"palavras_apagadas_{language}"
+    if session_key not in st.session_state:
+        st.session_state[session_key] = get_deleted_words(language)
+    return st.session_state[session_key]
+
+@rastrear()
+def delete_vocab_words(palavras, language, batch_size=400):
+    """
+    Apaga palavras do vocabulário no Firestore, em lotes de `batch_size` documentos, e do DataFrame da sessão.
+    Cada lote também acrescenta as palavras ao registo de palavras apagadas, para o sync_database não as recriar.
+    Devolve o número de palavras apagadas.
+    """
+    palavras = list(dict.fromkeys(palavras))
+    if not palavras:
+        return 0
+    if db:
+        collection = db.collection(get_collection_name(DB_COLLECTION_NAME, language))
+        removidas = db.collection(get_collection_name(DELETED_VOCAB_COLLECTION_NAME, language))
+        for inicio in range(0, len(palavras), batch_size):
+            lote = palavras[inicio:inicio + batch_size]
+            batch = db.batch()
+            for palavra in lote:
+                batch.delete(collection.document(palavra))
+            for doc_id, fragmento in _agrupar_por_fragmento(lote).items():
+                batch.set(removidas.document(doc_id), {'palavras': firestore.ArrayUnion(fragmento)}, merge=True)
+            batch.commit()
+    else:
+        log.warning("Cliente Firestore não disponível. Palavras apagadas apenas da sessão.")
+
+    session_key = f"db_df_{language}"
+    db_df = st.session_state.get(session_key)
+    if db_df is not None:
+        st.session_state[session_key] = db_df[~db_df['palavra'].isin(palavras)]
+    registrar_alteracao_vocab(language, palavras, removidas=True)
+    # Os índices derivados (fila de revisões incluída) são refeitos sobre o novo DataFrame
+    st.session_state.pop(f"vocabulario_{language}", None)
+    apagadas = st.session_state.get(f"palavras_apagadas_{language}")
+    if apagadas is not None:
+        apagadas.update(palavras)
+    return len(palavras)
+
+@rastrear()
+def restore_vocab_words(palavras, language):
+    """
+    Desfaz a remoção de palavras: tira-as do registo de palavras apagadas e sincroniza o vocabulário,
+    que as recria a partir dos arquivos base (com o progresso a zero). Devolve o número de palavras restauradas.
+    """
+    palavras = list(dict.fromkeys(palavras))
+    if not palavras:
+        return 0
+    if not db:
+        log.warning("Cliente Firestore não disponível. Não é possível restaurar palavras.")
+        return 0
+    removidas = db.collection(get_collection_name(DELETED_VOCAB_COLLECTION_NAME, language))
+    batch = db.batch()
+    for doc_id, fragmento in _agrupar_por_fragmento(palavras).items():
+        batch.set(removidas.document(doc_id), {'palavras': firestore.ArrayRemove(fragmento)}, merge=True)
+    legado = removidas.document(DOC_REMOVIDAS_LEGADO)
+    if legado.get().exists:
+        batch.set(legado, {'palavras': firestore.ArrayRemove(palavras)}, merge=True)
+    batch.commit()
+
+    apagadas = st.session_state.get(f"palavras_apagadas_{language}")
+    if apagadas is not None:
+        apagadas.difference_update(palavras)
+    # Uma sincronização em segundo plano pendente leu o registo antes da restauração: é substituída por esta
+    st.session_state.pop(f"sync_db_{language}", None)
+    st.session_state[f"db_df_{language}"] = sincronizar_e_gravar_snapshot(language)
+    st.session_state.pop(f"vocabulario_{language}", None)
+    return len(palavras)
+
+@rastrear()
 def get_history(language):
     """Carrega o histórico de um documento único no Firestore."""
-    print(f"DEBUG: Iniciando get_history para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Retornando histórico vazio.")
+        log.debug("Cliente Firestore não disponível. Retornando histórico vazio.")
         return {"quiz": [], "gpt_quiz": [], "mixed_quiz": []}
     
     doc_ref = db.collection(get_collection_name(HISTORY_COLLECTION_NAME, language)).document('user_history')
     doc = doc_ref.get()
     history_data = doc.to_dict() if doc.exists else {"quiz": [], "gpt_quiz": [], "mixed_quiz": []}
-    print(f"DEBUG: get_history finalizado. Dados: {len(history_data.get('quiz',[]))} quizzes, {len(history_data.get('gpt_quiz',[]))} gpt_quizzes, {len(history_data.get('mixed_quiz',[]))} mixed_quizzes.")
     return history_data
 
+@rastrear()
 def save_history(historico, language):
     """Salva o histórico em um documento único no Firestore."""
-    print(f"DEBUG: Iniciando save_history para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Nada para salvar histórico.")
+        log.debug("Cliente Firestore não disponível. Nada para salvar histórico.")
         return
     doc_ref = db.collection(get_collection_name(HISTORY_COLLECTION_NAME, language)).document('user_history')
     doc_ref.set(historico)
-    print(f"DEBUG: save_history finalizado para {language}.")
+    resumo = st.session_state.get(f"resumo_historico_{language}")
+    if resumo is not None:
+        resumo.sincronizar(historico)
 
+@rastrear()
 def clear_history(language):
     """Limpa o histórico de desempenho no Firestore."""
-    print(f"DEBUG: Iniciando clear_history para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Não é possível limpar histórico.")
+        log.warning("Cliente Firestore não disponível. Não é possível limpar histórico.")
         return
     db.collection(get_collection_name(HISTORY_COLLECTION_NAME, language)).document('user_history').delete()
+    st.session_state.pop(f"resumo_historico_{language}", None)
     st.success("Histórico de desempenho online foi limpo com sucesso!")
-    print(f"DEBUG: clear_history finalizado para {language}.")
 
+@rastrear()
+def record_daily_stats(dia, valores, language):
+    """Soma os valores de uma sessão ao documento do dia ('AAAA-MM-DD'), com incrementos atômicos e sem leitura prévia."""
+    if not db:
+        return
+    doc_ref = db.collection(get_collection_name(DAILY_STATS_COLLECTION_NAME, language)).document(dia)
+    doc_ref.set({'data': dia, **{campo: firestore.Increment(valor) for campo, valor in valores.items()}}, merge=True)
+    st.session_state.pop(f"resumo_diario_{language}", None)
+
+@rastrear()
+def get_daily_stats(language, dias=DIAS_EVOLUCAO):
+    """Obtém os resumos diários mais recentes (até `dias` documentos) como DataFrame indexado pelo dia, com cache na sessão."""
+    session_key = f"resumo_diario_{language}"
+    if session_key not in st.session_state:
+        documentos = []
+        if db:
+            collection = db.collection(get_collection_name(DAILY_STATS_COLLECTION_NAME, language))
+            documentos = [doc.to_dict() for doc in collection.order_by("data", direction=firestore.Query.DESCENDING).limit(dias).stream()]
+        st.session_state[session_key] = serie_diaria(documentos)
+    return st.session_state[session_key]
+
+@rastrear()
+def rebuild_daily_stats(language, batch_size=400):
+    """
+    Ferramenta de manutenção: refaz os resumos diários a partir do histórico gravado.
+    Os campos que o histórico conhece são substituídos; as reativações (Modo de Revisão) são mantidas.
+    Devolve o número de dias gravados.
+    """
+    if not db:
+        log.error("Cliente Firestore não disponível. Resumos diários não reconstruídos.")
+        return 0
+    dias = list(agregar_historico_por_dia(get_history(language)).items())
+    collection = db.collection(get_collection_name(DAILY_STATS_COLLECTION_NAME, language))
+    for inicio in range(0, len(dias), batch_size):
+        batch = db.batch()
+        for dia, valores in dias[inicio:inicio + batch_size]:
+            batch.set(collection.document(dia), {'data': dia, **valores}, merge=True)
+        batch.commit()
+    st.session_state.pop(f"resumo_diario_{language}", None)
+    log.info("rebuild_daily_stats para %s: %d dias.", language, len(dias))
+    return len(dias)
+
+@rastrear()
 def get_writing_log(language):
     """Carrega o log de escrita do Firestore."""
-    print(f"DEBUG: Iniciando get_writing_log para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Retornando log de escrita vazio.")
+        log.debug("Cliente Firestore não disponível. Retornando log de escrita vazio.")
         return []
     collection_name = get_collection_name(WRITING_LOG_COLLECTION_NAME, language)
     docs = db.collection(collection_name).order_by("timestamp", direction=firestore.Query.DESCENDING).stream()
     log_data = [doc.to_dict() for doc in docs]
-    print(f"DEBUG: get_writing_log finalizado. {len(log_data)} entradas.")
     return log_data
 
+@rastrear()
 def add_writing_entry(entry, language):
     """Adiciona uma nova entrada ao log de escrita no Firestore."""
-    print(f"DEBUG: Iniciando add_writing_entry para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Não é possível adicionar entrada de escrita.")
+        log.warning("Cliente Firestore não disponível. Não é possível adicionar entrada de escrita.")
         return
     collection_name = get_collection_name(WRITING_LOG_COLLECTION_NAME, language)
     entry['timestamp'] = firestore.SERVER_TIMESTAMP # Adiciona um timestamp do servidor
@@ -383,13 +654,12 @@ def add_writing_entry(entry, language):
     # Atualiza o status 'escrita_completa' no vocabulário
     vocab_collection = get_collection_name(DB_COLLECTION_NAME, language)
     db.collection(vocab_collection).document(entry['palavra']).update({"escrita_completa": True})
-    print(f"DEBUG: add_writing_entry finalizado para {language}.")
 
+@rastrear()
 def delete_writing_entries(entries_to_delete, language):
     """Deleta entradas do log de escrita no Firestore."""
-    print(f"DEBUG: Iniciando delete_writing_entries para {language}...")
     if not db or not entries_to_delete: 
-        print("DEBUG: Cliente Firestore não disponível ou nenhuma entrada para deletar.")
+        log.debug("Cliente Firestore não disponível ou nenhuma entrada para deletar.")
         return
     
     collection_name = get_collection_name(WRITING_LOG_COLLECTION_NAME, language)
@@ -399,25 +669,23 @@ def delete_writing_entries(entries_to_delete, language):
             doc_ref = db.collection(collection_name).document(entry['doc_id'])
             batch.delete(doc_ref)
     batch.commit()
-    print(f"DEBUG: delete_writing_entries finalizado para {language}.")
 
+@rastrear()
 def load_sentence_log(language):
     """Carrega o log de frases escritas pelo utilizador do Firestore."""
-    print(f"DEBUG: Iniciando load_sentence_log para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Retornando log de frases vazio.")
+        log.debug("Cliente Firestore não disponível. Retornando log de frases vazio.")
         return []
     collection_name = get_collection_name(SENTENCE_LOG_COLLECTION_NAME, language)
     docs = db.collection(collection_name).order_by("timestamp", direction=firestore.Query.DESCENDING).stream()
     log_data = [doc.to_dict() for doc in docs]
-    print(f"DEBUG: load_sentence_log finalizado. {len(log_data)} entradas.")
     return log_data
 
+@rastrear()
 def save_sentence_log(log_data, language):
     """Salva o log de frases escritas pelo utilizador no Firestore."""
-    print(f"DEBUG: Iniciando save_sentence_log para {language}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Não é possível salvar log de frases.")
+        log.warning("Cliente Firestore não disponível. Não é possível salvar log de frases.")
         return
     collection_name = get_collection_name(SENTENCE_LOG_COLLECTION_NAME, language)
     batch = db.batch()
@@ -427,68 +695,132 @@ def save_sentence_log(log_data, language):
             entry['timestamp'] = firestore.SERVER_TIMESTAMP
             batch.set(doc_ref, entry)
     batch.commit()
-    print(f"DEBUG: save_sentence_log finalizado para {language}.")
 
+@rastrear()
 def delete_sentence_log_entry(word_key, language):
     """Apaga uma entrada específica do log de frases no Firestore."""
-    print(f"DEBUG: Iniciando delete_sentence_log_entry para {language} com word_key: {word_key}...")
     if not db: 
-        print("DEBUG: Cliente Firestore não disponível. Não é possível deletar entrada de frase.")
+        log.warning("Cliente Firestore não disponível. Não é possível deletar entrada de frase.")
         return
     db.collection(get_collection_name(SENTENCE_LOG_COLLECTION_NAME, language)).document(word_key).delete()
-    print(f"DEBUG: delete_sentence_log_entry finalizado para {language}.")
+
+# --- Leituras Concorrentes ---
+# As leituras independentes de uma página (vocabulário, histórico, log de escrita, resumos diários, de um ou
+# dos dois idiomas) correm ao mesmo tempo: a página espera pela leitura mais lenta, não pela soma de todas.
+_executor_leituras = ThreadPoolExecutor(max_workers=8, thread_name_prefix="leituras")
+
+def fetch_concurrently(*leituras, executor=None):
+    """
+    Corre as leituras (funções sem argumentos) em paralelo, com o contexto da sessão do Streamlit,
+    e devolve os resultados pela mesma ordem. Uma exceção numa leitura é relançada aqui.
+    As leituras não devem chamar fetch_concurrently nem depender umas das outras.
+    `executor` substitui o pool das leituras das páginas (o aquecimento usa o seu).
+    """
+    executor = executor or _executor_leituras
+    contexto = get_script_run_ctx()
+    def com_contexto(leitura):
+        def tarefa():
+            if contexto is not None:
+                add_script_run_ctx(threading.current_thread(), contexto)
+            return leitura()
+        return tarefa
+    # Cada leitura corre numa cópia das contextvars, para os seus spans entrarem no rastreio do rerun
+    futures = [executor.submit(contextvars.copy_context().run, com_contexto(leitura)) for leitura in leituras]
+    return [future.result() for future in futures]
 
 # --- Funções Utilitárias e de Lógica ---
 
+@rastrear()
 def get_session_db(language):
-    """Obtém o DataFrame do banco de dados de vocabulário da sessão ou sincroniza com o Firestore."""
+    """
+    Obtém o DataFrame do banco de dados de vocabulário da sessão.
+    Na primeira chamada serve a cópia local, se houver, e sincroniza com o Firestore em segundo plano;
+    sem cópia local, sincroniza logo.
+    """
     session_key = f"db_df_{language}"
+    aplicar_sincronizacao_pendente(language)
     if session_key not in st.session_state:
-        st.session_state[session_key] = sync_database(language)
+        aquecimento = get_warmup_status()
+        snapshot = carregar_snapshot_vocab(language) if db else None
+        if snapshot is None and db and aquecimento is not None and aquecimento.em_curso(language, 'vocabulario'):
+            # Sem cópia local: o aquecimento está a sincronizar este idioma e a cópia que ele grava chega primeiro
+            snapshot = carregar_snapshot_vocab(language) if aquecimento.aguardar(language, 'vocabulario') else None
+            if snapshot is not None:
+                log.debug("Vocabulário de %s servido da cópia gravada pelo aquecimento (%d linhas).", language, len(snapshot))
+                st.session_state[session_key] = snapshot
+                return snapshot
+        if snapshot is None:
+            st.session_state[session_key] = sincronizar_e_gravar_snapshot(language)
+        else:
+            log.debug("Vocabulário de %s servido da cópia local (%d linhas); sincronização em segundo plano.", language, len(snapshot))
+            st.session_state[session_key] = snapshot
+            st.session_state[f"sync_db_{language}"] = {'future': iniciar_sincronizacao(language), 'alteradas': set(), 'removidas': set()}
     return st.session_state[session_key]
 
+@rastrear()
+def get_session_vocab(language):
+    """Obtém o Vocabulario (DataFrame da sessão e índices derivados) usado pelo motor de quiz."""
+    session_key = f"vocabulario_{language}"
+    db_df = get_session_db(language)
+    vocab = st.session_state.get(session_key)
+    if vocab is None or vocab.db_df is not db_df:
+        vocab = Vocabulario(db_df)
+        st.session_state[session_key] = vocab
+    return vocab
+
+def get_word_index(language):
+    """Obtém o índice palavra -> posição da linha no vocabulário da sessão."""
+    return get_session_vocab(language).indice_palavras
+
+def get_progress_matrix(language):
+    """Obtém a matriz de progresso (formato colunar) do vocabulário da sessão."""
+    return get_session_vocab(language).matriz
+
+def get_review_queue(language):
+    """Obtém a fila de revisões (min-heap por vencimento) da sessão, construindo-a na primeira chamada."""
+    return get_session_vocab(language).fila(get_corpus_index(language))
+
+class ArmazenamentoFirestore:
+    """Armazenamento do motor de quiz sobre as coleções do Firestore de um idioma."""
+
+    def __init__(self, language):
+        self.language = language
+
+    def gravar_palavras(self, df):
+        save_vocab_db(df, self.language)
+
+    def carregar_historico(self):
+        return get_history(self.language)
+
+    def gravar_historico(self, historico):
+        save_history(historico, self.language)
+
+    def somar_resumo_diario(self, dia, valores):
+        record_daily_stats(dia, valores, self.language)
+
+@rastrear()
+def update_schedule_from_quiz(quiz_results, language):
+    """Atualiza apenas o agendamento das revisões (usado pelo Modo de Revisão, que não altera o progresso)."""
+    db_df = get_session_db(language)
+    if db_df.empty or not quiz_results:
+        return
+    linhas = aplicar_agenda(get_session_vocab(language), get_corpus_index(language), quiz_results)
+    save_vocab_db(db_df.iloc[linhas], language)
+
+@rastrear()
 def update_progress_from_quiz(quiz_results, language):
     """Atualiza o progresso das palavras no DataFrame e no Firestore após um quiz."""
-    print(f"DEBUG: Iniciando update_progress_from_quiz para {language} com {len(quiz_results)} resultados.")
     db_df = get_session_db(language)
     if db_df.empty: 
-        print("DEBUG: DataFrame de vocabulário vazio, não é possível atualizar o progresso.")
+        log.warning("DataFrame de vocabulário vazio, não é possível atualizar o progresso.")
         return
     
-    deactivated_words = []
-    
-    for palavra, resultado, identificador_exercicio, tipo_exercicio in quiz_results:
-        idx_list = db_df.index[db_df['palavra'] == palavra].tolist()
-        if not idx_list: 
-            print(f"DEBUG: Palavra '{palavra}' não encontrada no DataFrame. Pulando atualização.")
-            continue
-        idx = idx_list[0]
-        
-        progresso = db_df.at[idx, 'progresso']
-        if not isinstance(progresso, dict): progresso = {}
-        
-        if identificador_exercicio in progresso:
-            progresso[identificador_exercicio] = resultado
-        else:
-            print(f"DEBUG: Identificador de exercício '{identificador_exercicio}' não encontrado para a palavra '{palavra}'. Adicionando.")
-            progresso[identificador_exercicio] = resultado
-            
-        db_df.at[idx, 'progresso'] = progresso
-        
-        # Verifica se todos os exercícios para a palavra foram acertados
-        if all(status == 'acerto' for status in progresso.values()):
-            if db_df.at[idx, 'ativa']:
-                db_df.at[idx, 'ativa'] = False
-                db_df.at[idx, 'mastery_count'] = int(db_df.at[idx, 'mastery_count'] + 1)
-                deactivated_words.append(palavra)
-                print(f"DEBUG: Palavra '{palavra}' desativada e mastery_count incrementado.")
-                
-    save_vocab_db(db_df, language)
-    st.session_state[f"db_df_{language}"] = db_df # Atualiza o DataFrame na sessão
+    linhas, deactivated_words = aplicar_resultados(get_session_vocab(language), get_corpus_index(language), quiz_results)
+    # Só as linhas tocadas pelo quiz são regravadas
+    save_vocab_db(db_df.iloc[linhas], language)
     if deactivated_words: 
         st.session_state['deactivated_words_notification'] = deactivated_words
-        print(f"DEBUG: Palavras desativadas para notificação: {deactivated_words}")
-    print(f"DEBUG: update_progress_from_quiz finalizado para {language}.")
+        log.debug("Palavras desativadas para notificação: %s", deactivated_words)
 
 def delete_cloze_exercises(exercises_to_delete, language):
     """
@@ -499,25 +831,33 @@ def delete_cloze_exercises(exercises_to_delete, language):
     Por enquanto, apenas exibe um aviso.
     """
     st.warning("A exclusão de exercícios Cloze base não é suportada na versão online. As alterações não serão persistentes.")
-    print(f"AVISO: Tentativa de deletar exercícios Cloze para {language}. Esta operação não é persistente no Streamlit Cloud.")
+    log.warning("Tentativa de deletar exercícios Cloze para %s. Esta operação não é persistente no Streamlit Cloud.", language)
     # Se você quiser que a exclusão seja persistente, precisaria de uma coleção no Firestore
     # para armazenar os exercícios Cloze e modificá-la aqui.
     pass
 
 def reset_quiz_state(prefix):
     """Limpa o estado da sessão relacionado a um quiz específico."""
-    print(f"DEBUG: Resetando estado do quiz com prefixo: {prefix}")
     keys_to_del = [k for k in st.session_state.keys() if k.startswith(prefix)]
     for k in keys_to_del:
         del st.session_state[k]
-    print(f"DEBUG: Estado do quiz com prefixo '{prefix}' limpo.")
+    log.debug("Estado do quiz com prefixo '%s' limpo (%d chaves).", prefix, len(keys_to_del))
 
+@rastrear()
 def load_sentence_data(language):
-    """Carrega as palavras e metadados do ficheiro de frases."""
-    filepath = SENTENCE_WORDS_FILE
-    print(f"DEBUG: Carregando dados de frases de: {filepath}")
+    """Carrega as palavras e metadados do ficheiro de frases (relido quando o ficheiro muda)."""
+    return _ler_dados_frases(SENTENCE_WORDS_FILE, language, impressao_arquivo(SENTENCE_WORDS_FILE))
+
+@st.cache_data(max_entries=4)
+def _ler_dados_frases(filepath, language, impressao):
+    return cache_disco().obter_ou_calcular(
+        f"frases/{language}/{filepath}", etiqueta_versao(impressao), lambda: ler_dados_frases(filepath, language))
+
+@rastrear()
+def ler_dados_frases(filepath, language):
+    """Palavras e metadados do ficheiro de frases, lidos do disco."""
     if not os.path.exists(filepath):
-        print(f"ERRO: Arquivo de frases não encontrado: {os.path.abspath(filepath)}")
+        log.error("Arquivo de frases não encontrado: %s", os.path.abspath(filepath))
         return {}
     
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -548,120 +888,114 @@ def load_sentence_data(language):
             dados['palavra_base'] = palavra
             words_data[unique_key] = dados
             
-    print(f"DEBUG: Carregados {len(words_data)} dados de frases para {language}.")
+    log.debug("Carregados %d dados de frases para %s.", len(words_data), language)
     return words_data
 
-# --- GERADORES DE QUESTÕES (CENTRALIZADOS) ---
-# Estas funções não interagem diretamente com o armazenamento, então permanecem como estão.
-def gerar_mcq_significado(cartao, baralho):
-    correta = cartao.get("back", "")
-    if not correta: return None, None, None, None, None, None
-    outros = [c["back"] for c in baralho if c["front"] != cartao["front"] and c.get("back")]
-    distractors = random.sample(outros, min(3, len(outros)))
-    opcoes = list(set([correta] + distractors))
-    random.shuffle(opcoes)
-    pergunta = f'What does "<span class="keyword-highlight">{cartao["front"]}</span>" mean?'
-    return 'MCQ Significado', pergunta, opcoes, opcoes.index(correta), cartao.get('level'), f"significado::{correta}"
-
-def gerar_mcq_traducao_ingles(cartao, baralho):
-    correta = cartao["front"]
-    outros = [c["front"] for c in baralho if c["front"] != cartao["front"]]
-    distractors = random.sample(outros, min(3, len(outros)))
-    opcoes = list(set([correta] + distractors))
-    random.shuffle(opcoes)
-    pergunta = f'Qual palavra em inglês corresponde a: "<span class="keyword-highlight">{cartao["back"]}</span>"?'
-    return 'MCQ Tradução Inglês', pergunta, opcoes, opcoes.index(correta), cartao.get('level'), f"traducao::{cartao.get('back')}"
-
-def gerar_mcq_sinonimo(cartao, baralho):
-    correta = cartao.get("cloze_answer", "")
-    if not correta: return None, None, None, None, None, None
-    outros = [c.get("cloze_answer") for c in baralho if c["front"] != cartao["front"] and c.get("cloze_answer")]
-    distractors = random.sample(outros, min(3, len(outros)))
-    opcoes = list(set([correta] + distractors))
-    random.shuffle(opcoes)
-    pergunta = f'Selecione o sinônimo de "<span class="keyword-highlight">{cartao["front"]}</span>":'
-    return 'MCQ Sinônimo', pergunta, opcoes, opcoes.index(correta), cartao.get('level'), f"sinonimo::{correta}"
-
-def gerar_fill_gap(cartao, baralho):
-    palavra = cartao['front']
-    frase = cartao.get('example', '')
-    if not frase: return None, None, None, None, None, None
-    frase_gap = re.sub(rf'{re.escape(palavra)}', '_____', frase, count=1, flags=re.IGNORECASE)
-    if frase_gap == frase: return None, None, None, None, None, None
-    correta = palavra
-    outros = [c["front"] for c in baralho if c["front"].lower() != palavra.lower()]
-    distractors = random.sample(outros, min(3, len(outros)))
-    opcoes = [correta] + distractors
-    random.shuffle(opcoes)
-    return 'Fill', frase_gap, opcoes, opcoes.index(correta), cartao.get('level'), f"fill::{frase}"
-
-def gerar_reading_comprehension(cartao, baralho):
-    palavra = cartao["front"]
-    frase_exemplo = cartao.get("example", "")
-    if not frase_exemplo: return None, None, None, None, None, None
-    frase_destacada = re.sub(rf'{re.escape(palavra)}', f'<span class="keyword-highlight">{palavra}</span>', frase_exemplo, count=1, flags=re.IGNORECASE)
-    pergunta = (f'Na frase: "{frase_destacada}"<br><br>'
-                f'O que provavelmente significa a palavra "<span class="keyword-highlight">{palavra}</span>" nesse contexto?')
-    resposta_correta = cartao["back"]
-    opcoes = [resposta_correta]
-    outros_significados = [c["back"] for c in baralho if c["front"] != cartao["front"] and c.get("back")]
-    opcoes += random.sample(outros_significados, min(3, len(outros_significados)))
-    random.shuffle(opcoes)
-    return 'Reading', pergunta, opcoes, opcoes.index(resposta_correta), cartao.get('level'), f"reading::{frase_exemplo}"
-
-TIPOS_EXERCICIO_ANKI = {
-    "MCQ Significado": gerar_mcq_significado, "MCQ Tradução Inglês": gerar_mcq_traducao_ingles,
-    "MCQ Sinônimo": gerar_mcq_sinonimo, "Fill": gerar_fill_gap, "Reading": gerar_reading_comprehension
-}
+def migrar_ids_vocab(db_df, language):
+    """
+    Converte para os identificadores curtos os mapas 'progresso' e 'agenda' do DataFrame e empacota os estados
+    da agenda ainda no formato antigo (ver core.scheduler). Devolve as palavras alteradas.
+    """
+    ids_legados = get_corpus_index(language)['ids_legados']
+    alteradas = []
+    for idx, palavra, progresso, agenda in zip(db_df.index, db_df['palavra'], db_df['progresso'], db_df['agenda']):
+        progresso, troca_progresso = migrar_mapa_ids(progresso, palavra, ids_legados)
+        agenda, troca_agenda = migrar_mapa_ids(agenda, palavra, ids_legados)
+        agenda, empacotou = empacotar_agenda(agenda)
+        if troca_progresso or troca_agenda or empacotou:
+            db_df.at[idx, 'progresso'] = progresso
+            db_df.at[idx, 'agenda'] = agenda
+            alteradas.append(palavra)
+    return alteradas
+
+@rastrear()
+def migrate_exercise_ids(language, batch_size=400):
+    """
+    Ferramenta de migração: reescreve no Firestore os mapas 'progresso' e 'agenda' que ainda
+    usam os identificadores antigos ou estados da agenda por empacotar. Só os documentos alterados
+    são atualizados, em lotes. Devolve (documentos atualizados, bytes dos mapas antes, bytes depois),
+    pelas regras de tamanho do Firestore.
+    """
+    if not db:
+        log.error("Cliente Firestore não disponível. Migração não executada.")
+        return 0, 0, 0
+    ids_legados = get_corpus_index(language)['ids_legados']
+    collection = db.collection(get_collection_name(DB_COLLECTION_NAME, language))
+    atualizacoes, bytes_antes, bytes_depois = [], 0, 0
+    for doc in collection.stream():
+        dados = doc.to_dict()
+        palavra = dados.get('palavra', doc.id)
+        campos = {}
+        for campo in ('progresso', 'agenda'):
+            novo, trocou = migrar_mapa_ids(dados.get(campo), palavra, ids_legados)
+            if campo == 'agenda':
+                novo, empacotou = empacotar_agenda(novo)
+                trocou = trocou or empacotou
+            if trocou:
+                bytes_antes += tamanho_valor(dados[campo])
+                bytes_depois += tamanho_valor(novo)
+                campos[campo] = novo
+        if campos:
+            atualizacoes.append((doc.id, campos))
+
+    for inicio in range(0, len(atualizacoes), batch_size):
+        batch = db.batch()
+        for doc_id, campos in atualizacoes[inicio:inicio + batch_size]:
+            batch.update(collection.document(doc_id), campos)
+        batch.commit()
+    log.info("migrate_exercise_ids para %s: %d documentos, %d -> %d bytes.", language, len(atualizacoes), bytes_antes, bytes_depois)
+    return len(atualizacoes), bytes_antes, bytes_depois
+
+@rastrear()
+def get_corpus_index(language):
+    """Índice do corpus compilado (ver construir_indice_corpus), partilhado entre sessões e refeito quando os arquivos base mudam."""
+    return _indice_corpus(language, impressoes_corpus())
+
+@st.cache_resource(max_entries=4)
+def _indice_corpus(language, impressoes):
+    def construir():
+        flashcards, todos_exercicios = load_and_cache_data(language)
+        return construir_indice_corpus(flashcards, todos_exercicios)
+    return cache_disco().obter_ou_calcular(f"corpus/indice/{language}", etiqueta_versao(impressoes), construir)
 
 def get_exercise_id_to_type_map(language):
-    """Cria um mapa definitivo de IDs de exercícios para seus tipos."""
-    flashcards, gpt_exercicios = load_and_cache_data(language)
-    id_para_tipo = {}
-    for ex in gpt_exercicios:
-        if ex.get('frase') and ex.get('tipo'):
-            id_para_tipo[ex['frase']] = ex['tipo']
-    for card in flashcards:
-        if card.get("back"):
-            id_para_tipo[f"significado::{card.get('back')}"] = "MCQ Significado"
-            id_para_tipo[f"traducao::{card.get('back')}"] = "MCQ Tradução Inglês"
-        if card.get("example"):
-            id_para_tipo[f"fill::{card.get('example')}"] = "Fill"
-            id_para_tipo[f"reading::{card.get('example')}"] = "Reading"
-        if card.get("cloze_answer"):
-            id_para_tipo[f"sinonimo::{card.get('cloze_answer')}"] = "MCQ Sinônimo"
-    return id_para_tipo
-
-def get_available_exercise_types_for_word(palavra, flashcards_map, gpt_exercicios_map):
-    """Retorna um dicionário com todos os exercícios únicos para uma palavra."""
-    exercicios_palavra = {}
-    
-    if palavra in flashcards_map:
-        card = flashcards_map[palavra]
-        if card.get("back"):
-            exercicios_palavra[f"significado::{card.get('back')}"] = "MCQ Significado"
-            exercicios_palavra[f"traducao::{card.get('back')}"] = "MCQ Tradução Inglês"
-        if card.get("example"):
-            exercicios_palavra[f"fill::{card.get('example')}"] = "Fill"
-            exercicios_palavra[f"reading::{card.get('example')}"] = "Reading"
-        if card.get("cloze_answer"):
-            exercicios_palavra[f"sinonimo::{card.get('cloze_answer')}"] = "MCQ Sinônimo"
-            
-    if palavra in gpt_exercicios_map:
-        for ex in gpt_exercicios_map[palavra]:
-            if ex.get('frase') and ex.get('tipo'):
-                exercicios_palavra[ex['frase']] = ex['tipo']
-            
-    return exercicios_palavra
+    """Mapa definitivo de IDs de exercícios para seus tipos (calculado uma vez por versão do corpus)."""
+    return get_corpus_index(language)['tipo_por_id']
+
+def get_exercise_type_index(language):
+    """Índice invertido: tipo de exercício -> conjunto de IDs desse tipo."""
+    return get_corpus_index(language)['ids_por_tipo']
+
+def calcular_progresso_por_tipo(language, tipos):
+    """
+    Percentagem de acertos por tipo de exercício para cada palavra do vocabulário da sessão.
+    Devolve um DataFrame com o índice do vocabulário e uma coluna por tipo (NaN quando a palavra não tem exercícios do tipo).
+    """
+    return get_progress_matrix(language).percentuais_por_tipo(get_exercise_id_to_type_map(language), tipos)
+
+@rastrear()
+def get_history_summary(language):
+    """
+    Obtém os totais do histórico (ResumoHistorico) da sessão, lendo o histórico do Firestore só na primeira chamada.
+    Se o aquecimento ainda está a ler o histórico, espera por ele e usa o resumo que ele monta.
+    """
+    session_key = f"resumo_historico_{language}"
+    if session_key not in st.session_state:
+        aquecimento = get_warmup_status()
+        em_curso = aquecimento is not None and aquecimento.em_curso(language, 'historico')
+        if em_curso and aquecimento.aguardar(language, 'historico') and aquecimento.etapas[(language, 'historico')] == 'ok':
+            st.session_state[session_key] = copy.deepcopy(aquecimento.resumos_historico[language])
+        else:
+            st.session_state[session_key] = ResumoHistorico.construir(get_history(language))
+    return st.session_state[session_key]
 
+@rastrear()
 def get_performance_summary(language):
     """Gera um resumo de desempenho do usuário."""
-    print(f"DEBUG: Iniciando get_performance_summary para {language}...")
     db_df = get_session_db(language)
-    historico = get_history(language)
-    
+
     if db_df.empty:
-        print("DEBUG: DataFrame de vocabulário vazio no summary. Retornando KPIs zerados.")
+        log.debug("DataFrame de vocabulário vazio no summary. Retornando KPIs zerados.")
         return {
             "db_kpis": {'total': 0, 'ativas': 0, 'inativas': 0, 'anki': 0, 'gpt': 0},
             "kpis": {'precisao': "N/A", 'sessoes': 0, 'status_estudo': "N/A", 'divida_estudo': 0, 'progresso_divida': 0},
@@ -671,82 +1005,104 @@ def get_performance_summary(language):
             "age_ranking": []
         }
 
-    kpis_db = {'total': len(db_df), 'ativas': len(db_df[db_df['ativa']]), 'inativas': len(db_df[~db_df['ativa']]), 'anki': len(db_df[db_df['fonte'] == 'ANKI']), 'gpt': len(db_df[db_df['fonte'] == 'GPT'])}
-    
-    historico_total = historico.get("quiz", []) + historico.get("gpt_quiz", []) + historico.get("mixed_quiz", [])
-    total_acertos = sum(len(s.get("acertos", [])) for s in historico_total)
-    total_erros = sum(len(s.get("erros", [])) for s in historico_total)
-    total_testes = total_acertos + total_erros
-    
-    divida_estudo = (total_erros * 3) - total_acertos
-    if divida_estudo <= 0:
-        status_estudo = "Excelente!"; progresso_divida = 1.0; divida_estudo = 0
-    else:
-        status_estudo = "Atenção Necessária"; progresso_divida = total_acertos / (total_erros * 3) if total_erros > 0 else 1.0
-    
-    kpis_desempenho = {'precisao': f"{(total_acertos / total_testes * 100):.1f}%" if total_testes > 0 else "N/A", 'sessoes': len(historico_total), 'status_estudo': status_estudo, 'divida_estudo': divida_estudo, 'progresso_divida': progresso_divida}
-    
-    def calcular_progresso_geral(row):
-        progresso_dict = row.get('progresso', {})
-        if not isinstance(progresso_dict, dict) or not progresso_dict: return 0
-        acertos_count = list(progresso_dict.values()).count('acerto')
-        total_exercicios = len(progresso_dict)
-        return (acertos_count / total_exercicios * 100) if total_exercicios > 0 else 0
-    
-    # Garante que 'data_adicao' é datetime antes de usar
-    db_df['data_adicao'] = pd.to_datetime(db_df['data_adicao'], errors='coerce')
-    db_df['progresso_percent'] = db_df.apply(calcular_progresso_geral, axis=1)
-    mastered_count = len(db_df[db_df['progresso_percent'] >= 100])
-    in_progress_count = len(db_df) - mastered_count
-    bins = [-1, 0, 25, 50, 75, 101]
-    labels = ['Não Iniciado', '1-25%', '26-50%', '51-75%', '76-100%']
-    db_df['progress_bin'] = pd.cut(db_df['progresso_percent'], bins=bins, labels=labels, right=True)
-    distribution_data = db_df['progress_bin'].value_counts().sort_index()
-    
-    mastery_pie_data = {'Dominado': mastered_count, 'Em Progresso': in_progress_count}
-    
-    all_errors = [word for s in historico_total for word in s.get("erros", [])]
-    error_counts = Counter(all_errors)
-    active_words_df = db_df[db_df['ativa']]
-    active_words_set = set(active_words_df['palavra'])
-
-    ranked_errors = []
-    if not active_words_df.empty:
-        word_to_date_map = active_words_df.set_index('palavra')['data_adicao'].to_dict()
-        now = datetime.datetime.now(datetime.timezone.utc) # Usar timezone-aware datetime
-        for word, count in error_counts.items():
-            if word in active_words_set:
-                creation_date = word_to_date_map.get(word)
-                if pd.notna(creation_date):
-                    # Garante que creation_date é timezone-aware ou naive como 'now'
-                    if creation_date.tzinfo is None:
-                        creation_date = creation_date.replace(tzinfo=datetime.timezone.utc)
-                    days_since = (now - creation_date).days
-                    ranked_errors.append((word, count, days_since))
-    
-    sorted_ranked_errors = sorted(ranked_errors, key=lambda item: item[1], reverse=True)
-
-    age_ranking = []
-    if not active_words_df.empty:
-        now = datetime.datetime.now(datetime.timezone.utc) # Usar timezone-aware datetime
-        for _, row in active_words_df.iterrows():
-            word = row['palavra']
-            creation_date = row['data_adicao']
-            if pd.notna(creation_date):
-                # Garante que creation_date é timezone-aware ou naive como 'now'
-                if creation_date.tzinfo is None:
-                    creation_date = creation_date.replace(tzinfo=datetime.timezone.utc)
-                days_since = (now - creation_date).days
-                age_ranking.append((word, days_since))
-    
-    sorted_age_ranking = sorted(age_ranking, key=lambda item: item[1], reverse=True)
-    
-    print(f"DEBUG: get_performance_summary finalizado para {language}.")
-    return {
-        "db_kpis": kpis_db, 
-        "kpis": kpis_desempenho, 
-        "pie_data": mastery_pie_data, 
-        "distribution_data": distribution_data,
-        "error_ranking": sorted_ranked_errors,
-        "age_ranking": sorted_age_ranking
-    }
\ No newline at end of file
+    summary = resumir_desempenho(get_session_vocab(language), get_history_summary(language))
+    return summary
+
+# --- Aquecimento dos Caches no Arranque ---
+# O primeiro acesso depois de um deploy lia os arquivos base e o Firestore dos dois idiomas dentro do
+# rerun do utilizador. start_warmup faz esse trabalho numa thread assim que o processo arranca: corpus,
+# vocabulário (cópia local), resumo do histórico e dados de frases de cada idioma.
+# O aquecimento tem o seu próprio pool: as leituras das páginas que esperam por ele (get_session_db,
+# get_history_summary) correm no pool das leituras e não lhe podem tirar os workers. Essas esperas têm
+# um limite, depois do qual a sessão lê o Firestore diretamente.
+ETAPAS_AQUECIMENTO = ('corpus', 'vocabulario', 'historico', 'frases')
+ESPERA_AQUECIMENTO_S = 20
+_executor_aquecimento = ThreadPoolExecutor(max_workers=4, thread_name_prefix="aquecimento")
+
+class Aquecimento:
+    """Estado do aquecimento em segundo plano: etapas por idioma, erros e resultados partilhados com as sessões."""
+
+    def __init__(self, idiomas):
+        self.idiomas = tuple(idiomas)
+        self.etapas = {(idioma, etapa): 'pendente' for idioma in self.idiomas for etapa in ETAPAS_AQUECIMENTO}
+        self.eventos = {chave: threading.Event() for chave in self.etapas}
+        self.erros = {}
+        self.resumos_historico = {}
+        self.inicio = time.time()
+        self.fim = None
+
+    @property
+    def pronto(self):
+        return self.fim is not None
+
+    def progresso(self):
+        """(etapas terminadas, total de etapas)."""
+        return sum(estado != 'pendente' for estado in self.etapas.values()), len(self.etapas)
+
+    def executar_etapa(self, idioma, etapa, funcao):
+        """Corre uma etapa, registando o estado ('ok' ou 'erro')."""
+        try:
+            funcao()
+            self.etapas[(idioma, etapa)] = 'ok'
+        except Exception as e:
+            self.erros[(idioma, etapa)] = str(e)
+            self.etapas[(idioma, etapa)] = 'erro'
+            log.error("Aquecimento de %s (%s) falhou: %s", etapa, idioma, e)
+        finally:
+            self.eventos[(idioma, etapa)].set()
+
+    def aguardar(self, idioma, etapa, timeout=ESPERA_AQUECIMENTO_S):
+        """Espera até `timeout` segundos pelo fim da etapa. Devolve False se o tempo acabar primeiro."""
+        evento = self.eventos.get((idioma, etapa))
+        if evento is None or evento.wait(timeout):
+            return True
+        log.warning("Aquecimento de %s (%s) não terminou em %s s; leitura direta do Firestore.", etapa, idioma, timeout)
+        return False
+
+    def em_curso(self, idioma, etapa):
+        """Indica se a etapa ainda não terminou."""
+        evento = self.eventos.get((idioma, etapa))
+        return evento is not None and not evento.is_set()
+
+    def aquecer_historico(self, idioma):
+        self.resumos_historico[idioma] = ResumoHistorico.construir(get_history(idioma))
+
+    def aquecer_vocabulario(self, idioma):
+        self.executar_etapa(idioma, 'corpus', lambda: get_corpus_index(idioma))
+        if db:
+            self.executar_etapa(idioma, 'vocabulario', lambda: sincronizar_e_gravar_snapshot(idioma))
+        else:
+            self.etapas[(idioma, 'vocabulario')] = 'ignorada'
+            self.eventos[(idioma, 'vocabulario')].set()
+
+    def executar(self):
+        # O que o painel inicial precisa (corpus e vocabulário, histórico) corre em paralelo para os dois idiomas; depois as frases
+        leituras = []
+        for idioma in self.idiomas:
+            leituras.append(lambda idioma=idioma: self.aquecer_vocabulario(idioma))
+            if db:
+                leituras.append(lambda idioma=idioma: self.executar_etapa(idioma, 'historico', lambda: self.aquecer_historico(idioma)))
+            else:
+                self.etapas[(idioma, 'historico')] = 'ignorada'
+                self.eventos[(idioma, 'historico')].set()
+        fetch_concurrently(*leituras, executor=_executor_aquecimento)
+        for idioma in self.idiomas:
+            self.executar_etapa(idioma, 'frases', lambda: load_sentence_data(idioma))
+        self.fim = time.time()
+        log.info("Aquecimento concluído em %.1f s (%d erros).", self.fim - self.inicio, len(self.erros))
+
+_aquecimento = None
+_lock_aquecimento = threading.Lock()
+
+def start_warmup(idiomas=IDIOMAS):
+    """Inicia (uma vez por processo) o aquecimento dos caches numa thread. Devolve o Aquecimento."""
+    global _aquecimento
+    with _lock_aquecimento:
+        if _aquecimento is None:
+            _aquecimento = Aquecimento(idiomas)
+            threading.Thread(target=_aquecimento.executar, name="aquecimento", daemon=True).start()
+    return _aquecimento
+
+def get_warmup_status():
+    """O Aquecimento em curso ou terminado, ou None se start_warmup ainda não foi chamado neste processo."""
+    return _aquecimento
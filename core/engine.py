@@ -0,0 +1,288 @@
+import datetime
+import random
+import time
+import numpy as np
+import pandas as pd
+from core.corpus import get_available_exercise_types_for_word
+from core.progress_matrix import MatrizProgresso
+from core.scheduler import FilaRevisao, atualizar_estado, empacotar_estado
+from core.quiz_logic import (
+    IndiceExercicios, calcular_pesos_da_matriz, selecionar_questoes_priorizadas, selecionar_questoes_gpt, gerar_questao,
+)
+from core.quiz_session import QuizSession
+from core.performance import duracao_sessao, resumo_diario_da_sessao
+from core.rastreio import rastrear
+
+# --- Motor de Quiz (sem interface) ---
+# Nada aqui importa o Streamlit: o vocabulário, o índice do corpus (ver core.corpus.construir_indice_corpus)
+# e o armazenamento chegam como parâmetros. As páginas em modules/ são adaptadores finos sobre
+# start_quiz / next_question / answer / finish, e os benchmarks chamam as mesmas funções diretamente.
+
+MODOS = ('anki', 'gpt', 'mixed', 'review', 'focus')
+# Chave do histórico em que cada modo regista as suas sessões (revisão e foco não entram no histórico)
+HISTORICO_POR_MODO = {'anki': 'quiz', 'gpt': 'gpt_quiz', 'mixed': 'mixed_quiz'}
+
+class Vocabulario:
+    """
+    O DataFrame de vocabulário de um utilizador e os índices derivados dele: posição da linha por palavra,
+    datas de adição, matriz de progresso, pesos de sorteio, exercícios de cada palavra e fila de revisões.
+    Cada índice é construído na primeira utilização e refeito quando as linhas do DataFrame mudam.
+    """
+
+    def __init__(self, db_df):
+        self.db_df = db_df
+        self._indice = None
+        self._datas = None
+        self._matriz = None
+        self._pesos = None
+        self._exercicios = None
+        self._fila = None
+
+    @property
+    def indice_palavras(self):
+        """Mapa palavra -> posição da linha no DataFrame."""
+        if self._indice is None or not self.db_df.index.equals(self._indice[0]):
+            posicoes = {}
+            for pos, palavra in enumerate(self.db_df['palavra']):
+                posicoes.setdefault(palavra, pos)
+            self._indice = (self.db_df.index, posicoes)
+        return self._indice[1]
+
+    @property
+    def datas_adicao(self):
+        """Datas de adição em nanossegundos desde a época (UTC), com NaT como o mínimo de int64."""
+        if self._datas is None or not self.db_df.index.equals(self._datas[0]):
+            datas = pd.to_datetime(self.db_df['data_adicao'], errors='coerce', utc=True)
+            self._datas = (self.db_df.index, datas.to_numpy(dtype='datetime64[ns]').view(np.int64))
+        return self._datas[1]
+
+    @property
+    def matriz(self):
+        if self._matriz is None or not self._matriz.valida_para(self.db_df):
+            self._matriz = MatrizProgresso.construir(self.db_df)
+        return self._matriz
+
+    @property
+    def pesos(self):
+        """Peso de sorteio de cada linha (ver quiz_logic.calcular_pesos_da_matriz), refeito a cada novo dia."""
+        hoje = datetime.date.today()
+        if self._pesos is None or self._pesos[1] != hoje or not self.db_df.index.equals(self._pesos[0]):
+            self._pesos = (self.db_df.index, hoje, calcular_pesos_da_matriz(self.matriz, self.datas_adicao))
+        return self._pesos[2]
+
+    def atualizar_pesos(self, linhas):
+        """Recalcula os pesos das linhas cujo progresso mudou (o resto do cache fica como está)."""
+        if self._pesos is not None and len(linhas) and self.db_df.index.equals(self._pesos[0]):
+            self._pesos[2][linhas] = calcular_pesos_da_matriz(self.matriz, self.datas_adicao, linhas)
+
+    def exercicios(self, corpus):
+        """IndiceExercicios de todas as palavras com os exercícios ANKI e GPT do corpus (sem Cloze)."""
+        if self._exercicios is None or self._exercicios[0] is not corpus or not self._exercicios[1].valido_para(self.db_df):
+            indice = IndiceExercicios.construir(self.db_df, corpus['cartoes'], corpus['exercicios_por_palavra'])
+            self._exercicios = (corpus, indice)
+        return self._exercicios[1]
+
+    def fila(self, corpus):
+        """Fila de revisões (min-heap por vencimento) com os exercícios já agendados de cada palavra, exceto Cloze."""
+        if self._fila is None:
+            self._fila = FilaRevisao.construir(self.db_df, lambda palavra: exercicios_da_palavra(palavra, corpus))
+        return self._fila
+
+class ArmazenamentoMemoria:
+    """Armazenamento em memória com a mesma interface do ArmazenamentoFirestore (benchmarks e testes de carga)."""
+
+    def __init__(self):
+        self.palavras = {}
+        self.historico = {}
+        self.resumos_diarios = {}
+        self.documentos_gravados = 0
+
+    def gravar_palavras(self, df):
+        for registro in df.to_dict('records'):
+            self.palavras[registro['palavra']] = registro
+        self.documentos_gravados += len(df)
+
+    def carregar_historico(self):
+        return self.historico
+
+    def gravar_historico(self, historico):
+        self.historico = historico
+
+    def somar_resumo_diario(self, dia, valores):
+        resumo = self.resumos_diarios.setdefault(dia, {'data': dia})
+        for campo, valor in valores.items():
+            resumo[campo] = resumo.get(campo, 0) + valor
+
+def exercicios_da_palavra(palavra, corpus):
+    """Dicionário {id_exercicio: tipo} dos exercícios de uma palavra (sem Cloze)."""
+    return get_available_exercise_types_for_word(palavra, corpus['cartoes'], corpus['exercicios_por_palavra'])
+
+# --- Aplicação dos Resultados ao Vocabulário ---
+def registrar_agenda(vocab, corpus, linha, identificador_exercicio, tipo_exercicio, resultado):
+    """Atualiza o agendamento (SM-2) de um exercício da linha indicada e reagenda-o na fila de revisões."""
+    db_df = vocab.db_df
+    idx = db_df.index[linha]
+    agenda = db_df.at[idx, 'agenda']
+    if not isinstance(agenda, dict): agenda = {}
+    estado = atualizar_estado(agenda.get(identificador_exercicio), resultado == 'acerto')
+    agenda[identificador_exercicio] = empacotar_estado(estado)
+    db_df.at[idx, 'agenda'] = agenda
+    vocab.fila(corpus).agendar(db_df.at[idx, 'palavra'], identificador_exercicio, tipo_exercicio, estado['vencimento'])
+
+@rastrear()
+def aplicar_resultados(vocab, corpus, resultados):
+    """
+    Grava no vocabulário o progresso e o agendamento de cada resultado (palavra, resultado, id, tipo)
+    e desativa as palavras que ficaram com todos os exercícios acertados.
+    Devolve (posições das linhas alteradas, palavras desativadas).
+    """
+    db_df = vocab.db_df
+    matriz = vocab.matriz
+    indice_palavras = vocab.indice_palavras
+    linhas_atualizadas = set()
+
+    for palavra, resultado, identificador_exercicio, tipo_exercicio in resultados:
+        linha = indice_palavras.get(palavra)
+        if linha is None:
+            continue
+        idx = db_df.index[linha]
+        progresso = db_df.at[idx, 'progresso']
+        if not isinstance(progresso, dict): progresso = {}
+        progresso[identificador_exercicio] = resultado
+        db_df.at[idx, 'progresso'] = progresso
+        matriz.registrar(linha, identificador_exercicio, resultado)
+        linhas_atualizadas.add(linha)
+        registrar_agenda(vocab, corpus, linha, identificador_exercicio, tipo_exercicio, resultado)
+
+    # Desativa de uma vez as palavras atualizadas com todos os exercícios acertados
+    linhas_atualizadas = np.array(sorted(linhas_atualizadas), dtype=np.int64)
+    linhas = linhas_atualizadas[matriz.dominadas(linhas_atualizadas) & db_df['ativa'].to_numpy()[linhas_atualizadas]]
+    desativadas = []
+    if len(linhas):
+        db_df.iloc[linhas, db_df.columns.get_loc('mastery_count')] = db_df['mastery_count'].to_numpy()[linhas] + 1
+        db_df.iloc[linhas, db_df.columns.get_loc('ativa')] = False
+        desativadas = db_df['palavra'].iloc[linhas].tolist()
+    vocab.atualizar_pesos(linhas_atualizadas)
+    return linhas_atualizadas, desativadas
+
+def aplicar_agenda(vocab, corpus, resultados):
+    """Atualiza só o agendamento das revisões (Modo de Revisão). Devolve as posições das linhas alteradas."""
+    indice_palavras = vocab.indice_palavras
+    linhas_atualizadas = set()
+    for palavra, resultado, identificador_exercicio, tipo_exercicio in resultados:
+        linha = indice_palavras.get(palavra)
+        if linha is None:
+            continue
+        registrar_agenda(vocab, corpus, linha, identificador_exercicio, tipo_exercicio, resultado)
+        linhas_atualizadas.add(linha)
+    return np.array(sorted(linhas_atualizadas), dtype=np.int64)
+
+def reativar_palavras(vocab, palavras):
+    """Reativa palavras e zera o seu progresso, mantendo a contagem de domínio. Devolve (posições, palavras reativadas)."""
+    db_df = vocab.db_df
+    indice_palavras = vocab.indice_palavras
+    linhas, reativadas = [], []
+    for palavra in dict.fromkeys(palavras):
+        linha = indice_palavras.get(palavra)
+        if linha is None:
+            continue
+        progresso = db_df['progresso'].iat[linha]
+        if isinstance(progresso, dict):
+            for chave in progresso:
+                progresso[chave] = 'nao_testado'
+        linhas.append(linha)
+        reativadas.append(palavra)
+    if linhas:
+        db_df.iloc[linhas, db_df.columns.get_loc('ativa')] = True
+        vocab.matriz.reiniciar_linhas(linhas)
+        vocab.atualizar_pesos(linhas)
+    return np.array(linhas, dtype=np.int64), reativadas
+
+# --- API do Motor ---
+@rastrear()
+def start_quiz(vocab, corpus, modo, n=10, tipo_filtro="Random", repetir=False, palavra=None):
+    """
+    Monta a playlist de um quiz e devolve a QuizSession (ou None se não houver questões válidas).
+    `n` é o número de questões (ou de palavras, no modo 'gpt'); `palavra` é a palavra do modo 'focus'.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de quiz desconhecido: {modo}")
+    db_df = vocab.db_df
+    if modo == 'focus':
+        playlist = [
+            {'palavra': palavra, 'tipo_exercicio': tipo, 'identificador': identificador}
+            for identificador, tipo in exercicios_da_palavra(palavra, corpus).items()
+        ]
+        random.shuffle(playlist)
+    elif modo == 'gpt':
+        ativas = db_df[db_df['ativa'] == True]
+        playlist = selecionar_questoes_gpt(ativas, corpus['exercicios_por_palavra'], tipo_filtro, n, repetir, fila=vocab.fila(corpus))
+    else:
+        palavras = db_df[db_df['ativa'] == False] if modo == 'review' else db_df[db_df['ativa'] == True]
+        gpt_exercicios_map = {} if modo == 'anki' else corpus['exercicios_por_palavra']
+        playlist = selecionar_questoes_priorizadas(
+            palavras, corpus['cartoes'], gpt_exercicios_map, n, tipo_filtro, fila=vocab.fila(corpus),
+            exercicios=vocab.exercicios(corpus), pesos=vocab.pesos,
+        )
+    return QuizSession(playlist, modo) if playlist else None
+
+@rastrear()
+def next_question(sessao, vocab, corpus):
+    """
+    Devolve a questão corrente (tipo, pergunta, opções, índice da resposta, nível CEFR, id do exercício),
+    passando à seguinte se a corrente já foi respondida e saltando as que não se conseguem gerar.
+    Devolve None quando o quiz terminou.
+    """
+    if sessao.respondida:
+        sessao.avancar()
+    while not sessao.terminado:
+        questao = sessao.questao_atual(lambda item: gerar_questao(item, corpus, vocab.db_df))
+        if questao[1] and questao[2] and questao[3] is not None and questao[3] >= 0:
+            return questao
+        sessao.avancar()
+    return None
+
+def answer(sessao, resposta):
+    """Corrige a resposta da questão corrente. Devolve True se estiver certa."""
+    sessao.verificar(resposta)
+    return sessao.ultimo_resultado
+
+@rastrear()
+def finish(sessao, vocab, corpus, armazenamento):
+    """
+    Aplica os resultados ao vocabulário, grava só as linhas alteradas, o histórico e o resumo do dia, e devolve o resumo.
+    Chamadas repetidas (por exemplo, a cada rerun da página final) devolvem o mesmo resumo sem voltar a gravar.
+    """
+    if sessao.resumo is not None:
+        return sessao.resumo
+    resultados = sessao.resultados()
+    desativadas, reativadas = [], []
+    if sessao.modo == 'review':
+        linhas = aplicar_agenda(vocab, corpus, resultados)
+        linhas_reativadas, reativadas = reativar_palavras(vocab, sessao.erros())
+        linhas = np.union1d(linhas, linhas_reativadas)
+    else:
+        linhas, desativadas = aplicar_resultados(vocab, corpus, resultados)
+    if len(linhas):
+        armazenamento.gravar_palavras(vocab.db_df.iloc[linhas])
+
+    acertos, erros = sessao.acertos(), sessao.erros()
+    score = int(len(acertos) / sessao.total * 100) if sessao.total > 0 else 0
+    agora = datetime.datetime.now()
+    duracao_s = duracao_sessao(sessao.inicio, time.time(), len(resultados))
+    chave_historico = HISTORICO_POR_MODO.get(sessao.modo)
+    if chave_historico:
+        historico = armazenamento.carregar_historico()
+        historico.setdefault(chave_historico, []).append({
+            "data": agora.isoformat(),
+            "acertos": acertos, "erros": erros, "score": score, "total": sessao.total,
+            "duracao_s": round(duracao_s), "dominadas": len(desativadas)
+        })
+        armazenamento.gravar_historico(historico)
+
+    sessao.resumo = {
+        'acertos': acertos, 'erros': erros, 'score': score, 'total': sessao.total,
+        'desativadas': desativadas, 'reativadas': reativadas,
+    }
+    armazenamento.somar_resumo_diario(agora.date().isoformat(), resumo_diario_da_sessao(sessao.resumo, duracao_s))
+    return sessao.resumo
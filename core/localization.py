@@ -7,6 +7,7 @@ TRANSLATIONS = {
         "debug_mode_toggle": "🐞 Enable Debug Mode",
         "clear_cache_button": "🔄 Clear Cache & Reload Data",
         "cache_cleared_success": "Cache cleared successfully! Data will be reloaded.",
+        "warmup_in_progress": "⏳ Preparing data in the background ({done}/{total} steps)...",
         "progress_overview_header": "📊 Progress Overview",
         "practice_english_button": "Start Learning 🇨🇦",
         "practice_french_button": "Start Learning 🇫🇷",
@@ -114,6 +115,16 @@ TRANSLATIONS = {
         "import_log_header": "⚠️ Data Import Log",
         "import_log_warning": "Problems were found while reading the data files. The following lines/files were ignored:",
         "vocab_manager_header": "🗂️ Vocabulary Manager",
+        "trends_header": "📈 Learning Trends",
+        "trends_granularity": "Group by:",
+        "trends_by_day": "Day",
+        "trends_by_week": "Week",
+        "trends_by_month": "Month",
+        "trends_accuracy_title": "🎯 Accuracy (%)",
+        "trends_activity_title": "🗓️ Answers and study minutes",
+        "trends_totals_caption": "Last {days} days with activity: {answers} answers, {sessions} sessions, {masteries} words mastered, {reactivations} reactivated.",
+        "no_daily_stats": "No daily data yet. Finish a quiz, or rebuild the days from your quiz history.",
+        "rebuild_daily_stats_button": "🔁 Rebuild from history",
         "filter_by_source": "Filter by Source:",
         "filter_by_date": "Filter by Add Date:",
         "delete_filtered_button": "🗑️ Delete All Filtered",
@@ -127,6 +138,11 @@ TRANSLATIONS = {
         "col_status_help": "🏆 indicates the number of times the word has been mastered!",
         "save_active_status_button": "💾 Save 'Active' Status",
         "delete_selected_button": "🗑️ Delete Selected",
+        "deleted_words_header": "♻️ Deleted Words",
+        "deleted_words_select": "Words to restore (their progress starts from zero):",
+        "restore_words_button": "♻️ Restore Selected",
+        "restore_words_success": "{n} words restored.",
+        "no_deleted_words": "No deleted words.",
         "written_texts_log_header": "✍️ Written Texts Log",
         "cloze_texts_manager_header": "📝 Cloze Texts Manager",
         "danger_zone_header": "⚠️ Danger Zone",
@@ -192,6 +208,7 @@ TRANSLATIONS = {
         "debug_mode_toggle": "🐞 Activer le Mode de Débogage",
         "clear_cache_button": "🔄 Vider le Cache et Recharger",
         "cache_cleared_success": "Cache vidé avec succès ! Les données vont être rechargées.",
+        "warmup_in_progress": "⏳ Préparation des données en arrière-plan ({done}/{total} étapes)...",
         "progress_overview_header": "📊 Aperçu des Progrès",
         "practice_english_button": "Start Learning 🇨🇦",
         "practice_french_button": "Start Learning 🇫🇷",
@@ -299,6 +316,16 @@ TRANSLATIONS = {
         "import_log_header": "⚠️ Journal d'importation des données",
         "import_log_warning": "Des problèmes ont été détectés lors de la lecture des fichiers de données. Les lignes/fichiers suivants ont été ignorés :",
         "vocab_manager_header": "🗂️ Gestionnaire de vocabulaire",
+        "trends_header": "📈 Évolution de l'apprentissage",
+        "trends_granularity": "Regrouper par :",
+        "trends_by_day": "Jour",
+        "trends_by_week": "Semaine",
+        "trends_by_month": "Mois",
+        "trends_accuracy_title": "🎯 Précision (%)",
+        "trends_activity_title": "🗓️ Réponses et minutes d'étude",
+        "trends_totals_caption": "{days} derniers jours d'activité : {answers} réponses, {sessions} sessions, {masteries} mots maîtrisés, {reactivations} réactivés.",
+        "no_daily_stats": "Aucune donnée quotidienne pour l'instant. Terminez un quiz ou reconstruisez les jours à partir de votre historique.",
+        "rebuild_daily_stats_button": "🔁 Reconstruire depuis l'historique",
         "filter_by_source": "Filtrer par source :",
         "filter_by_date": "Filtrer par date d'ajout :",
         "delete_filtered_button": "🗑️ Supprimer tout ce qui est filtré",
@@ -312,6 +339,11 @@ TRANSLATIONS = {
         "col_status_help": "🏆 indique le nombre de fois que le mot a été maîtrisé !",
         "save_active_status_button": "💾 Enregistrer le statut 'Actif'",
         "delete_selected_button": "🗑️ Supprimer la sélection",
+        "deleted_words_header": "♻️ Mots supprimés",
+        "deleted_words_select": "Mots à restaurer (leur progrès repart de zéro) :",
+        "restore_words_button": "♻️ Restaurer la sélection",
+        "restore_words_success": "{n} mots restaurés.",
+        "no_deleted_words": "Aucun mot supprimé.",
         "written_texts_log_header": "✍️ Journal des textes écrits",
         "cloze_texts_manager_header": "📝 Gestionnaire de textes Cloze",
         "danger_zone_header": "⚠️ Zone de Danger",
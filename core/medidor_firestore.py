@@ -0,0 +1,264 @@
+import json
+import logging
+import datetime
+import threading
+import contextvars
+from collections import OrderedDict
+
+# --- Medidor de Operações do Firestore ---
+# ClienteMedido envolve o cliente do Firestore (o subconjunto da API usado em core.data_manager) e conta
+# as leituras, escritas e remoções de documentos como a faturação do Firestore, com os bytes lidos e
+# escritos estimados pelas regras de tamanho de armazenamento. Cada operação é somada à medição corrente
+# (uma visualização de página, iniciada por rerun com iniciar_medicao), aos totais da sessão por página
+# e aos totais do processo por página. A medição passa para outras threads com contextvars.copy_context().
+# Orçamentos opcionais por visualização de página escrevem um aviso no log quando são ultrapassados.
+# Não depende do Streamlit.
+
+log = logging.getLogger(__name__)
+CAMPOS_MEDICAO = ('leituras', 'escritas', 'remocoes', 'bytes_lidos', 'bytes_escritos')
+# Operações fora de um rerun (aquecimento, scripts de manutenção)
+SEM_SESSAO = "-"
+SEM_PAGINA = "-"
+# Sessões guardadas nos totais por sessão (as mais antigas saem primeiro)
+MAXIMO_SESSOES = 200
+# Tamanho fixo de cada documento nas regras do Firestore (sem contar o nome do documento)
+TAMANHO_BASE_DOCUMENTO = 32
+
+_medicao_atual = contextvars.ContextVar("medicao_firestore", default=None)
+_trava = threading.Lock()
+_por_pagina = {}
+_por_sessao = OrderedDict()
+# {campo: limite} por visualização de página; None ou ausente desativa o limite
+orcamentos = {}
+
+def _zeros():
+    return dict.fromkeys(CAMPOS_MEDICAO, 0)
+
+_TAMANHOS_FIXOS = {bool: 1, type(None): 1, int: 8, float: 8, datetime.datetime: 8}
+
+def _tamanho_texto(texto):
+    return (len(texto) if texto.isascii() else len(texto.encode('utf-8'))) + 1
+
+def tamanho_valor(valor):
+    """Bytes de um valor segundo as regras de tamanho de armazenamento do Firestore."""
+    # Os documentos do vocabulário são mapas de textos e mapas: esses casos não passam pela cadeia de isinstance
+    tipo = type(valor)
+    if tipo is str:
+        return _tamanho_texto(valor)
+    if tipo is dict:
+        total = 0
+        for chave, item in valor.items():
+            tipo_item = type(item)
+            total += _tamanho_texto(chave) + (_tamanho_texto(item) if tipo_item is str else _TAMANHOS_FIXOS.get(tipo_item) or tamanho_valor(item))
+        return total
+    if tipo in _TAMANHOS_FIXOS:
+        return _TAMANHOS_FIXOS[tipo]
+    if isinstance(valor, (list, tuple)):
+        return sum(tamanho_valor(item) for item in valor)
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor) + 1
+    if isinstance(valor, (int, float, datetime.datetime)):  # subclasses, como o DatetimeWithNanoseconds do Firestore
+        return 8
+    if isinstance(valor, dict):
+        return sum(_tamanho_texto(chave) + tamanho_valor(item) for chave, item in valor.items())
+    # Increment, ArrayUnion, SERVER_TIMESTAMP e outros sentinelas: os valores que levam (ou um número)
+    valores = getattr(valor, 'values', None)
+    return tamanho_valor(list(valores)) if isinstance(valores, (list, tuple)) else 8
+
+def tamanho_documento(dados):
+    return TAMANHO_BASE_DOCUMENTO + tamanho_valor(dados or {})
+
+class Medicao:
+    """Operações de uma visualização de página."""
+
+    def __init__(self, sessao, pagina):
+        self.sessao = sessao
+        self.pagina = pagina
+        self.contagem = _zeros()
+        self.avisos = set()
+
+def iniciar_medicao(sessao, pagina):
+    """Começa a medição de uma visualização de página na thread corrente e devolve-a."""
+    medicao = Medicao(sessao, pagina)
+    _medicao_atual.set(medicao)
+    return medicao
+
+def medicao_atual():
+    return _medicao_atual.get()
+
+def registrar(campo, quantidade):
+    """Soma `quantidade` ao campo na medição corrente e nos totais da sessão e do processo."""
+    if not quantidade:
+        return
+    medicao = _medicao_atual.get()
+    sessao, pagina = (medicao.sessao, medicao.pagina) if medicao else (SEM_SESSAO, SEM_PAGINA)
+    with _trava:
+        _por_pagina.setdefault(pagina, _zeros())[campo] += quantidade
+        if sessao not in _por_sessao:
+            _por_sessao[sessao] = {}
+            if len(_por_sessao) > MAXIMO_SESSOES:
+                _por_sessao.popitem(last=False)
+        _por_sessao[sessao].setdefault(pagina, _zeros())[campo] += quantidade
+        if medicao is None:
+            return
+        medicao.contagem[campo] += quantidade
+        limite = orcamentos.get(campo)
+        ultrapassou = limite is not None and medicao.contagem[campo] > limite and campo not in medicao.avisos
+        if ultrapassou:
+            medicao.avisos.add(campo)
+    if ultrapassou:
+        log.warning("Orçamento do Firestore ultrapassado: campo=%s limite=%d pagina=%s sessao=%s",
+                    campo, limite, pagina, sessao)
+
+def totais_por_pagina():
+    """{página: {campo: total}} do processo."""
+    with _trava:
+        return {pagina: dict(valores) for pagina, valores in _por_pagina.items()}
+
+def totais_da_sessao(sessao):
+    """{página: {campo: total}} de uma sessão."""
+    with _trava:
+        return {pagina: dict(valores) for pagina, valores in _por_sessao.get(sessao, {}).items()}
+
+def exportar_json():
+    """Totais por página e por sessão, em JSON."""
+    with _trava:
+        dados = {'por_pagina': _por_pagina, 'por_sessao': _por_sessao}
+        return json.dumps(dados, ensure_ascii=False, indent=2)
+
+def exportar_prometheus():
+    """Totais do processo por página no formato de texto do Prometheus (um contador por campo)."""
+    linhas = []
+    totais = totais_por_pagina()
+    for campo in CAMPOS_MEDICAO:
+        nome = f"firestore_{campo}_total"
+        linhas.append(f"# TYPE {nome} counter")
+        for pagina, valores in sorted(totais.items()):
+            rotulo = pagina.replace('\\', '\\\\').replace('"', '\\"')
+            linhas.append(f'{nome}{{pagina="{rotulo}"}} {valores[campo]}')
+    return "\n".join(linhas) + "\n"
+
+# --- Envoltórios do Cliente ---
+def _contar_leitura(snapshot):
+    registrar('leituras', 1)
+    return _SnapshotMedido(snapshot)
+
+def _contar_consulta(snapshots):
+    """Lê o resultado de uma consulta; como na faturação, uma consulta sem resultados conta uma leitura."""
+    snapshots = [_SnapshotMedido(snapshot) for snapshot in snapshots]
+    registrar('leituras', max(1, len(snapshots)))
+    return snapshots
+
+class _SnapshotMedido:
+    """Snapshot cujos bytes são contados quando os dados são pedidos (to_dict)."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def to_dict(self):
+        dados = self._snapshot.to_dict()
+        registrar('bytes_lidos', tamanho_documento(dados) if dados is not None else 0)
+        return dados
+
+    def __getattr__(self, nome):
+        return getattr(self._snapshot, nome)
+
+class _DocumentoMedido:
+    def __init__(self, ref):
+        self._ref = ref
+
+    def get(self, *args, **kwargs):
+        return _contar_leitura(self._ref.get(*args, **kwargs))
+
+    def set(self, dados, merge=False):
+        resultado = self._ref.set(dados, merge=merge)
+        registrar('escritas', 1)
+        registrar('bytes_escritos', tamanho_documento(dados))
+        return resultado
+
+    def update(self, dados):
+        resultado = self._ref.update(dados)
+        registrar('escritas', 1)
+        registrar('bytes_escritos', tamanho_documento(dados))
+        return resultado
+
+    def delete(self):
+        resultado = self._ref.delete()
+        registrar('remocoes', 1)
+        return resultado
+
+    def collection(self, nome):
+        return _ColecaoMedida(self._ref.collection(nome))
+
+    def __getattr__(self, nome):
+        return getattr(self._ref, nome)
+
+class _ColecaoMedida:
+    """Coleção ou consulta: as consultas derivadas (order_by, where, limit) continuam medidas."""
+
+    def __init__(self, consulta):
+        self._consulta = consulta
+
+    def document(self, *args):
+        return _DocumentoMedido(self._consulta.document(*args))
+
+    def stream(self, *args, **kwargs):
+        return iter(_contar_consulta(self._consulta.stream(*args, **kwargs)))
+
+    def get(self, *args, **kwargs):
+        return _contar_consulta(self._consulta.get(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs):
+        return _ColecaoMedida(self._consulta.order_by(*args, **kwargs))
+
+    def where(self, *args, **kwargs):
+        return _ColecaoMedida(self._consulta.where(*args, **kwargs))
+
+    def limit(self, *args, **kwargs):
+        return _ColecaoMedida(self._consulta.limit(*args, **kwargs))
+
+    def __getattr__(self, nome):
+        return getattr(self._consulta, nome)
+
+class _LoteMedido:
+    """Lote de escritas: as operações só contam no commit, quando são enviadas."""
+
+    def __init__(self, lote):
+        self._lote = lote
+        self._pendentes = _zeros()
+
+    def set(self, doc_ref, dados, merge=False):
+        self._lote.set(doc_ref._ref, dados, merge=merge)
+        self._pendentes['escritas'] += 1
+        self._pendentes['bytes_escritos'] += tamanho_documento(dados)
+
+    def update(self, doc_ref, dados):
+        self._lote.update(doc_ref._ref, dados)
+        self._pendentes['escritas'] += 1
+        self._pendentes['bytes_escritos'] += tamanho_documento(dados)
+
+    def delete(self, doc_ref):
+        self._lote.delete(doc_ref._ref)
+        self._pendentes['remocoes'] += 1
+
+    def commit(self):
+        resultado = self._lote.commit()
+        for campo, quantidade in self._pendentes.items():
+            registrar(campo, quantidade)
+        self._pendentes = _zeros()
+        return resultado
+
+class ClienteMedido:
+    """Cliente do Firestore com as operações contadas (ver o cabeçalho do módulo)."""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    def collection(self, nome):
+        return _ColecaoMedida(self.cliente.collection(nome))
+
+    def batch(self):
+        return _LoteMedido(self.cliente.batch())
+
+    def __getattr__(self, nome):
+        return getattr(self.cliente, nome)
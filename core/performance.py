@@ -0,0 +1,225 @@
+import heapq
+import datetime
+from collections import Counter
+import numpy as np
+import pandas as pd
+from core.rastreio import rastrear
+
+# --- Resumo de Desempenho ---
+# Os totais do histórico (acertos, erros, sessões e erros por palavra) ficam materializados num
+# ResumoHistorico, atualizado a cada sessão gravada; o que depende do vocabulário é calculado de forma
+# vetorizada a partir da matriz de progresso e das datas de adição em cache no Vocabulario.
+# Assim o tempo de renderização dos painéis não depende do tamanho do histórico.
+CHAVES_HISTORICO = ("quiz", "gpt_quiz", "mixed_quiz")
+LIMITES_PROGRESSO = [0, 25, 50, 75, 101]
+ROTULOS_PROGRESSO = ['Não Iniciado', '1-25%', '26-50%', '51-75%', '76-100%']
+# Os painéis mostram o pódio e, no expander, o resto do ranking até esta posição
+TAMANHO_RANKING = 10
+
+class LideresContagem:
+    """
+    Candidatos ao topo de um contador que só cresce, com no máximo `capacidade` entradas.
+    A ordem é (contagem decrescente, chave). Invariante: qualquer chave fora dos candidatos vem depois
+    do último candidato nessa ordem, então os k primeiros candidatos aceites por um filtro são o
+    verdadeiro top-k, desde que haja pelo menos k.
+    """
+
+    def __init__(self, contador, capacidade):
+        self.contador = contador
+        self.capacidade = capacidade
+        self.candidatos = {}
+        self.truncado = False
+
+    @staticmethod
+    def _ordem(item):
+        return (-item[1], item[0])
+
+    def incrementar(self, chave):
+        contagem = self.contador[chave]
+        if chave in self.candidatos or len(self.candidatos) < self.capacidade:
+            self.candidatos[chave] = contagem
+            return
+        ultimo = max(self.candidatos.items(), key=self._ordem)
+        if self._ordem((chave, contagem)) < self._ordem(ultimo):
+            del self.candidatos[ultimo[0]]
+            self.candidatos[chave] = contagem
+        self.truncado = True
+
+    def maiores(self, k, aceitar):
+        """Os k pares (chave, contagem) com maior contagem entre as chaves aceites, por ordem decrescente."""
+        lideres = sorted(((c, n) for c, n in self.candidatos.items() if aceitar(c)), key=self._ordem)
+        if len(lideres) < k and self.truncado:
+            # Poucos candidatos passam no filtro (ex.: palavras desativadas): procura no contador completo
+            return heapq.nsmallest(k, ((c, n) for c, n in self.contador.items() if aceitar(c)), key=self._ordem)
+        return lideres[:k]
+
+class ResumoHistorico:
+    """Totais do histórico de quizzes, mantidos de forma incremental."""
+
+    def __init__(self):
+        self.acertos = 0
+        self.erros = 0
+        self.sessoes = 0
+        self.erros_por_palavra = Counter()
+        self.lideres_erros = LideresContagem(self.erros_por_palavra, 4 * TAMANHO_RANKING)
+        self.contagens = {chave: 0 for chave in CHAVES_HISTORICO}
+
+    @classmethod
+    def construir(cls, historico):
+        resumo = cls()
+        resumo.sincronizar(historico)
+        return resumo
+
+    def registrar_sessao(self, sessao):
+        """Soma uma sessão do histórico ({'acertos': [...], 'erros': [...], ...}) aos totais."""
+        self.acertos += len(sessao.get("acertos", []))
+        self.erros += len(sessao.get("erros", []))
+        self.sessoes += 1
+        for palavra in sessao.get("erros", []):
+            self.erros_por_palavra[palavra] += 1
+            self.lideres_erros.incrementar(palavra)
+
+    def sincronizar(self, historico):
+        """
+        Acompanha o histórico gravado: as sessões acrescentadas no fim das listas são somadas aos totais.
+        Se alguma lista encolheu (histórico editado ou limpo), os totais são refeitos.
+        """
+        if any(len(historico.get(chave, [])) < self.contagens[chave] for chave in CHAVES_HISTORICO):
+            self.__init__()
+        for chave in CHAVES_HISTORICO:
+            sessoes = historico.get(chave, [])
+            for sessao in sessoes[self.contagens[chave]:]:
+                self.registrar_sessao(sessao)
+            self.contagens[chave] = len(sessoes)
+
+    def kpis(self):
+        total_testes = self.acertos + self.erros
+        divida_estudo = (self.erros * 3) - self.acertos
+        if divida_estudo <= 0:
+            status_estudo = "Excelente!"; progresso_divida = 1.0; divida_estudo = 0
+        else:
+            status_estudo = "Atenção Necessária"; progresso_divida = self.acertos / (self.erros * 3) if self.erros > 0 else 1.0
+        return {
+            'precisao': f"{(self.acertos / total_testes * 100):.1f}%" if total_testes > 0 else "N/A",
+            'sessoes': self.sessoes, 'status_estudo': status_estudo,
+            'divida_estudo': divida_estudo, 'progresso_divida': progresso_divida,
+        }
+
+# --- Agregados vetorizados do vocabulário ---
+def kpis_vocabulario(db_df):
+    ativa = db_df['ativa'].to_numpy(dtype=bool)
+    fonte = db_df['fonte'].to_numpy(dtype=object)
+    return {
+        'total': len(db_df), 'ativas': int(ativa.sum()), 'inativas': int((~ativa).sum()),
+        'anki': int((fonte == 'ANKI').sum()), 'gpt': int((fonte == 'GPT').sum()),
+    }
+
+def distribuicao_progresso(percentuais):
+    """Número de palavras por faixa de progresso (as faixas de ROTULOS_PROGRESSO, fechadas à direita)."""
+    faixas = np.searchsorted(LIMITES_PROGRESSO, percentuais, side='left')
+    contagens = np.bincount(faixas[faixas < len(LIMITES_PROGRESSO)], minlength=len(LIMITES_PROGRESSO))
+    return pd.Series(contagens, index=pd.Index(ROTULOS_PROGRESSO, name='progress_bin'), name='count')
+
+def dias_desde(datas_ns, agora=None):
+    """Dias completos entre cada data (ns desde a época, UTC; NaT como o mínimo de int64) e agora."""
+    agora = agora or datetime.datetime.now(datetime.timezone.utc)
+    agora_ns = int(agora.timestamp() * 1e9)
+    return (agora_ns - datas_ns) // (86400 * 10**9)
+
+@rastrear()
+def resumir_desempenho(vocab, resumo_historico, agora=None):
+    """Resumo usado pelo painel inicial e pela página de estatísticas (mesmo formato de get_performance_summary)."""
+    db_df = vocab.db_df
+    percentuais = vocab.matriz.percentuais()
+    dominadas = int((percentuais >= 100).sum())
+
+    ativa = db_df['ativa'].to_numpy(dtype=bool)
+    datas_ns = vocab.datas_adicao
+    com_data = ativa & (datas_ns != np.iinfo(np.int64).min)
+    dias = dias_desde(datas_ns, agora)
+    palavras = db_df['palavra'].to_numpy(dtype=object)
+
+    # Rankings: só os TAMANHO_RANKING primeiros, sem ordenar o vocabulário inteiro
+    indice_palavras = vocab.indice_palavras
+    def ativa_com_data(palavra):
+        linha = indice_palavras.get(palavra)
+        return linha is not None and com_data[linha]
+    ranked_errors = [
+        (palavra, contagem, int(dias[indice_palavras[palavra]]))
+        for palavra, contagem in resumo_historico.lideres_erros.maiores(TAMANHO_RANKING, ativa_com_data)
+    ]
+
+    linhas = np.flatnonzero(com_data)
+    if len(linhas) > TAMANHO_RANKING:
+        linhas = linhas[np.argpartition(datas_ns[linhas], TAMANHO_RANKING)[:TAMANHO_RANKING]]
+    linhas = linhas[np.lexsort((linhas, datas_ns[linhas]))]
+    age_ranking = list(zip(palavras[linhas].tolist(), dias[linhas].tolist()))
+
+    return {
+        "db_kpis": kpis_vocabulario(db_df),
+        "kpis": resumo_historico.kpis(),
+        "pie_data": {'Dominado': dominadas, 'Em Progresso': len(db_df) - dominadas},
+        "distribution_data": distribuicao_progresso(percentuais),
+        "error_ranking": ranked_errors,
+        "age_ranking": age_ranking,
+    }
+
+# --- Resumos Diários ---
+# Um documento por dia e por idioma com os totais das sessões desse dia, somados no fim de cada quiz.
+# As sessões do histórico guardam a duração e as palavras dominadas, para os resumos poderem ser
+# refeitos em lote; revisão e foco não entram no histórico, por isso só contam nos resumos gravados ao vivo.
+CAMPOS_DIARIOS = ('respostas', 'acertos', 'sessoes', 'dominadas', 'reativadas', 'minutos')
+CAMPOS_DO_HISTORICO = ('respostas', 'acertos', 'sessoes', 'dominadas', 'minutos')
+# Uma aba esquecida aberta não deve contar como horas de estudo
+LIMITE_SEGUNDOS_POR_RESPOSTA = 300
+
+def duracao_sessao(inicio, fim, respostas):
+    """Segundos entre o início e o fim de um quiz, limitados a LIMITE_SEGUNDOS_POR_RESPOSTA por resposta."""
+    return max(0.0, min(fim - inicio, LIMITE_SEGUNDOS_POR_RESPOSTA * max(respostas, 1)))
+
+def resumo_diario_da_sessao(resumo, duracao_s):
+    """Valores que uma sessão terminada (o resumo devolvido por engine.finish) soma ao resumo do dia."""
+    return {
+        'respostas': len(resumo['acertos']) + len(resumo['erros']),
+        'acertos': len(resumo['acertos']),
+        'sessoes': 1,
+        'dominadas': len(resumo['desativadas']),
+        'reativadas': len(resumo['reativadas']),
+        'minutos': round(duracao_s / 60, 2),
+    }
+
+def agregar_historico_por_dia(historico):
+    """Resumos diários ({'AAAA-MM-DD': {campo: valor}}) recalculados a partir das sessões do histórico."""
+    dias = {}
+    for chave in CHAVES_HISTORICO:
+        for sessao in historico.get(chave, []):
+            try:
+                dia = datetime.datetime.fromisoformat(sessao["data"]).date().isoformat()
+            except (KeyError, TypeError, ValueError):
+                continue
+            valores = dias.setdefault(dia, dict.fromkeys(CAMPOS_DO_HISTORICO, 0))
+            acertos = len(sessao.get("acertos", []))
+            valores['respostas'] += acertos + len(sessao.get("erros", []))
+            valores['acertos'] += acertos
+            valores['sessoes'] += 1
+            valores['dominadas'] += sessao.get("dominadas", 0)
+            valores['minutos'] += sessao.get("duracao_s", 0) / 60
+    for valores in dias.values():
+        valores['minutos'] = round(valores['minutos'], 2)
+    return dias
+
+def _com_precisao(df):
+    df['precisao'] = (df['acertos'] / df['respostas'].where(df['respostas'] > 0) * 100).round(1)
+    return df
+
+def serie_diaria(documentos):
+    """DataFrame indexado pelo dia, com os CAMPOS_DIARIOS e a precisão (%), a partir dos documentos diários."""
+    df = pd.DataFrame(documentos, columns=['data', *CAMPOS_DIARIOS])
+    df[list(CAMPOS_DIARIOS)] = df[list(CAMPOS_DIARIOS)].fillna(0)
+    df.index = pd.to_datetime(df.pop('data'))
+    return _com_precisao(df.sort_index())
+
+def agrupar_serie(serie, periodo):
+    """Soma a série diária por período ('D', 'W' ou 'M'; semanas de segunda a domingo) e recalcula a precisão."""
+    regra = {'D': 'D', 'W': 'W-MON', 'M': 'MS'}[periodo]
+    return _com_precisao(serie[list(CAMPOS_DIARIOS)].resample(regra, closed='left', label='left').sum())
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+# --- Matriz de Progresso (formato longo e colunar) ---
+# Cada entrada é um par (palavra, exercício): posição da linha no vocabulário, posição do identificador
+# do exercício e o status codificado em int8. Os dicionários 'progresso' continuam a ser a vista persistida.
+STATUS_NAO_TESTADO = 0
+STATUS_ERRO = 1
+STATUS_ACERTO = 2
+CODIGOS_STATUS = {'nao_testado': STATUS_NAO_TESTADO, 'erro': STATUS_ERRO, 'acerto': STATUS_ACERTO}
+NOMES_STATUS = ('nao_testado', 'erro', 'acerto')
+
+class MatrizProgresso:
+    """
+    Progresso do vocabulário em três arrays paralelos (linha, exercício, status).
+    Domínio, percentagens e agregados por tipo são contagens com np.bincount sobre estes arrays.
+    """
+
+    def __init__(self, indice, ids, linha, exercicio, status):
+        self.indice = indice
+        self.ids = ids
+        self.linha = linha
+        self.exercicio = exercicio
+        self.status = status
+        self._pos_id = {id_ex: pos for pos, id_ex in enumerate(ids)}
+        self._entradas = None
+        self._contagens = None
+
+    @classmethod
+    def construir(cls, db_df):
+        """Converte a coluna 'progresso' (um dicionário por palavra) para o formato colunar, numa única passagem."""
+        ids, pos_id = [], {}
+        linhas, exercicios, status = [], [], []
+        for linha, progresso in enumerate(db_df['progresso']):
+            if not isinstance(progresso, dict):
+                continue
+            for id_ex, valor in progresso.items():
+                pos = pos_id.get(id_ex)
+                if pos is None:
+                    pos = pos_id[id_ex] = len(ids)
+                    ids.append(id_ex)
+                linhas.append(linha)
+                exercicios.append(pos)
+                status.append(CODIGOS_STATUS.get(valor, STATUS_NAO_TESTADO))
+        return cls(
+            db_df.index, ids,
+            np.array(linhas, dtype=np.int32),
+            np.array(exercicios, dtype=np.int32),
+            np.array(status, dtype=np.int8),
+        )
+
+    @property
+    def n_linhas(self):
+        return len(self.indice)
+
+    def valida_para(self, db_df):
+        """Indica se a matriz ainda corresponde às linhas de `db_df` (palavras apagadas ou recarregadas invalidam-na)."""
+        return len(db_df) == self.n_linhas and db_df.index.equals(self.indice)
+
+    # --- Agregados vetorizados ---
+    def _contar(self):
+        """Totais, acertos e erros por linha, calculados uma vez e mantidos pelas atualizações seguintes."""
+        if self._contagens is None:
+            self._contagens = (
+                np.bincount(self.linha, minlength=self.n_linhas),
+                np.bincount(self.linha[self.status == STATUS_ACERTO], minlength=self.n_linhas),
+                np.bincount(self.linha[self.status == STATUS_ERRO], minlength=self.n_linhas),
+            )
+        return self._contagens
+
+    def totais(self):
+        return self._contar()[0]
+
+    def acertos(self):
+        return self._contar()[1]
+
+    def erros(self):
+        return self._contar()[2]
+
+    def percentuais(self):
+        """Percentagem de exercícios acertados por linha (0 para palavras sem exercícios)."""
+        totais = self.totais()
+        percentuais = np.zeros(self.n_linhas)
+        np.divide(self.acertos() * 100.0, totais, out=percentuais, where=totais > 0)
+        return percentuais
+
+    def dominadas(self, linhas=None):
+        """Máscara booleana das linhas (todas, ou só as indicadas) com todos os exercícios acertados."""
+        totais, acertos, _ = self._contar()
+        if linhas is not None:
+            totais, acertos = totais[linhas], acertos[linhas]
+        return (totais > 0) & (acertos == totais)
+
+    def percentuais_por_tipo(self, id_para_tipo, tipos):
+        """
+        Matriz (linhas x tipos) com a percentagem de acertos de cada tipo de exercício.
+        NaN quando a palavra não tem exercícios do tipo.
+        """
+        tipos = list(tipos)
+        n_tipos = len(tipos)
+        pos_tipo = {tipo: pos for pos, tipo in enumerate(tipos)}
+        tipo_do_exercicio = np.array([pos_tipo.get(id_para_tipo.get(id_ex), -1) for id_ex in self.ids] or [-1], dtype=np.int32)
+        tipo_entrada = tipo_do_exercicio[self.exercicio]
+        validas = tipo_entrada >= 0
+        chaves = self.linha[validas].astype(np.int64) * n_tipos + tipo_entrada[validas]
+        tamanho = self.n_linhas * n_tipos
+        totais = np.bincount(chaves, minlength=tamanho).reshape(self.n_linhas, n_tipos)
+        acertos = np.bincount(chaves[self.status[validas] == STATUS_ACERTO], minlength=tamanho).reshape(self.n_linhas, n_tipos)
+        percentuais = np.full((self.n_linhas, n_tipos), np.nan)
+        np.divide(acertos * 100.0, totais, out=percentuais, where=totais > 0)
+        return pd.DataFrame(percentuais, index=self.indice, columns=tipos)
+
+    # --- Atualizações ---
+    def registrar(self, linha, id_ex, status):
+        """Grava o status de um exercício de uma linha, acrescentando a entrada se ainda não existir."""
+        if self._entradas is None:
+            self._entradas = {(int(l), int(e)): pos for pos, (l, e) in enumerate(zip(self.linha, self.exercicio))}
+        pos_ex = self._pos_id.get(id_ex)
+        if pos_ex is None:
+            pos_ex = self._pos_id[id_ex] = len(self.ids)
+            self.ids.append(id_ex)
+        codigo = CODIGOS_STATUS.get(status, STATUS_NAO_TESTADO)
+        totais, acertos, erros = self._contar()
+        acertos[linha] += int(codigo == STATUS_ACERTO)
+        erros[linha] += int(codigo == STATUS_ERRO)
+        pos = self._entradas.get((linha, pos_ex))
+        if pos is not None:
+            acertos[linha] -= int(self.status[pos] == STATUS_ACERTO)
+            erros[linha] -= int(self.status[pos] == STATUS_ERRO)
+            self.status[pos] = codigo
+            return
+        totais[linha] += 1
+        self._entradas[(linha, pos_ex)] = len(self.status)
+        self.linha = np.append(self.linha, np.int32(linha))
+        self.exercicio = np.append(self.exercicio, np.int32(pos_ex))
+        self.status = np.append(self.status, np.int8(codigo))
+
+    def reiniciar_linhas(self, linhas):
+        """Marca como 'nao_testado' todos os exercícios das linhas indicadas."""
+        self.status[np.isin(self.linha, linhas)] = STATUS_NAO_TESTADO
+        _, acertos, erros = self._contar()
+        acertos[linhas] = 0
+        erros[linhas] = 0
+
+    def para_dicionario(self, linha):
+        """Vista {id_exercicio: status} de uma linha, no formato guardado no Firestore."""
+        entradas = np.flatnonzero(self.linha == linha)
+        return {self.ids[self.exercicio[pos]]: NOMES_STATUS[self.status[pos]] for pos in entradas}
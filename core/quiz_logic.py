@@ -1,156 +1,310 @@
 import random
-from collections import defaultdict
-from core.data_manager import TIPOS_EXERCICIO_ANKI, get_available_exercise_types_for_word
-import re
+import numpy as np
+import pandas as pd
+from core.corpus import TIPOS_EXERCICIO_ANKI, get_available_exercise_types_for_word, amostrar_distratores
+from core.rastreio import rastrear
 
-def selecionar_questoes_priorizadas(palavras_ativas, flashcards_map, gpt_exercicios_map, N, tipo_filtro="Random"):
+# Pesos usados no sorteio priorizado das palavras (ver calcular_pesos_prioridade).
+PESO_ERROS = 1.0
+PESO_PENDENTE = 2.0
+PESO_IDADE = 1.0
+IDADE_MAXIMA_DIAS = 365
+NANOSSEGUNDOS_POR_DIA = 86_400 * 10**9
+NAT_NS = np.iinfo(np.int64).min
+
+def calcular_pesos_prioridade(palavras):
+    """
+    Calcula o peso de sorteio de cada palavra a partir do número de erros no progresso,
+    da fração de exercícios ainda não acertados e dos dias desde 'data_adicao'.
+    Todas as palavras recebem peso >= 1, para que nenhuma fique de fora do sorteio.
+    """
+    progressos = palavras['progresso'].tolist()
+    erros = np.fromiter(
+        (sum(1 for status in p.values() if status == 'erro') if isinstance(p, dict) else 0 for p in progressos),
+        dtype=float, count=len(progressos)
+    )
+    pendentes = np.fromiter(
+        ((sum(1 for status in p.values() if status != 'acerto') / len(p)) if isinstance(p, dict) and p else 1.0 for p in progressos),
+        dtype=float, count=len(progressos)
+    )
+    datas = pd.to_datetime(palavras['data_adicao'], errors='coerce', utc=True)
+    dias = (pd.Timestamp.now(tz='UTC') - datas).dt.days.fillna(0).clip(lower=0, upper=IDADE_MAXIMA_DIAS).to_numpy(dtype=float)
+    return 1.0 + PESO_ERROS * erros + PESO_PENDENTE * pendentes + PESO_IDADE * dias / IDADE_MAXIMA_DIAS
+
+def calcular_pesos_da_matriz(matriz, datas_adicao, linhas=None):
+    """
+    Os mesmos pesos de calcular_pesos_prioridade, tirados das contagens da MatrizProgresso e das datas de
+    adição em nanossegundos (Vocabulario.datas_adicao), para todas as linhas ou só para as indicadas.
+    """
+    totais, acertos, erros = matriz.totais(), matriz.acertos(), matriz.erros()
+    if linhas is not None:
+        totais, acertos, erros, datas_adicao = totais[linhas], acertos[linhas], erros[linhas], datas_adicao[linhas]
+    pendentes = np.ones(len(totais))
+    np.divide(totais - acertos, totais, out=pendentes, where=totais > 0)
+    dias = (pd.Timestamp.now(tz='UTC').value - datas_adicao) // NANOSSEGUNDOS_POR_DIA
+    dias = np.where(datas_adicao == NAT_NS, 0, dias).clip(0, IDADE_MAXIMA_DIAS).astype(float)
+    return 1.0 + PESO_ERROS * erros + PESO_PENDENTE * pendentes + PESO_IDADE * dias / IDADE_MAXIMA_DIAS
+
+class IndiceExercicios:
+    """
+    Exercícios de um conjunto de palavras em arrays paralelos, uma entrada por (palavra, exercício) pela ordem
+    das linhas: posição da linha, identificador, tipo e se é um exercício ANKI. Palavras repetidas só contam
+    na primeira linha. O Vocabulario guarda o índice de todas as suas palavras (ver core.engine).
+    """
+
+    def __init__(self, indice, posicoes_palavras, linha, ids, tipos):
+        self.indice = indice
+        self.posicoes_palavras = posicoes_palavras
+        self.linha = linha
+        self.ids = ids
+        self.tipos = tipos
+        self.anki = np.fromiter((tipo in TIPOS_EXERCICIO_ANKI for tipo in tipos), dtype=bool, count=len(tipos))
+
+    @classmethod
+    def construir(cls, palavras, flashcards_map, gpt_exercicios_map):
+        """Índice das linhas do DataFrame `palavras` com os exercícios de `flashcards_map` e `gpt_exercicios_map`."""
+        posicoes_palavras, linhas, ids, tipos = {}, [], [], []
+        for linha, palavra in enumerate(palavras['palavra']):
+            if palavra in posicoes_palavras:
+                continue
+            posicoes_palavras[palavra] = linha
+            for id_ex, tipo in get_available_exercise_types_for_word(palavra, flashcards_map, gpt_exercicios_map).items():
+                linhas.append(linha)
+                ids.append(id_ex)
+                tipos.append(tipo)
+        return cls(
+            palavras.index, posicoes_palavras, np.array(linhas, dtype=np.int64),
+            np.array(ids, dtype=object), np.array(tipos, dtype=object),
+        )
+
+    def valido_para(self, db_df):
+        return db_df.index.equals(self.indice)
+
+    def posicoes(self, palavras):
+        """Posição no índice de cada linha do DataFrame `palavras` (um subconjunto das linhas indexadas)."""
+        return self.indice.get_indexer(palavras.index)
+
+@rastrear()
+def selecionar_questoes_priorizadas(palavras_ativas, flashcards_map, gpt_exercicios_map, N, tipo_filtro="Random", fila=None,
+                                    exercicios=None, pesos=None):
     """
     Cria uma lista de questões para o quiz, garantindo a máxima diversidade de palavras.
+    Se uma fila de revisões for passada, os exercícios vencidos saem primeiro dela;
+    as vagas restantes são preenchidas sorteando palavras de uma só vez, sem reposição, com pesos de prioridade.
+    `exercicios` (IndiceExercicios) e `pesos` (um peso por linha do índice) podem vir já calculados sobre um
+    DataFrame de que `palavras_ativas` é um subconjunto; sem eles são calculados sobre `palavras_ativas`.
+    Um mapa de fonte vazio (ex.: o Quiz ANKI não recebe exercícios GPT) exclui os exercícios dessa fonte.
     """
     if palavras_ativas.empty:
         return []
 
-    # --- NOVA LÓGICA DE SELEÇÃO ---
+    playlist = []
+    if fila is not None:
+        palavras_permitidas = set(palavras_ativas['palavra'])
+        def aceitar(palavra, id_ex, tipo):
+            # O exercício precisa vir de uma das fontes passadas (ex.: o Quiz ANKI não recebe exercícios GPT)
+            fonte_map = flashcards_map if tipo in TIPOS_EXERCICIO_ANKI else gpt_exercicios_map
+            return palavra in palavras_permitidas and palavra in fonte_map and (tipo_filtro == "Random" or tipo == tipo_filtro)
+        vencidos = fila.retirar_vencidos(N, aceitar=aceitar)
+        playlist = [{'palavra': palavra, 'tipo_exercicio': tipo, 'identificador': id_ex} for palavra, id_ex, tipo in vencidos]
+        if len(playlist) >= N:
+            random.shuffle(playlist)
+            return playlist
+        N -= len(playlist)
 
-    # 1. Seleciona N palavras únicas para garantir a diversidade.
-    palavras_disponiveis = palavras_ativas.sample(frac=1) # Embaralha para não pegar sempre as mesmas
-    palavras_selecionadas = palavras_disponiveis.head(N)
+    rng = np.random.default_rng()
+    if exercicios is None:
+        exercicios = IndiceExercicios.construir(palavras_ativas, flashcards_map, gpt_exercicios_map)
+        pesos = calcular_pesos_prioridade(palavras_ativas)
 
-    playlist = []
-    for _, palavra_info in palavras_selecionadas.iterrows():
-        palavra = palavra_info['palavra']
-        progresso = palavra_info.get('progresso', {})
-        
-        # 2. Para cada palavra, obtém todos os seus exercícios únicos.
-        exercicios_da_palavra = get_available_exercise_types_for_word(palavra, flashcards_map, gpt_exercicios_map)
-
-        # 3. Filtra os exercícios por tipo, se um filtro for aplicado.
-        exercicios_filtrados = {
-            identificador: tipo for identificador, tipo in exercicios_da_palavra.items()
-            if tipo_filtro == "Random" or tipo == tipo_filtro
-        }
-
-        if not exercicios_filtrados:
-            continue
-
-        # 4. Prioriza exercícios não feitos ou errados.
-        alta_prioridade = [
-            {'palavra': palavra, 'tipo_exercicio': tipo, 'identificador': id_ex}
-            for id_ex, tipo in exercicios_filtrados.items()
-            if progresso.get(id_ex) != 'acerto'
-        ]
-        
-        baixa_prioridade = [
-            {'palavra': palavra, 'tipo_exercicio': tipo, 'identificador': id_ex}
-            for id_ex, tipo in exercicios_filtrados.items()
-            if progresso.get(id_ex) == 'acerto'
-        ]
-
-        # 5. Escolhe um exercício para a palavra (dando preferência aos de alta prioridade).
-        if alta_prioridade:
-            playlist.append(random.choice(alta_prioridade))
-        elif baixa_prioridade:
-            playlist.append(random.choice(baixa_prioridade))
-            
-    # Embaralha a playlist final para que as palavras não apareçam sempre na mesma ordem
+    # 1. Linhas do índice que podem ser sorteadas (palavras passadas, menos as que já vieram da fila)
+    #    e a posição de cada uma em `palavras_ativas`, para ler o progresso das escolhidas.
+    posicoes = exercicios.posicoes(palavras_ativas)
+    locais = np.full(len(exercicios.indice), -1, dtype=np.int64)
+    locais[posicoes[posicoes >= 0]] = np.flatnonzero(posicoes >= 0)
+    for item in playlist:
+        linha = exercicios.posicoes_palavras.get(item['palavra'])
+        if linha is not None:
+            locais[linha] = -1
+
+    # 2. Entradas (palavra, exercício) válidas, já com os filtros de fonte e de tipo.
+    mascara = locais[exercicios.linha] >= 0
+    if not gpt_exercicios_map:
+        mascara &= exercicios.anki
+    if not flashcards_map:
+        mascara &= ~exercicios.anki
+    if tipo_filtro != "Random":
+        mascara &= exercicios.tipos == tipo_filtro
+    entradas = np.flatnonzero(mascara)
+    if not entradas.size:
+        random.shuffle(playlist)
+        return playlist
+
+    # 3. Sorteia N palavras únicas num único choice ponderado. As entradas estão ordenadas pela linha,
+    #    por isso os exercícios de cada candidata ocupam o intervalo [inicios[k], fins[k]) de `entradas`.
+    candidatas, inicios = np.unique(exercicios.linha[entradas], return_index=True)
+    fins = np.append(inicios[1:], len(entradas))
+    pesos_candidatas = pesos[candidatas]
+    n = min(N, len(candidatas))
+    escolhidas = rng.choice(len(candidatas), size=n, replace=False, p=pesos_candidatas / pesos_candidatas.sum())
+
+    coluna_palavra, coluna_progresso = palavras_ativas['palavra'], palavras_ativas['progresso']
+    for k in escolhidas:
+        local = locais[candidatas[k]]
+        progresso = coluna_progresso.iat[local]
+        if not isinstance(progresso, dict):
+            progresso = {}
+        entradas_palavra = entradas[inicios[k]:fins[k]]
+
+        # 4. Prioriza exercícios não feitos ou errados; se todos foram acertados, qualquer um serve.
+        pendentes = np.flatnonzero([progresso.get(id_ex) != 'acerto' for id_ex in exercicios.ids[entradas_palavra]])
+        pos = entradas_palavra[rng.choice(pendentes) if pendentes.size else rng.integers(len(entradas_palavra))]
+        playlist.append({'palavra': coluna_palavra.iat[local], 'tipo_exercicio': exercicios.tipos[pos], 'identificador': exercicios.ids[pos]})
+
+    # Embaralha a playlist final para que os vencidos não apareçam sempre no início
     random.shuffle(playlist)
     return playlist
 
-def gerar_questao_dinamica(item_playlist, flashcards, gpt_exercicios, db_completo):
+def preparar_opcoes_gpt(exercicio, db_completo):
+    """
+    Parte do conjunto de opções pré-renderizado do exercício e, se houver menos de 4,
+    completa com palavras aleatórias do vocabulário. As opções são devolvidas embaralhadas.
+    """
+    opcoes = list(exercicio['opcoes_base'])
+    if len(opcoes) < 4 and not db_completo.empty:
+        necessarios = 4 - len(opcoes)
+        existentes = opcoes + [exercicio['principal'], exercicio['correta']]
+        palavras = db_completo['palavra']
+        amostra = np.random.default_rng().choice(len(palavras), size=min(len(palavras), necessarios + len(existentes)), replace=False)
+        novos_distratores = amostrar_distratores(palavras.iloc[amostra].tolist(), existentes, necessarios)
+        if len(novos_distratores) == necessarios:
+            opcoes.extend(novos_distratores)
+    random.shuffle(opcoes)
+    return opcoes
+
+def gerar_questao_dinamica(item_playlist, corpus, db_completo):
     """
     Gera os detalhes de uma questão com alternativas erradas totalmente aleatórias.
+    `corpus` é o índice compilado de get_corpus_index: o HTML da pergunta já vem pronto,
+    então por questão só há um lookup e o sorteio/embaralhamento das opções.
     """
     palavra = item_playlist['palavra']
     tipo_exercicio = item_playlist['tipo_exercicio']
-    
-    flashcards_map = {card['front']: card for card in flashcards}
-    gpt_exercicios_map = defaultdict(list)
-    for ex in gpt_exercicios:
-        if isinstance(ex.get('principal'), str):
-            gpt_exercicios_map[ex['principal']].append(ex)
 
     fonte = "ANKI" if tipo_exercicio in TIPOS_EXERCICIO_ANKI else "GPT"
     
     if fonte == 'ANKI':
-        cartao = flashcards_map.get(palavra)
+        cartao = corpus['cartoes'].get(palavra)
         if cartao:
             generator_func = TIPOS_EXERCICIO_ANKI.get(tipo_exercicio)
             if generator_func:
-                return generator_func(cartao, flashcards)
+                return generator_func(cartao, corpus['distratores'])
     
     elif fonte == 'GPT':
         identificador = item_playlist.get('identificador')
-        exercicios_disponiveis = [
-            ex for ex in gpt_exercicios_map.get(palavra, []) 
-            if ex.get('tipo') == tipo_exercicio and ex.get('frase') == identificador
-        ]
-
-        if exercicios_disponiveis:
-            exercicio = exercicios_disponiveis[0]
-            pergunta = re.sub(rf'{re.escape(exercicio["principal"])}', f'<span class="keyword-highlight">{exercicio["principal"]}</span>', exercicio["frase"], flags=re.IGNORECASE)
-            
+        exercicio = corpus['exercicios_gpt'].get(identificador)
+
+        if exercicio and exercicio.get('principal') == palavra and exercicio.get('tipo') == tipo_exercicio:
             correta = exercicio['correta']
-            opcoes = exercicio['opcoes']
-            keyword = exercicio['principal']
-            
-            tipos_para_filtrar_keyword = ["2-Word-Meaning", "3-Paraphrase", "4-Minimal-Pair"]
-            if tipo_exercicio in tipos_para_filtrar_keyword:
-                opcoes_filtradas = [opt for opt in opcoes if opt.lower() != keyword.lower()]
-            else:
-                opcoes_filtradas = opcoes
-
-            opcoes = list(set(opcoes_filtradas))
-
-            if len(opcoes) < 4:
-                necessarios = 4 - len(opcoes)
-                palavras_existentes = {opt.lower() for opt in opcoes}
-                palavras_existentes.add(keyword.lower())
-                palavras_existentes.add(correta.lower())
-                pool_distratores = [p for p in db_completo['palavra'].tolist() if p.lower() not in palavras_existentes]
-                if len(pool_distratores) >= necessarios:
-                    novos_distratores = random.sample(pool_distratores, k=necessarios)
-                    opcoes.extend(novos_distratores)
-
-            random.shuffle(opcoes)
+            opcoes = preparar_opcoes_gpt(exercicio, db_completo)
             
             if correta not in opcoes:
                 return None, None, [], -1, None, None
             
             cefr_level = exercicio.get('cefr_level')
-            return exercicio['tipo'], pergunta, opcoes, opcoes.index(correta), cefr_level, identificador
+            return exercicio['tipo'], exercicio['pergunta_html'], opcoes, opcoes.index(correta), cefr_level, identificador
             
     return None, None, [], -1, None, None
 
-def selecionar_questoes_gpt(palavras_ativas, gpt_exercicios_map, tipo_filtro, n_palavras, repetir):
-    """Cria uma lista de questões para o Quiz GPT com aleatoriedade melhorada."""
-    exercicios_possiveis = []
-    palavras_ativas_set = set(palavras_ativas['palavra'].values)
-    
-    for palavra, exercicios in gpt_exercicios_map.items():
-        if palavra in palavras_ativas_set:
-            for ex in exercicios:
-                if tipo_filtro == "Random" or ex.get('tipo') == tipo_filtro:
-                    progresso_palavra = palavras_ativas[palavras_ativas['palavra'] == palavra].iloc[0].get('progresso', {})
-                    status = progresso_palavra.get(ex.get('frase'), 'nao_testado')
-                    prioridade = 0 if status != 'acerto' else 1
-                    exercicios_possiveis.append((prioridade, random.random(), ex))
+def gerar_questao_gpt(exercicio, db_completo):
+    """Monta a questão de um exercício GPT da playlist do Quiz GPT, no mesmo formato de gerar_questao_dinamica."""
+    opcoes = preparar_opcoes_gpt(exercicio, db_completo)
+    correta = exercicio.get('correta')
+    if correta not in opcoes:
+        return None, None, [], -1, None, None
+    return exercicio['tipo'], exercicio['pergunta_html'], opcoes, opcoes.index(correta), exercicio.get('cefr_level'), exercicio['id']
 
-    exercicios_possiveis.sort()
+@rastrear()
+def gerar_questao(item_playlist, corpus, db_completo):
+    """Gera a questão de qualquer item de playlist: itens {'palavra', 'tipo_exercicio', 'identificador'} ou exercícios GPT."""
+    if 'identificador' in item_playlist:
+        return gerar_questao_dinamica(item_playlist, corpus, db_completo)
+    return gerar_questao_gpt(item_playlist, db_completo)
+
+def construir_tabela_exercicios_gpt(gpt_exercicios_map):
+    """
+    Achata o mapa palavra -> exercícios GPT numa única tabela (uma linha por exercício).
+    A coluna 'pos' aponta para a posição do exercício na lista devolvida junto com a tabela.
+    """
+    exercicios = [ex for lista in gpt_exercicios_map.values() for ex in lista]
+    tabela = pd.DataFrame({
+        'principal': [ex.get('principal') for ex in exercicios],
+        'tipo': [ex.get('tipo') for ex in exercicios],
+        'id': [ex.get('id') for ex in exercicios],
+    }, dtype=object)
+    tabela['pos'] = np.arange(len(exercicios))
+    return tabela, exercicios
+
+@rastrear()
+def selecionar_questoes_gpt(palavras_ativas, gpt_exercicios_map, tipo_filtro, n_palavras, repetir, fila=None):
+    """
+    Cria uma lista de questões para o Quiz GPT com aleatoriedade melhorada.
+    Se uma fila de revisões for passada, os exercícios GPT vencidos têm prioridade.
+    """
+    if palavras_ativas.empty or not gpt_exercicios_map:
+        return []
+
+    rng = np.random.default_rng()
+    vencidos = []
+    if fila is not None:
+        palavras_permitidas = set(palavras_ativas['palavra'])
+        itens = fila.retirar_vencidos(
+            n_palavras, uma_por_palavra=not repetir,
+            aceitar=lambda palavra, id_ex, tipo: (palavra in palavras_permitidas and palavra in gpt_exercicios_map
+                                                  and tipo not in TIPOS_EXERCICIO_ANKI and (tipo_filtro == "Random" or tipo == tipo_filtro))
+        )
+        for palavra, id_ex, _ in itens:
+            ex = next((ex for ex in gpt_exercicios_map[palavra] if ex.get('id') == id_ex), None)
+            if ex is not None:
+                vencidos.append(ex)
+        if len(vencidos) >= n_palavras:
+            random.shuffle(vencidos)
+            return vencidos
+        n_palavras -= len(vencidos)
+        if not repetir:
+            palavras_ativas = palavras_ativas[~palavras_ativas['palavra'].isin([ex['principal'] for ex in vencidos])]
+
+    tabela, exercicios = construir_tabela_exercicios_gpt(gpt_exercicios_map)
+
+    # Mantém apenas os exercícios de palavras ativas (e do tipo pedido, se houver filtro).
+    mascara = tabela['principal'].isin(palavras_ativas['palavra'])
+    if tipo_filtro != "Random":
+        mascara &= tabela['tipo'] == tipo_filtro
+    if vencidos:
+        mascara &= ~tabela['id'].isin([ex['id'] for ex in vencidos])
+    tabela = tabela[mascara]
+    if tabela.empty:
+        return vencidos
 
-    playlist = []
     if not repetir:
-        # Se não for para repetir, a lógica precisa garantir diversidade de palavras
-        palavras_unicas = list(set(ex['principal'] for _, _, ex in exercicios_possiveis))
-        random.shuffle(palavras_unicas)
-        palavras_selecionadas = palavras_unicas[:n_palavras]
-        
-        for palavra in palavras_selecionadas:
-            questoes_da_palavra = [ex for _, _, ex in exercicios_possiveis if ex['principal'] == palavra]
-            if questoes_da_palavra:
-                playlist.append(random.choice(questoes_da_palavra))
+        # Garante diversidade: sorteia as palavras e depois um exercício qualquer de cada uma.
+        palavras_unicas = tabela['principal'].unique()
+        palavras_selecionadas = rng.permutation(palavras_unicas)[:n_palavras]
+        embaralhada = tabela.iloc[rng.permutation(len(tabela))]
+        escolhidos = embaralhada[embaralhada['principal'].isin(palavras_selecionadas)].drop_duplicates('principal')
+        posicoes = escolhidos['pos'].to_numpy()
     else:
-        # Se puder repetir, apenas pega o número desejado de exercícios de alta prioridade
-        playlist = [ex for _, _, ex in exercicios_possiveis[:n_palavras]]
+        # Progresso indexado pela palavra: um único lookup por exercício em vez de um scan do DataFrame.
+        progresso_por_palavra = palavras_ativas.drop_duplicates('palavra').set_index('palavra')['progresso']
+        progressos = tabela['principal'].map(progresso_por_palavra)
+        acertados = np.fromiter(
+            (isinstance(prog, dict) and prog.get(id_ex) == 'acerto' for prog, id_ex in zip(progressos, tabela['id'])),
+            dtype=bool, count=len(tabela)
+        )
+        # Se puder repetir, pega os exercícios de alta prioridade (não acertados) primeiro, com desempate aleatório.
+        ordem = np.lexsort((rng.random(len(tabela)), acertados))
+        posicoes = tabela['pos'].to_numpy()[ordem[:n_palavras]]
 
+    playlist = vencidos + [exercicios[i] for i in posicoes]
     random.shuffle(playlist)
-    return playlist
\ No newline at end of file
+    return playlist
@@ -0,0 +1,82 @@
+import time
+from core.progress_matrix import STATUS_ACERTO, STATUS_ERRO, NOMES_STATUS
+
+# --- Sessão de Quiz ---
+# Um único objeto por página de quiz guarda a playlist, o cursor, a questão corrente e as respostas.
+# Só a questão corrente fica gerada; as respostas ocupam um byte por questão.
+SEM_RESPOSTA = 0
+
+class QuizSession:
+    """Estado compacto de um quiz em andamento, partilhado por todas as páginas de quiz."""
+
+    __slots__ = ('modo', 'playlist', 'palavras', 'idx', 'questao', 'ids_exercicio', 'tipos', 'respostas',
+                 'mostrar_resposta', 'ultimo_resultado', 'ultimo_correto', 'resumo', 'inicio')
+
+    def __init__(self, playlist, modo=None):
+        self.modo = modo
+        self.playlist = tuple(playlist)
+        self.palavras = tuple(item.get('palavra') or item.get('principal') for item in self.playlist)
+        self.idx = 0
+        self.questao = None
+        self.ids_exercicio = [None] * len(self.playlist)
+        self.tipos = [None] * len(self.playlist)
+        self.respostas = bytearray(len(self.playlist))
+        self.mostrar_resposta = False
+        self.ultimo_resultado = False
+        self.ultimo_correto = None
+        self.resumo = None
+        self.inicio = time.time()
+
+    @property
+    def total(self):
+        return len(self.playlist)
+
+    @property
+    def terminado(self):
+        return self.idx >= self.total
+
+    @property
+    def item_atual(self):
+        return self.playlist[self.idx]
+
+    def questao_atual(self, gerar):
+        """
+        Devolve a questão corrente (tipo, pergunta, opções, índice da resposta, nível CEFR, id do exercício),
+        gerando-a com `gerar(item)` apenas na primeira vez.
+        """
+        if self.questao is None:
+            self.questao = gerar(self.item_atual)
+            self.tipos[self.idx] = self.questao[0]
+            self.ids_exercicio[self.idx] = self.questao[5]
+        return self.questao
+
+    def verificar(self, resposta):
+        """Corrige a resposta escolhida para a questão corrente."""
+        _, _, opts, ans_idx, _, _ = self.questao
+        self.ultimo_resultado = opts.index(resposta) == ans_idx
+        self.ultimo_correto = opts[ans_idx]
+        self.respostas[self.idx] = STATUS_ACERTO if self.ultimo_resultado else STATUS_ERRO
+        self.mostrar_resposta = True
+
+    @property
+    def respondida(self):
+        return not self.terminado and self.respostas[self.idx] != SEM_RESPOSTA
+
+    def avancar(self):
+        """Passa à questão seguinte (questões sem resposta, como as inválidas, ficam fora dos resultados)."""
+        self.idx += 1
+        self.questao = None
+        self.mostrar_resposta = False
+
+    def resultados(self):
+        """Lista de (palavra, 'acerto' | 'erro', id_exercicio, tipo) das questões respondidas."""
+        return [
+            (self.palavras[pos], NOMES_STATUS[codigo], self.ids_exercicio[pos], self.tipos[pos])
+            for pos, codigo in enumerate(self.respostas) if codigo != SEM_RESPOSTA
+        ]
+
+    def acertos(self):
+        return [self.palavras[pos] for pos, codigo in enumerate(self.respostas) if codigo == STATUS_ACERTO]
+
+    def erros(self):
+        return [self.palavras[pos] for pos, codigo in enumerate(self.respostas) if codigo == STATUS_ERRO]
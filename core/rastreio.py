@@ -0,0 +1,111 @@
+import os
+import time
+import logging
+import threading
+import functools
+import contextlib
+import contextvars
+
+# --- Rastreio de Tempos e Logs ---
+# Spans leves à volta das funções do caminho quente (leitura do corpus, sincronização, gravações,
+# seleção de questões e resumos): cada span mede o tempo, escreve uma linha de log em DEBUG
+# ("span=<nome> ms=<duração>") e entra no rastreio do rerun corrente, mostrado no painel do modo
+# de depuração, e nos totais do processo. Fora de um rerun (aquecimento, benchmarks) só há log e totais.
+# Não depende do Streamlit; o rastreio passa para outras threads com contextvars.copy_context().
+
+log = logging.getLogger(__name__)
+FORMATO_LOG = "%(asctime)s %(levelname)s %(name)s %(threadName)s %(message)s"
+
+_rastreio_atual = contextvars.ContextVar("rastreio_atual", default=None)
+_profundidade = contextvars.ContextVar("profundidade_span", default=0)
+_totais = {}
+_trava_totais = threading.Lock()
+
+def configurar_logs(nivel=None):
+    """
+    Envia os logs do pacote core para o stderr, no nível `nivel` ou no da variável de ambiente
+    LOG_LEVEL (INFO por omissão; DEBUG mostra os spans). Chamadas repetidas só mudam o nível.
+    """
+    raiz = logging.getLogger("core")
+    raiz.setLevel((nivel or os.environ.get("LOG_LEVEL", "INFO")).upper())
+    if not raiz.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(FORMATO_LOG))
+        raiz.addHandler(handler)
+        raiz.propagate = False
+
+class Rastreio:
+    """Spans de um rerun, pela ordem em que terminaram."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.spans = []
+        self._trava = threading.Lock()
+
+    def registrar(self, span):
+        with self._trava:
+            self.spans.append(span)
+
+    def duracao_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+def iniciar_rastreio(nome):
+    """Começa o rastreio de um rerun na thread corrente (e nas tarefas lançadas com copy_context) e devolve-o."""
+    rastreio = Rastreio(nome)
+    _rastreio_atual.set(rastreio)
+    _profundidade.set(0)
+    return rastreio
+
+def rastreio_atual():
+    return _rastreio_atual.get()
+
+@contextlib.contextmanager
+def medir(nome):
+    """Mede o bloco como um span chamado `nome`."""
+    profundidade = _profundidade.get()
+    token = _profundidade.set(profundidade + 1)
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = type(e).__name__
+        raise
+    finally:
+        fim = time.perf_counter()
+        _profundidade.reset(token)
+        duracao_ms = (fim - inicio) * 1000
+        with _trava_totais:
+            total = _totais.setdefault(nome, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += duracao_ms
+            total[2] = max(total[2], duracao_ms)
+        rastreio = _rastreio_atual.get()
+        if rastreio is not None:
+            rastreio.registrar({
+                'span': nome, 'inicio_ms': round((inicio - rastreio.inicio) * 1000, 2), 'duracao_ms': round(duracao_ms, 2),
+                'profundidade': profundidade, 'thread': threading.current_thread().name, 'erro': erro,
+            })
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("span=%s ms=%.2f profundidade=%d%s", nome, duracao_ms, profundidade, f" erro={erro}" if erro else "")
+
+def rastrear(nome=None):
+    """Decorador: cada chamada da função é um span (por omissão '<módulo>.<função>')."""
+    def decorador(funcao):
+        nome_span = nome or f"{funcao.__module__.rsplit('.', 1)[-1]}.{funcao.__qualname__}"
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with medir(nome_span):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+def totais_spans():
+    """Totais do processo por span: lista de {'span', 'chamadas', 'total_ms', 'media_ms', 'max_ms'}, do maior total para o menor."""
+    with _trava_totais:
+        itens = [(nome, *valores) for nome, valores in _totais.items()]
+    return [
+        {'span': nome, 'chamadas': chamadas, 'total_ms': round(total, 2), 'media_ms': round(total / chamadas, 3), 'max_ms': round(maximo, 2)}
+        for nome, chamadas, total, maximo in sorted(itens, key=lambda item: -item[2])
+    ]
@@ -0,0 +1,202 @@
+import heapq
+import random
+import datetime
+import pandas as pd
+
+# --- Agendamento de Revisões (estilo SM-2) ---
+# Cada par (palavra, exercício) tem um estado: vencimento, intervalo em dias, estabilidade (fator de
+# facilidade) e repetições. No campo 'agenda' do vocabulário o estado fica empacotado num só texto,
+#   "<vencimento em segundos desde a época>|<intervalo>|<estabilidade>|<repeticoes>"   (ex.: "1767225600|6|2.36|2")
+# cerca de 20 bytes no Firestore em vez dos ~80 de um mapa com quatro campos. Os leitores aceitam também
+# o formato antigo, {'vencimento': datetime, 'intervalo': ..., 'estabilidade': ..., 'repeticoes': ...}.
+ESTABILIDADE_INICIAL = 2.5
+ESTABILIDADE_MINIMA = 1.3
+QUALIDADE_ACERTO = 4
+QUALIDADE_ERRO = 1
+# Entradas válidas examinadas por item pedido em retirar_vencidos
+FATOR_VARREDURA = 20
+# O heap é compactado quando tem mais do que este múltiplo de entradas por exercício agendado
+FATOR_COMPACTACAO = 2
+
+def para_timestamp(valor):
+    """Converte um vencimento (datetime, Timestamp ou string ISO) para segundos desde a época."""
+    if valor is None:
+        return 0.0
+    if isinstance(valor, str):
+        valor = pd.to_datetime(valor, errors='coerce', utc=True)
+    if pd.isna(valor):
+        return 0.0
+    if getattr(valor, 'tzinfo', None) is None:
+        valor = valor.replace(tzinfo=datetime.timezone.utc)
+    return valor.timestamp()
+
+def empacotar_estado(estado):
+    """Estado de agendamento (dicionário) no texto compacto guardado no campo 'agenda'."""
+    return f"{int(para_timestamp(estado['vencimento']))}|{estado['intervalo']:g}|{estado['estabilidade']:g}|{estado['repeticoes']}"
+
+def desempacotar_estado(valor):
+    """Estado de agendamento (dicionário) de um valor do campo 'agenda', empacotado ou no formato antigo. None se inválido."""
+    if isinstance(valor, dict):
+        return valor
+    if not isinstance(valor, str):
+        return None
+    try:
+        vencimento, intervalo, estabilidade, repeticoes = valor.split('|')
+        return {
+            'vencimento': datetime.datetime.fromtimestamp(int(vencimento), datetime.timezone.utc),
+            'intervalo': float(intervalo), 'estabilidade': float(estabilidade), 'repeticoes': int(repeticoes),
+        }
+    except ValueError:
+        return None
+
+def empacotar_agenda(agenda):
+    """Empacota os estados ainda no formato antigo de um mapa 'agenda'. Devolve (mapa, houve_troca)."""
+    if not isinstance(agenda, dict) or not any(isinstance(estado, dict) for estado in agenda.values()):
+        return agenda, False
+    return {id_ex: empacotar_estado(estado) if isinstance(estado, dict) else estado for id_ex, estado in agenda.items()}, True
+
+def vencimento_do_estado(valor):
+    """Vencimento (segundos desde a época) de um valor do campo 'agenda', sem desempacotar o resto. None se inválido."""
+    if isinstance(valor, str):
+        try:
+            return float(valor.split('|', 1)[0])
+        except ValueError:
+            return None
+    if isinstance(valor, dict):
+        return para_timestamp(valor.get('vencimento'))
+    return None
+
+def atualizar_estado(estado, acerto, agora=None):
+    """
+    Devolve o novo estado de agendamento (dicionário) de um exercício após uma resposta (algoritmo SM-2).
+    `estado` é o valor anterior do campo 'agenda' (empacotado ou não), ou None.
+    """
+    agora = agora or datetime.datetime.now(datetime.timezone.utc)
+    estado = desempacotar_estado(estado) or {}
+    estabilidade = estado.get('estabilidade', ESTABILIDADE_INICIAL)
+    repeticoes = estado.get('repeticoes', 0)
+    intervalo = estado.get('intervalo', 0)
+
+    if acerto:
+        repeticoes += 1
+        if repeticoes == 1:
+            intervalo = 1
+        elif repeticoes == 2:
+            intervalo = 6
+        else:
+            intervalo = round(intervalo * estabilidade, 2)
+    else:
+        repeticoes = 0
+        intervalo = 1
+
+    qualidade = QUALIDADE_ACERTO if acerto else QUALIDADE_ERRO
+    estabilidade += 0.1 - (5 - qualidade) * (0.08 + (5 - qualidade) * 0.02)
+    estabilidade = max(ESTABILIDADE_MINIMA, round(estabilidade, 2))
+
+    return {
+        'vencimento': agora + datetime.timedelta(days=intervalo),
+        'intervalo': intervalo,
+        'estabilidade': estabilidade,
+        'repeticoes': repeticoes,
+    }
+
+class FilaRevisao:
+    """
+    Min-heap em memória com os exercícios já agendados, ordenados pelo vencimento.
+    Só entram na fila os exercícios com estado na 'agenda': o material novo fica a cargo do sorteio
+    ponderado de quiz_logic. Reagendar um exercício apenas empilha uma nova entrada; as antigas são
+    descartadas quando chegam ao topo ou quando a fila é compactada (remoção preguiçosa).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._vencimentos = {}
+
+    @classmethod
+    def construir(cls, db_df, exercicios_por_palavra):
+        """
+        Monta a fila a partir do vocabulário da sessão.
+        `exercicios_por_palavra(palavra)` devolve o dicionário {id_exercicio: tipo} da palavra.
+        Exercícios nunca agendados (ou que já não existem no corpus) ficam de fora.
+        """
+        fila = cls()
+        if 'agenda' not in db_df.columns:
+            return fila
+        for palavra, agenda in zip(db_df['palavra'], db_df['agenda']):
+            if not isinstance(agenda, dict) or not agenda:
+                continue
+            for id_ex, tipo in exercicios_por_palavra(palavra).items():
+                ts = vencimento_do_estado(agenda.get(id_ex))
+                if ts is None or (palavra, id_ex) in fila._vencimentos:
+                    continue
+                fila._vencimentos[(palavra, id_ex)] = ts
+                fila._heap.append((ts, random.random(), palavra, id_ex, tipo))
+        heapq.heapify(fila._heap)
+        return fila
+
+    def __len__(self):
+        return len(self._vencimentos)
+
+    def agendar(self, palavra, id_ex, tipo, vencimento):
+        """Insere ou reagenda um exercício."""
+        ts = para_timestamp(vencimento)
+        self._vencimentos[(palavra, id_ex)] = ts
+        heapq.heappush(self._heap, (ts, random.random(), palavra, id_ex, tipo))
+        if len(self._heap) > FATOR_COMPACTACAO * max(len(self._vencimentos), 1):
+            self._compactar()
+
+    def remover_palavra(self, palavra, ids_exercicios):
+        """Retira da fila os exercícios de uma palavra (as entradas do heap ficam obsoletas)."""
+        for id_ex in ids_exercicios:
+            self._vencimentos.pop((palavra, id_ex), None)
+
+    def _valida(self, entrada):
+        return self._vencimentos.get((entrada[2], entrada[3])) == entrada[0]
+
+    def _compactar(self):
+        """Refaz o heap só com as entradas válidas (uma por exercício)."""
+        vistos, entradas = set(), []
+        for entrada in self._heap:
+            chave = (entrada[2], entrada[3])
+            if chave not in vistos and self._valida(entrada):
+                vistos.add(chave)
+                entradas.append(entrada)
+        heapq.heapify(entradas)
+        self._heap = entradas
+
+    def retirar_vencidos(self, limite, aceitar=None, uma_por_palavra=True, agora=None):
+        """
+        Devolve até `limite` exercícios vencidos, do mais atrasado para o mais recente,
+        como tuplas (palavra, id_exercicio, tipo). `aceitar(palavra, id_ex, tipo)` filtra os itens.
+        Os itens consultados continuam na fila: só saem dela quando forem reagendados por uma resposta.
+        O heap é percorrido por ordem sem ser alterado, e no máximo FATOR_VARREDURA * `limite`
+        entradas são examinadas, por isso um filtro que rejeita quase tudo não percorre a fila inteira.
+        """
+        heap = self._heap
+        # As entradas obsoletas no topo saem de vez (as restantes vão sendo descartadas na compactação)
+        while heap and not self._valida(heap[0]):
+            heapq.heappop(heap)
+        agora_ts = para_timestamp(agora or datetime.datetime.now(datetime.timezone.utc))
+        selecionados, palavras, vistos = [], set(), set()
+        examinadas, maximo = 0, FATOR_VARREDURA * limite
+        # Fronteira do percurso: (entrada, posição no heap); os filhos de cada posição entram depois dela
+        fronteira = [(heap[0], 0)] if heap else []
+        while fronteira and len(selecionados) < limite and examinadas < maximo:
+            entrada, pos = heapq.heappop(fronteira)
+            ts, _, palavra, id_ex, tipo = entrada
+            if ts > agora_ts:
+                break
+            for filho in (2 * pos + 1, 2 * pos + 2):
+                if filho < len(heap):
+                    heapq.heappush(fronteira, (heap[filho], filho))
+            if not self._valida(entrada) or (palavra, id_ex) in vistos:
+                continue  # entrada obsoleta (reagendada ou removida) ou repetida
+            vistos.add((palavra, id_ex))
+            examinadas += 1
+            if uma_por_palavra and palavra in palavras:
+                continue
+            if aceitar and not aceitar(palavra, id_ex, tipo):
+                continue
+            selecionados.append((palavra, id_ex, tipo))
+            palavras.add(palavra)
+        return selecionados
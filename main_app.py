@@ -2,11 +2,17 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from collections import Counter
-from core.data_manager import load_and_cache_data, get_performance_summary
+from core.data_manager import (
+    load_and_cache_data, get_performance_summary, clear_corpus_caches, start_warmup, get_warmup_status,
+    get_session_db, get_history_summary, fetch_concurrently, start_page_metering
+)
 from core.localization import get_text
+from core.rastreio import configurar_logs, iniciar_rastreio, medir, totais_spans
+from core.medidor_firestore import totais_da_sessao, totais_por_pagina, exportar_json, exportar_prometheus
 
 # --- Configuração da Página e CSS ---
 st.set_page_config(page_title="CELPIP & TCF Study App", layout="centered")
+configurar_logs()
 
 # CORREÇÃO: Reintroduz as regras de estilo para o destaque e tamanho da fonte
 st.markdown("""
@@ -76,6 +82,7 @@ def render_homepage(language, debug_mode):
         st.session_state.current_page = "LanguageSelection"
         st.rerun()
 
+    fetch_concurrently(lambda: get_session_db(language), lambda: get_history_summary(language))
     summary = get_performance_summary(language)
     st.write("")
     kpi1, kpi2, kpi3 = st.columns(3)
@@ -114,11 +121,20 @@ def render_language_selection():
         st.session_state.debug_mode = st.toggle(get_text('debug_mode_toggle', 'en'), value=st.session_state.get('debug_mode', False))
     with col2:
         if st.button(get_text('clear_cache_button', 'en'), use_container_width=True):
-            st.cache_data.clear()
+            clear_corpus_caches(disk=True)
             st.success(get_text('cache_cleared_success', 'en'))
             st.rerun()
+    aquecimento = get_warmup_status()
+    if aquecimento is not None and not aquecimento.pronto:
+        feitas, total = aquecimento.progresso()
+        st.caption(get_text('warmup_in_progress', 'en', done=feitas, total=total))
     st.divider()
 
+    # Vocabulário e histórico dos dois idiomas lidos ao mesmo tempo; os resumos usam o que ficou na sessão
+    fetch_concurrently(
+        lambda: get_session_db('en'), lambda: get_session_db('fr'),
+        lambda: get_history_summary('en'), lambda: get_history_summary('fr'),
+    )
     summary_en = get_performance_summary('en')
     summary_fr = get_performance_summary('fr')
     st.markdown(f"<h2 class='section-header'>{get_text('progress_overview_header', 'en')}</h2>", unsafe_allow_html=True)
@@ -271,7 +287,37 @@ def render_language_selection():
             st.info(get_text("no_words_to_rank_by_age", "en"))
 
 
+def render_timing_panel(rastreio):
+    """Painel do modo de depuração: spans deste rerun (ver core.rastreio) e totais do processo."""
+    with st.expander(f"⏱️ Tempos deste rerun: {rastreio.duracao_ms():.0f} ms ({rastreio.nome})"):
+        if rastreio.spans:
+            spans = pd.DataFrame(rastreio.spans).sort_values(['inicio_ms', 'profundidade'], kind='stable')
+            spans['span'] = ["\u2003" * profundidade + nome for profundidade, nome in zip(spans['profundidade'], spans['span'])]
+            st.dataframe(spans[['span', 'inicio_ms', 'duracao_ms', 'thread', 'erro']], hide_index=True, use_container_width=True)
+        else:
+            st.caption("Nenhum span registado neste rerun.")
+        st.markdown("**Totais do processo**")
+        st.dataframe(pd.DataFrame(totais_spans()), hide_index=True, use_container_width=True)
+
+def render_firestore_panel(medicao):
+    """Painel do modo de depuração: operações do Firestore desta página, da sessão e do processo (ver core.medidor_firestore)."""
+    contagem = medicao.contagem
+    with st.expander(f"📊 Firestore nesta página: {contagem['leituras']} leituras, {contagem['escritas']} escritas, "
+                     f"{contagem['remocoes']} remoções ({medicao.pagina})"):
+        st.markdown("**Esta sessão, por página**")
+        st.dataframe(pd.DataFrame.from_dict(totais_da_sessao(medicao.sessao), orient='index'), use_container_width=True)
+        st.markdown("**Processo, por página**")
+        st.dataframe(pd.DataFrame.from_dict(totais_por_pagina(), orient='index'), use_container_width=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("Exportar JSON", exportar_json(), file_name="firestore_operacoes.json", mime="application/json")
+        col2.download_button("Exportar Prometheus", exportar_prometheus(), file_name="firestore_operacoes.prom", mime="text/plain")
+
 def main():
+    pagina_inicial = st.session_state.get("current_page", "LanguageSelection")
+    rastreio = iniciar_rastreio(pagina_inicial)
+    medicao = start_page_metering(pagina_inicial)
+    # Aquece os caches dos dois idiomas numa thread (só na primeira execução do processo)
+    start_warmup()
     if "language" not in st.session_state: st.session_state.language = None
     if "current_page" not in st.session_state: st.session_state.current_page = "LanguageSelection"
     if "debug_mode" not in st.session_state: st.session_state.debug_mode = False
@@ -283,40 +329,45 @@ def main():
     if language:
         inject_language_specific_css(language)
 
-    if page == "LanguageSelection":
-        render_language_selection()
-    else:
-        flashcards, gpt_exercicios = load_and_cache_data(language)
+    with medir(f"pagina.{page}"):
+        if page == "LanguageSelection":
+            render_language_selection()
+        else:
+            flashcards, gpt_exercicios = load_and_cache_data(language)
         
-        if page == "Homepage": 
-            render_homepage(language, debug_mode)
-        elif page == "Quiz ANKI":
-            from modules.quiz_ui import quiz_ui
-            quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
-        elif page == "Quiz GPT":
-            from modules.gpt_quiz_ui import gpt_ex_ui
-            gpt_ex_ui(gpt_exercicios, language, debug_mode)
-        elif page == "Quiz Misto":
-            from modules.mixed_quiz_ui import mixed_quiz_ui
-            mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
-        elif page == "Cloze Quiz":
-            from modules.cloze_quiz_ui import cloze_quiz_ui
-            cloze_quiz_ui(gpt_exercicios, language, debug_mode)
-        elif page == "Modo de Escrita":
-            from modules.writing_ui import writing_ui
-            writing_ui(language, debug_mode)
-        elif page == "Estatísticas":
-            from modules.stats_ui import estatisticas_ui
-            estatisticas_ui(language)
-        elif page == "Modo de Revisão":
-            from modules.review_quiz_ui import review_quiz_ui
-            review_quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
-        elif page == "Modo Foco":
-            from modules.focus_quiz_ui import focus_quiz_ui
-            focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
-        elif page == "Sentence Writing":
-            from modules.sentence_writing_ui import sentence_writing_ui
-            sentence_writing_ui(language, debug_mode)
+            if page == "Homepage": 
+                render_homepage(language, debug_mode)
+            elif page == "Quiz ANKI":
+                from modules.quiz_ui import quiz_ui
+                quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
+            elif page == "Quiz GPT":
+                from modules.gpt_quiz_ui import gpt_ex_ui
+                gpt_ex_ui(gpt_exercicios, language, debug_mode)
+            elif page == "Quiz Misto":
+                from modules.mixed_quiz_ui import mixed_quiz_ui
+                mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
+            elif page == "Cloze Quiz":
+                from modules.cloze_quiz_ui import cloze_quiz_ui
+                cloze_quiz_ui(gpt_exercicios, language, debug_mode)
+            elif page == "Modo de Escrita":
+                from modules.writing_ui import writing_ui
+                writing_ui(language, debug_mode)
+            elif page == "Estatísticas":
+                from modules.stats_ui import estatisticas_ui
+                estatisticas_ui(language)
+            elif page == "Modo de Revisão":
+                from modules.review_quiz_ui import review_quiz_ui
+                review_quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
+            elif page == "Modo Foco":
+                from modules.focus_quiz_ui import focus_quiz_ui
+                focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode)
+            elif page == "Sentence Writing":
+                from modules.sentence_writing_ui import sentence_writing_ui
+                sentence_writing_ui(language, debug_mode)
+
+    if st.session_state.debug_mode:
+        render_timing_panel(rastreio)
+        render_firestore_panel(medicao)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
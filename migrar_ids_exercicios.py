@@ -0,0 +1,17 @@
+# Ferramenta de migração dos identificadores de exercícios.
+# Reescreve os mapas 'progresso' e 'agenda' do vocabulário no Firestore, trocando as chaves antigas
+# (frase inteira ou 'tipo::conteúdo') pelos identificadores curtos de gerar_id_exercicio, e empacota
+# os estados da agenda ainda guardados como mapas (ver core.scheduler).
+#
+# Uso: python migrar_ids_exercicios.py [en] [fr]
+import sys
+from core.data_manager import migrate_exercise_ids
+
+def main(languages):
+    for language in languages:
+        atualizados, bytes_antes, bytes_depois = migrate_exercise_ids(language)
+        reducao = f" ({bytes_antes / bytes_depois:.1f}x menor)" if bytes_depois else ""
+        print(f"[{language}] {atualizados} documentos migrados: {bytes_antes} -> {bytes_depois} bytes{reducao}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ['en', 'fr'])
@@ -1,6 +1,6 @@
 import streamlit as st
 import re
-from core.data_manager import reset_quiz_state
+from core.data_manager import get_parsing_errors
 from core.localization import get_text
 
 def cloze_quiz_ui(gpt_exercicios, language, debug_mode):
@@ -24,7 +24,7 @@ def cloze_quiz_ui(gpt_exercicios, language, debug_mode):
         st.write(f"- Total de exercícios GPT recebidos (bruto): `{len(gpt_exercicios)}`")
         st.write(f"- Exercícios '7-Cloze-Text' encontrados após o filtro: `{len(cloze_exercises)}`")
         
-        parsing_errors = st.session_state.get(f'parsing_errors_{language}', [])
+        parsing_errors = get_parsing_errors(language)
         if any("Cloze" in error for error in parsing_errors):
             st.error("Erros detectados durante o carregamento do arquivo Cloze:")
             for error in parsing_errors:
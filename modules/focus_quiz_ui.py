@@ -1,12 +1,10 @@
 import streamlit as st
-import random
 import re
-from collections import defaultdict
 from core.data_manager import (
-    get_session_db, update_progress_from_quiz, load_and_cache_data,
-    get_available_exercise_types_for_word, TIPOS_EXERCICIO_ANKI
+    get_session_db, get_session_vocab, get_corpus_index, ArmazenamentoFirestore
 )
-from core.quiz_logic import gerar_questao_dinamica
+from core.corpus import TIPOS_EXERCICIO_ANKI
+from core.engine import start_quiz, next_question, answer, finish
 from core.localization import get_text
 
 def focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
@@ -22,13 +20,6 @@ def focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
     
     db_df = get_session_db(language)
     palavras_ativas = sorted(db_df[db_df['ativa'] == True]['palavra'].tolist())
-    
-    flashcards_map = {card['front']: card for card in flashcards}
-    gpt_exercicios_map = defaultdict(list)
-    for ex in gpt_exercicios:
-        principal = ex.get('principal')
-        if isinstance(principal, str):
-            gpt_exercicios_map[principal].append(ex)
 
     if debug_mode:
         st.subheader(f"Modo de Depuração Detalhado ({get_text('focus_mode_button', language)})")
@@ -46,61 +37,28 @@ def focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
         st.warning(get_text("no_active_words", language))
         return
 
-    if 'focus_quiz' not in st.session_state:
-        st.session_state.focus_quiz = {}
-
-    if not st.session_state.focus_quiz.get('started', False):
+    if st.session_state.get('focus_quiz') is None:
         st.info(get_text("focus_mode_info", language))
         
         palavra_selecionada = st.selectbox(get_text("choose_focus_word", language), palavras_ativas)
         
         if st.button(get_text("start_focus_button", language, word=palavra_selecionada)):
             st.session_state.pop('focus_quiz', None)
+            sessao = start_quiz(get_session_vocab(language), get_corpus_index(language), 'focus', palavra=palavra_selecionada)
             
-            # CORREÇÃO: Usa a função com o nome correto
-            exercicios_palavra = get_available_exercise_types_for_word(palavra_selecionada, flashcards_map, gpt_exercicios_map)
-            
-            playlist = [
-                {'palavra': palavra_selecionada, 'tipo_exercicio': tipo, 'identificador': identificador}
-                for identificador, tipo in exercicios_palavra.items() if tipo != '7-Cloze-Text'
-            ]
-            
-            if not playlist:
+            if sessao is None:
                 st.error(f"Nenhum exercício válido encontrado para a palavra '{palavra_selecionada}'.")
             else:
-                random.shuffle(playlist)
-                st.session_state.focus_quiz = {'started': True, 'playlist': playlist, 'idx': 0, 'resultados': [], 'mostrar_resposta': False}
+                st.session_state.focus_quiz = sessao
                 st.rerun()
     else:
         quiz = st.session_state.focus_quiz
-        playlist = quiz.get('playlist', [])
-        idx = quiz.get('idx', 0)
+        vocab, corpus = get_session_vocab(language), get_corpus_index(language)
+        questao = quiz.questao if quiz.mostrar_resposta else next_question(quiz, vocab, corpus)
+        playlist, idx, total = quiz.playlist, quiz.idx, quiz.total
 
-        if not quiz.get('started') or not playlist:
-             st.warning("O quiz não pôde ser iniciado. Retornando à configuração.")
-             st.session_state.pop('focus_quiz', None)
-             st.rerun()
-
-        total = len(playlist)
-        if idx < total:
-            if f"focus_pergunta_{idx}" not in st.session_state:
-                item = playlist[idx]
-                tipo, pergunta, opts, ans_idx, cefr_level, id_ex = gerar_questao_dinamica(item, flashcards, gpt_exercicios, db_df)
-                st.session_state[f"focus_tipo_{idx}"] = tipo
-                st.session_state[f"focus_pergunta_{idx}"] = pergunta
-                st.session_state[f"focus_opts_{idx}"] = opts
-                st.session_state[f"focus_ans_idx_{idx}"] = ans_idx
-                st.session_state[f"focus_cefr_{idx}"] = cefr_level
-                st.session_state[f"focus_id_ex_{idx}"] = id_ex
-            
-            tipo_interno, pergunta, opts, ans_idx, cefr_level, id_ex = (
-                st.session_state.get(f"focus_tipo_{idx}"),
-                st.session_state.get(f"focus_pergunta_{idx}"),
-                st.session_state.get(f"focus_opts_{idx}"),
-                st.session_state.get(f"focus_ans_idx_{idx}"),
-                st.session_state.get(f"focus_cefr_{idx}"),
-                st.session_state.get(f"focus_id_ex_{idx}")
-            )
+        if questao is not None:
+            tipo_interno, pergunta, opts, ans_idx, cefr_level, id_ex = questao
 
             if tipo_interno in TIPOS_EXERCICIO_ANKI:
                 tipos_legenda = {
@@ -115,10 +73,6 @@ def focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
             else:
                 tipo_display = f"{tipo_interno} (GPT)"
 
-            if not pergunta or opts is None:
-                quiz['idx'] += 1
-                st.rerun()
-
             col1, col2 = st.columns([4, 1])
             with col1:
                 st.markdown(f"### {get_text('practicing_with', language)} <span class='keyword-highlight'>{playlist[0]['palavra']}</span>", unsafe_allow_html=True)
@@ -137,32 +91,23 @@ def focus_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
 
             col_btn1, col_btn2 = st.columns([3, 1])
             with col_btn1:
-                if not quiz.get('mostrar_resposta'):
+                if not quiz.mostrar_resposta:
                     if st.button(get_text("check_button", language), key=f"focus_check_{idx}"):
-                        quiz['mostrar_resposta'] = True
-                        quiz['ultimo_resultado'] = (opts.index(resposta) == ans_idx)
-                        quiz['ultimo_correto'] = opts[ans_idx]
+                        answer(quiz, resposta)
                         st.rerun()
                 else:
                     if st.button(get_text("next_button", language), key=f"focus_next_{idx}"):
-                        resultado_str = "acerto" if quiz['ultimo_resultado'] else "erro"
-                        item_atual = playlist[idx]
-                        quiz['resultados'].append((item_atual['palavra'], resultado_str, id_ex, tipo_interno))
-                        quiz['idx'] += 1
-                        quiz['mostrar_resposta'] = False
+                        quiz.avancar()
                         st.rerun()
-                    if quiz['ultimo_resultado']: st.success(get_text("correct_answer", language))
-                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz['ultimo_correto']))
+                    if quiz.ultimo_resultado: st.success(get_text("correct_answer", language))
+                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz.ultimo_correto))
             with col_btn2:
                 if st.button(get_text("cancel_quiz", language)):
                     st.session_state.pop('focus_quiz', None)
                     st.rerun()
         else:
-            update_progress_from_quiz(quiz.get('resultados', []), language)
-            acertos = len([r for r in quiz.get('resultados', []) if r[1] == 'acerto'])
-            erros = len(quiz.get('resultados', [])) - acertos
-            score = int(acertos / total * 100) if total > 0 else 0
-            st.success(get_text("final_result", language).format(correct_count=acertos, error_count=erros, score=score))
+            resumo = finish(quiz, vocab, corpus, ArmazenamentoFirestore(language))
+            st.success(get_text("final_result", language).format(correct_count=len(resumo['acertos']), error_count=len(resumo['erros']), score=resumo['score']))
             
             if st.button(get_text("choose_another_word", language)):
                 st.session_state.pop('focus_quiz', None)
@@ -1,14 +1,8 @@
 import streamlit as st
-import random
-import re
-import datetime
 from collections import defaultdict
 import pandas as pd
-from core.data_manager import (
-    reset_quiz_state, save_history, get_session_db, get_history,
-    update_progress_from_quiz, load_and_cache_data
-)
-from core.quiz_logic import selecionar_questoes_gpt
+from core.data_manager import get_session_db, get_session_vocab, get_corpus_index, ArmazenamentoFirestore, get_parsing_errors
+from core.engine import start_quiz, next_question, answer, finish
 from core.localization import get_text
 
 def gpt_ex_ui(gpt_exercicios, language, debug_mode):
@@ -44,7 +38,7 @@ def gpt_ex_ui(gpt_exercicios, language, debug_mode):
         st.write(f"- Total de exercícios GPT (bruto): `{len(gpt_exercicios)}`")
         st.write(f"- Exercícios GPT (padrão) recebidos: `{len(gpt_exercicios_filtrados)}`")
         
-        parsing_errors = st.session_state.get(f'parsing_errors_{language}', [])
+        parsing_errors = get_parsing_errors(language)
         if any("GPT" in error for error in parsing_errors):
             st.error("Erros detectados durante o carregamento dos dados GPT:")
             for error in parsing_errors:
@@ -77,10 +71,7 @@ def gpt_ex_ui(gpt_exercicios, language, debug_mode):
         st.warning(get_text("no_active_words", language))
         return
 
-    if 'gpt_ex_quiz' not in st.session_state:
-        st.session_state.gpt_ex_quiz = {}
-
-    if not st.session_state.gpt_ex_quiz.get('started', False):
+    if st.session_state.get('gpt_ex_quiz') is None:
         with st.form("gpt_ex_cfg"):
             tipos_disponiveis = sorted(list(set(e['tipo'] for e_list in gpt_exercicios_map.values() for e in e_list)))
             tipos_exibidos = ["Random"] + tipos_disponiveis
@@ -102,49 +93,23 @@ def gpt_ex_ui(gpt_exercicios, language, debug_mode):
                 )
 
                 if st.form_submit_button(get_text("start_exercises", language)):
-                    reset_quiz_state("gpt_ex_")
-                    playlist = selecionar_questoes_gpt(palavras_ativas, gpt_exercicios_map, tipo_escolhido, n_palavras, repetir_palavra == get_text("option_yes", language))
-                    
-                    if not playlist:
+                    sessao = start_quiz(
+                        get_session_vocab(language), get_corpus_index(language), 'gpt', n_palavras, tipo_escolhido,
+                        repetir=repetir_palavra == get_text("option_yes", language)
+                    )
+                    if sessao is None:
                         st.error(get_text("no_valid_questions", language))
                     else:
-                        st.session_state.gpt_ex_quiz = {'started': True, 'playlist': playlist, 'idx': 0, 'resultados': [], 'show': False}
+                        st.session_state.gpt_ex_quiz = sessao
                         st.rerun()
     else:
         quiz_state = st.session_state.gpt_ex_quiz
-        playlist = quiz_state.get('playlist', [])
-        idx = quiz_state.get('idx', 0)
-        
-        if not quiz_state.get('started') or not playlist:
-             st.warning("O quiz não pôde ser iniciado. Retornando à configuração.")
-             st.session_state.pop('gpt_ex_quiz', None)
-             st.rerun()
+        vocab, corpus = get_session_vocab(language), get_corpus_index(language)
+        questao = quiz_state.questao if quiz_state.mostrar_resposta else next_question(quiz_state, vocab, corpus)
+        idx, total = quiz_state.idx, quiz_state.total
 
-        total = len(playlist)
-        if idx < total:
-            ex = playlist[idx]
-            tipo = ex.get('tipo')
-            pergunta = ex.get('frase')
-            opts_originais = ex.get('opcoes', [])
-            correta = ex.get('correta')
-            keyword = ex.get('principal')
-            cefr_level = ex.get('cefr_level')
-
-            tipos_para_filtrar_keyword = ["2-Word-Meaning", "3-Paraphrase", "4-Minimal-Pair"]
-            if tipo in tipos_para_filtrar_keyword:
-                opcoes_filtradas = [opt for opt in opts_originais if opt.lower() != keyword.lower()]
-            else:
-                opcoes_filtradas = opts_originais
-            opts = list(set(opcoes_filtradas))
-            if len(opts) < 4:
-                necessarios = 4 - len(opts)
-                palavras_existentes = {opt.lower() for opt in opts}
-                palavras_existentes.add(keyword.lower())
-                palavras_existentes.add(correta.lower())
-                pool_distratores = [p for p in db_df['palavra'].tolist() if p.lower() not in palavras_existentes]
-                if len(pool_distratores) >= necessarios:
-                    novos_distratores = random.sample(pool_distratores, k=necessarios)
-                    opts.extend(novos_distratores)
+        if questao is not None:
+            tipo, pergunta, opts, ans_idx, cefr_level, id_ex = questao
 
             col1, col2 = st.columns([4, 1])
             with col1:
@@ -154,59 +119,33 @@ def gpt_ex_ui(gpt_exercicios, language, debug_mode):
                 if cefr_level:
                     st.markdown(f'<div style="text-align: right; font-weight: bold; font-size: 24px; color: #888;">{cefr_level}</div>', unsafe_allow_html=True)
 
-            frase_html = re.sub(rf'{re.escape(ex["principal"])}', f'<span class="keyword-highlight">{ex["principal"]}</span>', pergunta, flags=re.IGNORECASE)
-            st.markdown(f'<div class="question-bg">{frase_html}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="question-bg">{pergunta}</div>', unsafe_allow_html=True)
 
             with st.container():
                 st.markdown('<div class="options-container">', unsafe_allow_html=True)
-                if f"gpt_ex_opts_{idx}" not in st.session_state:
-                    random.shuffle(opts)
-                    st.session_state[f"gpt_ex_opts_{idx}"] = opts
-                
-                if correta not in st.session_state[f"gpt_ex_opts_{idx}"]:
-                    quiz_state['idx'] += 1
-                    st.rerun()
-
-                resposta = st.radio("", st.session_state[f"gpt_ex_opts_{idx}"], key=f"gpt_ex_radio_{idx}", label_visibility="collapsed")
+                resposta = st.radio("", opts, key=f"gpt_ex_radio_{idx}", label_visibility="collapsed")
                 st.markdown('</div>', unsafe_allow_html=True)
             
             col_btn1, col_btn2 = st.columns([3, 1])
             with col_btn1:
-                if not quiz_state.get('show'):
+                if not quiz_state.mostrar_resposta:
                     if st.button(get_text("check_button", language), key=f"gpt_ex_check_{idx}"):
-                        quiz_state['show'] = True
-                        quiz_state['ultimo_resultado'] = (resposta == correta)
-                        quiz_state['ultimo_correto'] = correta
+                        answer(quiz_state, resposta)
                         st.rerun()
                 else:
                     if st.button(get_text("next_button", language), key=f"gpt_ex_next_{idx}"):
-                        resultado_str = "acerto" if quiz_state['ultimo_resultado'] else "erro"
-                        # --- CORREÇÃO ---
-                        # Adiciona as 4 informações necessárias para o registo de progresso
-                        quiz_state['resultados'].append((ex["principal"], resultado_str, ex['frase'], ex['tipo']))
-                        quiz_state['idx'] += 1
-                        quiz_state['show'] = False
+                        quiz_state.avancar()
                         st.rerun()
-                    if quiz_state['ultimo_resultado']: st.success(get_text("correct_answer", language))
-                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz_state['ultimo_correto']))
+                    if quiz_state.ultimo_resultado: st.success(get_text("correct_answer", language))
+                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz_state.ultimo_correto))
             with col_btn2:
                 if st.button(get_text("cancel_exercises", language)): 
                     st.session_state.pop('gpt_ex_quiz', None)
                     st.rerun()
         else:
-            update_progress_from_quiz(quiz_state.get('resultados', []), language)
-            acertos = [r[0] for r in quiz_state.get('resultados', []) if r[1] == 'acerto']
-            erros = [r[0] for r in quiz_state.get('resultados', []) if r[1] == 'erro']
-            score = int(len(acertos) / total * 100) if total > 0 else 0
-            st.success(get_text("final_result", language).format(correct_count=len(acertos), error_count=len(erros), score=score))
-            
-            historico = get_history(language)
-            historico.setdefault("gpt_quiz", []).append({
-                "data": datetime.datetime.now().isoformat(), 
-                "acertos": acertos, "erros": erros, "score": score, "total": total
-            })
-            save_history(historico, language)
-            
+            resumo = finish(quiz_state, vocab, corpus, ArmazenamentoFirestore(language))
+            st.success(get_text("final_result", language).format(correct_count=len(resumo['acertos']), error_count=len(resumo['erros']), score=resumo['score']))
+
             if st.button(get_text("finish_button", language)): 
                 st.session_state.pop('gpt_ex_quiz', None)
                 st.rerun()
\ No newline at end of file
@@ -1,14 +1,11 @@
 import streamlit as st
-import random
-import datetime
 import re
 import pandas as pd
-from collections import defaultdict
 from core.data_manager import (
-    get_session_db, get_history, save_history, reset_quiz_state, 
-    update_progress_from_quiz, TIPOS_EXERCICIO_ANKI
+    get_session_db, get_session_vocab, get_corpus_index, ArmazenamentoFirestore
 )
-from core.quiz_logic import selecionar_questoes_priorizadas, gerar_questao_dinamica
+from core.corpus import TIPOS_EXERCICIO_ANKI
+from core.engine import start_quiz, next_question, answer, finish
 from core.localization import get_text
 
 def mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
@@ -22,7 +19,6 @@ def mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
 
     st.header(get_text("mixed_quiz_button", language))
     
-    gpt_exercicios_filtrados = [ex for ex in gpt_exercicios if ex.get('tipo') != '7-Cloze-Text']
     db_df = get_session_db(language)
 
     # CORREÇÃO DEFINITIVA: Verifica se o DataFrame não está vazio e se a coluna 'ativa' existe
@@ -30,66 +26,31 @@ def mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
         palavras_ativas = db_df[db_df['ativa'] == True]
     else:
         palavras_ativas = pd.DataFrame(columns=db_df.columns)
-    
-    flashcards_map = {card['front']: card for card in flashcards}
-    gpt_exercicios_map = defaultdict(list)
-    for ex in gpt_exercicios_filtrados:
-        if isinstance(ex.get('principal'), str):
-            gpt_exercicios_map[ex['principal']].append(ex)
 
     if palavras_ativas.empty:
         st.warning(get_text("no_active_words", language))
         return
 
-    if 'mixed_quiz' not in st.session_state:
-        st.session_state.mixed_quiz = {}
-
-    if not st.session_state.mixed_quiz.get('started', False):
+    if st.session_state.get('mixed_quiz') is None:
         with st.form("mixed_quiz_cfg"):
             st.info(get_text("mixed_quiz_info", language))
             num_exercicios_disponiveis = len(palavras_ativas) * 8
             N = st.number_input(get_text("how_many_questions", language), 1, num_exercicios_disponiveis, min(10, num_exercicios_disponiveis), 1, key="mixed_n_cards")
             if st.form_submit_button(get_text("start_quiz", language)):
-                reset_quiz_state("mixed_")
-                playlist = selecionar_questoes_priorizadas(palavras_ativas, flashcards_map, gpt_exercicios_map, N)
-                if not playlist:
+                sessao = start_quiz(get_session_vocab(language), get_corpus_index(language), 'mixed', N)
+                if sessao is None:
                     st.error(get_text("no_valid_questions", language))
                 else:
-                    st.session_state.mixed_quiz = {
-                        'started': True, 'playlist': playlist, 'idx': 0,
-                        'resultados': [], 'mostrar_resposta': False
-                    }
+                    st.session_state.mixed_quiz = sessao
                     st.rerun()
     else:
         quiz_state = st.session_state.mixed_quiz
-        playlist = quiz_state.get('playlist', [])
-        idx = quiz_state.get('idx', 0)
-
-        if not quiz_state.get('started') or not playlist:
-             st.warning("O quiz não pôde ser iniciado. Retornando à configuração.")
-             st.session_state.pop('mixed_quiz', None)
-             st.rerun()
+        vocab, corpus = get_session_vocab(language), get_corpus_index(language)
+        questao = quiz_state.questao if quiz_state.mostrar_resposta else next_question(quiz_state, vocab, corpus)
+        idx, total = quiz_state.idx, quiz_state.total
 
-        total = len(playlist)
-        if idx < total:
-            if f"mixed_pergunta_{idx}" not in st.session_state:
-                item_playlist = playlist[idx]
-                tipo, pergunta, opts, ans_idx, cefr_level, id_ex = gerar_questao_dinamica(item_playlist, flashcards, gpt_exercicios, db_df)
-                st.session_state[f"mixed_tipo_{idx}"] = tipo
-                st.session_state[f"mixed_pergunta_{idx}"] = pergunta
-                st.session_state[f"mixed_opts_{idx}"] = opts
-                st.session_state[f"mixed_ans_idx_{idx}"] = ans_idx
-                st.session_state[f"mixed_cefr_{idx}"] = cefr_level
-                st.session_state[f"mixed_id_ex_{idx}"] = id_ex
-
-            tipo_interno, pergunta, opts, ans_idx, cefr_level, id_ex = (
-                st.session_state.get(f"mixed_tipo_{idx}"),
-                st.session_state.get(f"mixed_pergunta_{idx}"),
-                st.session_state.get(f"mixed_opts_{idx}"),
-                st.session_state.get(f"mixed_ans_idx_{idx}"),
-                st.session_state.get(f"mixed_cefr_{idx}"),
-                st.session_state.get(f"mixed_id_ex_{idx}")
-            )
+        if questao is not None:
+            tipo_interno, pergunta, opts, ans_idx, cefr_level, id_ex = questao
             
             if tipo_interno in TIPOS_EXERCICIO_ANKI:
                 tipos_legenda = {
@@ -104,10 +65,6 @@ def mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
             else:
                 tipo_display = f"{tipo_interno} (GPT)"
 
-            if not pergunta or opts is None:
-                quiz_state['idx'] += 1
-                st.rerun()
-
             col1, col2 = st.columns([4, 1])
             with col1:
                 st.progress(idx / total, get_text("quiz_progress", language).format(idx=idx, total=total))
@@ -125,39 +82,23 @@ def mixed_quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
 
             col_btn1, col_btn2 = st.columns([3, 1])
             with col_btn1:
-                if not quiz_state.get('mostrar_resposta'):
+                if not quiz_state.mostrar_resposta:
                     if st.button(get_text("check_button", language), key=f"mixed_check_{idx}"):
-                        quiz_state['mostrar_resposta'] = True
-                        quiz_state['ultimo_resultado'] = (opts.index(resposta) == ans_idx)
-                        quiz_state['ultimo_correto'] = opts[ans_idx]
+                        answer(quiz_state, resposta)
                         st.rerun()
                 else:
                     if st.button(get_text("next_button", language), key=f"mixed_next_{idx}"):
-                        item_atual = playlist[idx]
-                        resultado_str = "acerto" if quiz_state['ultimo_resultado'] else "erro"
-                        quiz_state['resultados'].append((item_atual['palavra'], resultado_str, id_ex, tipo_interno))
-                        quiz_state['idx'] += 1
-                        quiz_state['mostrar_resposta'] = False
+                        quiz_state.avancar()
                         st.rerun()
-                    if quiz_state['ultimo_resultado']: st.success(get_text("correct_answer", language))
-                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz_state['ultimo_correto']))
+                    if quiz_state.ultimo_resultado: st.success(get_text("correct_answer", language))
+                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz_state.ultimo_correto))
             with col_btn2:
                 if st.button(get_text("cancel_quiz", language)):
                     st.session_state.pop('mixed_quiz', None)
                     st.rerun()
         else:
-            update_progress_from_quiz(quiz_state.get('resultados', []), language)
-            acertos = [r[0] for r in quiz_state.get('resultados', []) if r[1] == 'acerto']
-            erros = [r[0] for r in quiz_state.get('resultados', []) if r[1] == 'erro']
-            score = int(len(acertos) / total * 100) if total > 0 else 0
-            st.success(get_text("final_result", language).format(correct_count=len(acertos), error_count=len(erros), score=score))
-            
-            historico = get_history(language)
-            historico.setdefault("mixed_quiz", []).append({
-                "data": datetime.datetime.now().isoformat(),
-                "acertos": acertos, "erros": erros, "score": score, "total": total
-            })
-            save_history(historico, language)
+            resumo = finish(quiz_state, vocab, corpus, ArmazenamentoFirestore(language))
+            st.success(get_text("final_result", language).format(correct_count=len(resumo['acertos']), error_count=len(resumo['erros']), score=resumo['score']))
             
             if st.button(get_text("finish_button", language)):
                 st.session_state.pop('mixed_quiz', None)
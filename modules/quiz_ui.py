@@ -1,12 +1,10 @@
 import streamlit as st
-import random
-import datetime
 import pandas as pd
 from core.data_manager import (
-    save_history, get_session_db, reset_quiz_state, get_history,
-    update_progress_from_quiz, TIPOS_EXERCICIO_ANKI
+    get_session_db, get_session_vocab, get_corpus_index, ArmazenamentoFirestore
 )
-from core.quiz_logic import selecionar_questoes_priorizadas, gerar_questao_dinamica
+from core.corpus import TIPOS_EXERCICIO_ANKI
+from core.engine import start_quiz, next_question, answer, finish
 from core.localization import get_text 
 
 def quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
@@ -27,7 +25,6 @@ def quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
         palavras_ativas = db_df[db_df['ativa'] == True]
     else:
         palavras_ativas = pd.DataFrame(columns=db_df.columns)
-    baralho_map = {card['front']: card for card in flashcards}
 
     tipos_legenda = {
         "MCQ Significado": get_text("word_meaning_anki", language),
@@ -37,10 +34,7 @@ def quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
         "Reading": get_text("reading_anki", language)
     }
 
-    if 'quiz_anki' not in st.session_state:
-        st.session_state.quiz_anki = {}
-
-    if not st.session_state.quiz_anki.get('started', False):
+    if st.session_state.get('quiz_anki') is None:
         with st.form("anki_quiz_cfg"):
             tipos_disponiveis = list(TIPOS_EXERCICIO_ANKI.keys())
             tipos_exibidos = ["Random"] + [tipos_legenda.get(t, t) for t in tipos_disponiveis]
@@ -51,49 +45,23 @@ def quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
             N = st.number_input(get_text("how_many_questions", language), 1, max(1, max_questoes), min(10, max(1, max_questoes)), 1)
             
             if st.form_submit_button(get_text("start_quiz", language)):
-                reset_quiz_state("quiz_anki_")
                 tipo_escolhido_interno = {v: k for k, v in tipos_legenda.items()}.get(tipo_escolhido_leg, "Random")
-                playlist = selecionar_questoes_priorizadas(palavras_ativas, baralho_map, {}, N, tipo_escolhido_interno)
-                if not playlist:
+                sessao = start_quiz(get_session_vocab(language), get_corpus_index(language), 'anki', N, tipo_escolhido_interno)
+                if sessao is None:
                      st.error(get_text("no_valid_questions", language))
                 else:
-                    st.session_state.quiz_anki = {'started': True, 'idx': 0, 'total': len(playlist), 'playlist': playlist, 'resultados': []}
+                    st.session_state.quiz_anki = sessao
                     st.rerun()
     else:
         quiz = st.session_state.quiz_anki
-        idx, total = quiz.get('idx', 0), quiz.get('total', 0)
-        
-        if not quiz.get('started') or not quiz.get('playlist'):
-             st.warning("O quiz não pôde ser iniciado. Retornando à configuração.")
-             st.session_state.pop('quiz_anki', None)
-             st.rerun()
-
-        if idx < total:
-            if f"quiz_anki_pergunta_{idx}" not in st.session_state:
-                item = quiz['playlist'][idx]
-                tipo, pergunta, opts, ans_idx, cefr_level, id_ex = gerar_questao_dinamica(item, flashcards, gpt_exercicios, db_df)
-                st.session_state[f"quiz_anki_tipo_{idx}"] = tipo
-                st.session_state[f"quiz_anki_pergunta_{idx}"] = pergunta
-                st.session_state[f"quiz_anki_opts_{idx}"] = opts
-                st.session_state[f"quiz_anki_ans_idx_{idx}"] = ans_idx
-                st.session_state[f"quiz_anki_cefr_{idx}"] = cefr_level
-                st.session_state[f"quiz_anki_id_ex_{idx}"] = id_ex
+        vocab, corpus = get_session_vocab(language), get_corpus_index(language)
+        questao = quiz.questao if quiz.mostrar_resposta else next_question(quiz, vocab, corpus)
+        idx, total = quiz.idx, quiz.total
 
-            tipo_interno, pergunta, opts, ans_idx, cefr_level, id_ex = (
-                st.session_state.get(f"quiz_anki_tipo_{idx}"),
-                st.session_state.get(f"quiz_anki_pergunta_{idx}"),
-                st.session_state.get(f"quiz_anki_opts_{idx}"),
-                st.session_state.get(f"quiz_anki_ans_idx_{idx}"),
-                st.session_state.get(f"quiz_anki_cefr_{idx}"),
-                st.session_state.get(f"quiz_anki_id_ex_{idx}")
-            )
-            
+        if questao is not None:
+            tipo_interno, pergunta, opts, ans_idx, cefr_level, id_ex = questao
             tipo_display = tipos_legenda.get(tipo_interno, tipo_interno)
 
-            if not pergunta or opts is None:
-                quiz['idx'] += 1
-                st.rerun()
-
             col1, col2 = st.columns([4, 1])
             with col1:
                 st.progress(idx / total, get_text("quiz_progress", language).format(idx=idx, total=total))
@@ -110,40 +78,25 @@ def quiz_ui(flashcards, gpt_exercicios, language, debug_mode):
 
             col_btn1, col_btn2 = st.columns([3, 1])
             with col_btn1:
-                if 'mostrar_resposta' not in quiz or not quiz['mostrar_resposta']:
+                if not quiz.mostrar_resposta:
                     if st.button(get_text("check_button", language), key=f"quiz_check_{idx}"):
-                        quiz['mostrar_resposta'] = True
-                        quiz['ultimo_resultado'] = (opts.index(resposta) == ans_idx)
-                        quiz['ultimo_correto'] = opts[ans_idx]
+                        answer(quiz, resposta)
                         st.rerun()
                 else:
                     if st.button(get_text("next_button", language), key=f"quiz_next_{idx}"):
-                        resultado_str = "acerto" if quiz['ultimo_resultado'] else "erro"
-                        item_atual = quiz['playlist'][idx]
-                        # Adiciona o tipo de exercício aos resultados para a atualização correta
-                        quiz['resultados'].append((item_atual['palavra'], resultado_str, id_ex, tipo_interno))
-                        quiz['idx'] += 1
-                        quiz['mostrar_resposta'] = False
+                        quiz.avancar()
                         st.rerun()
-                    if quiz['ultimo_resultado']: st.success(get_text("correct_answer", language))
-                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz['ultimo_correto']))
+                    if quiz.ultimo_resultado: st.success(get_text("correct_answer", language))
+                    else: st.error(get_text("incorrect_answer", language).format(correct=quiz.ultimo_correto))
             with col_btn2:
                 if st.button(get_text("cancel_quiz", language)):
                     st.session_state.pop('quiz_anki', None)
                     st.rerun()
         else:
-            update_progress_from_quiz(quiz.get('resultados', []), language)
-            if 'deactivated_words_notification' in st.session_state:
-                deactivated_list = st.session_state['deactivated_words_notification']
-                st.success(f"Parabéns! As seguintes palavras foram dominadas e desativadas: {', '.join(deactivated_list)}")
-                del st.session_state['deactivated_words_notification']
-            acertos = [r[0] for r in quiz.get('resultados', []) if r[1] == 'acerto']
-            erros = [r[0] for r in quiz.get('resultados', []) if r[1] == 'erro']
-            score = int(len(acertos) / total * 100) if total > 0 else 0
-            st.success(get_text("final_result", language).format(correct_count=len(acertos), error_count=len(erros), score=score))
-            historico = get_history(language)
-            historico.setdefault("quiz", []).append({"data": datetime.datetime.now().isoformat(), "acertos": acertos, "erros": erros, "score": score, "total": total})
-            save_history(historico, language)
+            resumo = finish(quiz, vocab, corpus, ArmazenamentoFirestore(language))
+            if resumo['desativadas']:
+                st.success(f"Parabéns! As seguintes palavras foram dominadas e desativadas: {', '.join(resumo['desativadas'])}")
+            st.success(get_text("final_result", language).format(correct_count=len(resumo['acertos']), error_count=len(resumo['erros']), score=resumo['score']))
             if st.button(get_text("finish_button", language)):
                 st.session_state.pop('quiz_anki', None)
                 st.rerun()
\ No newline at end of file
@@ -1,13 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from collections import Counter
-import datetime
 from core.data_manager import (
-    get_history, get_session_db, save_vocab_db, get_writing_log,
+    get_history, get_session_db, get_session_vocab, get_writing_log,
     clear_history, get_performance_summary, load_and_cache_data,
-    delete_writing_entries, delete_cloze_exercises, TIPOS_EXERCICIO_ANKI,
-    get_exercise_id_to_type_map
+    delete_writing_entries, delete_cloze_exercises,
+    get_exercise_type_index, calcular_progresso_por_tipo, get_progress_matrix,
+    get_daily_stats, rebuild_daily_stats, delete_vocab_words, update_active_status, get_parsing_errors,
+    get_history_summary, fetch_concurrently, get_session_deleted_words, restore_vocab_words
 )
+from core.performance import agrupar_serie
 from core.localization import get_text
 
 def estatisticas_ui(language):
@@ -20,7 +22,11 @@ def estatisticas_ui(language):
 
     st.header(get_text("stats_button", language))
 
-    db_df = get_session_db(language)
+    # Vocabulário, histórico, resumos diários e log de escrita são lidos do Firestore ao mesmo tempo
+    db_df, _, serie, writing_log = fetch_concurrently(
+        lambda: get_session_db(language), lambda: get_history_summary(language),
+        lambda: get_daily_stats(language), lambda: get_writing_log(language),
+    )
     summary = get_performance_summary(language)
 
     # --- KPIs ---
@@ -32,13 +38,37 @@ def estatisticas_ui(language):
     kpi4.metric(get_text("anki_source_metric", language), summary['db_kpis']['anki'])
     kpi5.metric(get_text("gpt_source_metric", language), summary['db_kpis']['gpt'])
 
-    parsing_errors = st.session_state.get(f'parsing_errors_{language}', [])
+    parsing_errors = get_parsing_errors(language)
     if parsing_errors:
         with st.expander(get_text("import_log_header", language)):
             st.warning(get_text("import_log_warning", language))
             for error in parsing_errors:
                 st.code(error, language='text')
 
+    # --- Evolução (resumos diários) ---
+    st.divider()
+    st.subheader(get_text("trends_header", language))
+    if serie.empty:
+        st.info(get_text("no_daily_stats", language))
+        if st.button(get_text("rebuild_daily_stats_button", language)):
+            rebuild_daily_stats(language)
+            st.rerun()
+    else:
+        rotulos_periodo = {'D': "trends_by_day", 'W': "trends_by_week", 'M': "trends_by_month"}
+        periodo = st.radio(get_text("trends_granularity", language), list(rotulos_periodo), index=1, horizontal=True,
+                           format_func=lambda p: get_text(rotulos_periodo[p], language), key="trends_granularity")
+        agrupada = agrupar_serie(serie, periodo)
+        col_t1, col_t2 = st.columns(2)
+        with col_t1:
+            st.caption(get_text("trends_accuracy_title", language))
+            st.line_chart(agrupada['precisao'])
+        with col_t2:
+            st.caption(get_text("trends_activity_title", language))
+            st.bar_chart(agrupada[['respostas', 'minutos']])
+        st.caption(get_text("trends_totals_caption", language, days=len(serie), answers=int(serie['respostas'].sum()),
+                            sessions=int(serie['sessoes'].sum()), masteries=int(serie['dominadas'].sum()),
+                            reactivations=int(serie['reativadas'].sum())))
+
     st.divider()
     st.subheader(get_text("vocab_manager_header", language))
 
@@ -49,53 +79,45 @@ def estatisticas_ui(language):
             fontes_disponiveis.extend(list(db_df['fonte'].unique()))
         fonte_selecionada = st.selectbox(get_text("filter_by_source", language), fontes_disponiveis)
 
+    # Datas de adição em cache no Vocabulario (ns desde a época, UTC): o DataFrame da sessão não ganha colunas derivadas
+    datas_ns = get_session_vocab(language).datas_adicao
+    com_data = datas_ns != np.iinfo(np.int64).min
     with col_f2:
-        if 'data_adicao' in db_df.columns and not db_df['data_adicao'].isnull().all():
-            try:
-                db_df['data_adicao_dt'] = pd.to_datetime(db_df['data_adicao'])
-                data_min = db_df['data_adicao_dt'].min().date()
-                data_max = db_df['data_adicao_dt'].max().date()
-                data_selecionada = st.date_input(get_text("filter_by_date", language), value=(data_min, data_max), min_value=data_min, max_value=data_max)
-            except Exception:
-                data_selecionada = (datetime.date.today(), datetime.date.today())
+        if com_data.any():
+            data_min = pd.Timestamp(datas_ns[com_data].min(), unit='ns', tz='UTC').date()
+            data_max = pd.Timestamp(datas_ns[com_data].max(), unit='ns', tz='UTC').date()
+            data_selecionada = st.date_input(get_text("filter_by_date", language), value=(data_min, data_max), min_value=data_min, max_value=data_max)
         else:
-            data_selecionada = (datetime.date.today(), datetime.date.today())
+            data_selecionada = ()
 
-    df_filtrado = db_df.copy()
+    filtro = np.ones(len(db_df), dtype=bool)
     if fonte_selecionada != "Todas":
-        df_filtrado = df_filtrado[df_filtrado['fonte'] == fonte_selecionada]
-    if 'data_adicao_dt' in df_filtrado.columns and len(data_selecionada) == 2:
-        start_date = pd.to_datetime(data_selecionada[0])
-        end_date = pd.to_datetime(data_selecionada[1]) + pd.Timedelta(days=1)
-        df_filtrado = df_filtrado[(df_filtrado['data_adicao_dt'] >= start_date) & (df_filtrado['data_adicao_dt'] < end_date)]
+        filtro &= db_df['fonte'].to_numpy(dtype=object) == fonte_selecionada
+    if len(data_selecionada) == 2:
+        inicio_ns = pd.Timestamp(data_selecionada[0], tz='UTC').value
+        fim_ns = (pd.Timestamp(data_selecionada[1], tz='UTC') + pd.Timedelta(days=1)).value
+        filtro &= (datas_ns >= inicio_ns) & (datas_ns < fim_ns)
+    # Só as colunas que a tabela mostra, sem copiar o vocabulário inteiro
+    df_filtrado = db_df.loc[filtro, ['palavra', 'ativa', 'fonte', 'mastery_count']]
 
     with col_f3:
         st.write("")
         if st.button(get_text("delete_filtered_button", language), type="primary", use_container_width=True):
             if not df_filtrado.empty:
-                indices_para_deletar = df_filtrado.index
-                db_df_original = get_session_db(language)
-                db_df_original.drop(indices_para_deletar, inplace=True)
-                save_vocab_db(db_df_original, language)
-                st.session_state[f"db_df_{language}"] = db_df_original
-                st.error(f"{len(df_filtrado)} palavras filtradas foram deletadas!")
+                deletadas = delete_vocab_words(df_filtrado['palavra'], language)
+                st.error(f"{deletadas} palavras filtradas foram deletadas!")
                 st.rerun()
             else:
                 st.info("Não há palavras na seleção filtrada para deletar.")
 
-    df_filtrado = df_filtrado.sort_values(by='palavra', ascending=True).reset_index(drop=True)
-
-    def calcular_progresso_geral(row):
-        progresso_dict = row.get('progresso', {})
-        if not isinstance(progresso_dict, dict) or not progresso_dict: return 0
-        acertos_count = list(progresso_dict.values()).count('acerto')
-        total_exercicios = len(progresso_dict)
-        return (acertos_count / total_exercicios * 100) if total_exercicios > 0 else 0
+    df_filtrado = df_filtrado.sort_values(by='palavra', ascending=True)
+    # Índice no vocabulário da sessão, usado para ler os agregados da matriz de progresso
+    indice_vocab = df_filtrado.index
+    df_filtrado = df_filtrado.reset_index(drop=True)
 
-    df_filtrado['progresso_percent'] = df_filtrado.apply(calcular_progresso_geral, axis=1)
+    progresso_percent = pd.Series(get_progress_matrix(language).percentuais(), index=db_df.index)
+    df_filtrado['progresso_percent'] = progresso_percent.reindex(indice_vocab).to_numpy()
 
-    if 'mastery_count' not in df_filtrado.columns:
-        df_filtrado['mastery_count'] = 0
     df_filtrado['mastery_count'] = df_filtrado['mastery_count'].fillna(0).astype(int)
     df_filtrado['mestria'] = df_filtrado['mastery_count'].apply(lambda x: "🏆" * x)
     df_filtrado['deletar'] = False
@@ -113,23 +135,12 @@ def estatisticas_ui(language):
     }
 
     if mostrar_detalhes:
-        id_para_tipo = get_exercise_id_to_type_map(language)
-        todos_os_tipos = sorted(list(set(id_para_tipo.values())))
+        todos_os_tipos = sorted(t for t in get_exercise_type_index(language) if t != '7-Cloze-Text')
+        progresso_por_tipo = calcular_progresso_por_tipo(language, todos_os_tipos).reindex(indice_vocab)
         
         for tipo_ex in todos_os_tipos:
-            if tipo_ex == '7-Cloze-Text': continue
             col_name = f"ex_{tipo_ex.replace(' ', '_')}"
-            
-            def calcular_progresso_por_tipo(row, tipo_alvo):
-                progresso_dict = row.get('progresso', {})
-                exercicios_do_tipo = [status for id_ex, status in progresso_dict.items() if id_para_tipo.get(id_ex) == tipo_alvo]
-                if not exercicios_do_tipo:
-                    return None
-                
-                acertos = exercicios_do_tipo.count('acerto')
-                return (acertos / len(exercicios_do_tipo)) * 100
-
-            df_filtrado[col_name] = df_filtrado.apply(calcular_progresso_por_tipo, args=(tipo_ex,), axis=1)
+            df_filtrado[col_name] = progresso_por_tipo[tipo_ex].to_numpy()
             colunas_visiveis.append(col_name)
             column_config[col_name] = st.column_config.ProgressColumn(
                 tipo_ex, 
@@ -143,11 +154,13 @@ def estatisticas_ui(language):
     col_b1, col_b2 = st.columns(2)
     with col_b1:
         if st.button(get_text("save_active_status_button", language), use_container_width=True):
-            update_map = df_editado.set_index('palavra')['ativa']
-            db_df_original = get_session_db(language)
-            db_df_original['ativa'] = db_df_original['palavra'].map(update_map).fillna(db_df_original['ativa'])
-            save_vocab_db(db_df_original, language)
-            st.session_state[f"db_df_{language}"] = db_df_original
+            # Só as linhas editadas na tabela (posições em df_filtrado) são gravadas
+            linhas_editadas = st.session_state.get("word_manager", {}).get("edited_rows", {})
+            alteracoes = {
+                df_filtrado['palavra'].iat[int(pos)]: mudancas['ativa']
+                for pos, mudancas in linhas_editadas.items() if 'ativa' in mudancas
+            }
+            update_active_status(alteracoes, language)
             st.success("Status de ativação salvo!")
             st.rerun()
             
@@ -155,19 +168,25 @@ def estatisticas_ui(language):
         if st.button(get_text("delete_selected_button", language), use_container_width=True):
             palavras_para_deletar = df_editado[df_editado['deletar']]['palavra']
             if not palavras_para_deletar.empty:
-                db_df_original = get_session_db(language)
-                indices_para_deletar = db_df_original[db_df_original['palavra'].isin(palavras_para_deletar)].index
-                db_df_original.drop(indices_para_deletar, inplace=True)
-                save_vocab_db(db_df_original, language)
-                st.session_state[f"db_df_{language}"] = db_df_original
-                st.warning(f"{len(indices_para_deletar)} palavras selecionadas foram deletadas!")
+                deletadas = delete_vocab_words(palavras_para_deletar, language)
+                st.warning(f"{deletadas} palavras selecionadas foram deletadas!")
                 st.rerun()
             else:
                 st.info("Nenhuma palavra foi marcada para deleção.")
 
+    with st.expander(get_text("deleted_words_header", language)):
+        palavras_apagadas = sorted(get_session_deleted_words(language))
+        if not palavras_apagadas:
+            st.info(get_text("no_deleted_words", language))
+        else:
+            selecionadas = st.multiselect(get_text("deleted_words_select", language), palavras_apagadas, key="restore_words")
+            if st.button(get_text("restore_words_button", language), disabled=not selecionadas):
+                restauradas = restore_vocab_words(selecionadas, language)
+                st.success(get_text("restore_words_success", language).format(n=restauradas))
+                st.rerun()
+
     st.divider()
     st.subheader(get_text("written_texts_log_header", language))
-    writing_log = get_writing_log(language)
     if not writing_log:
         st.info("Você ainda não salvou nenhum texto no 'Modo de Escrita'.")
     else:
@@ -213,7 +232,6 @@ def estatisticas_ui(language):
                 exercises_to_delete_list = [df_cloze.loc[i, 'original_exercise'] for i in indices_to_delete]
                 delete_cloze_exercises(exercises_to_delete_list, language)
                 st.success(f"{len(exercises_to_delete_list)} texto(s) de Cloze deletado(s) com sucesso!")
-                st.cache_data.clear()
                 st.rerun()
             else:
                 st.info("Nenhum texto foi marcado para deleção.")
@@ -0,0 +1,14 @@
+# Ferramenta de manutenção dos resumos diários (coleção daily_stats).
+# Refaz, a partir do histórico de quizzes no Firestore, um documento por dia com as respostas, acertos,
+# sessões, palavras dominadas e minutos de estudo — por exemplo, para o histórico anterior aos resumos diários.
+#
+# Uso: python reconstruir_resumos_diarios.py [en] [fr]
+import sys
+from core.data_manager import rebuild_daily_stats
+
+def main(languages):
+    for language in languages:
+        print(f"[{language}] {rebuild_daily_stats(language)} dias gravados")
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ['en', 'fr'])